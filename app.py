@@ -1,316 +1,81 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import joblib
+import functools
+import os
+import re
+import tempfile
+import time
+
+from batch_jobs import (
+    JOB_STATUS_LABELS,
+    JOBS_DATABASE,
+    JOBS_DIR,
+    STATUS_DONE,
+    STATUS_FAILED,
+    JobRunner,
+    JobStore,
+)
+from explanations import EXPLANATION_TOP_FEATURES, ExplainingScorer, explain_record
+from instrumentation import METRICS, METRICS_PORT_ENV_VAR, PATH_INDIVIDUAL, start_metrics_server
+from ingestion import (
+    RESULT_FORMATS,
+    STREAM_CHUNK_SIZE,
+    estimate_row_count,
+    iter_upload_chunks,
+    peek_upload,
+    read_upload,
+    resolve_upload_columns,
+    score_upload_stream,
+    spool_results,
+    spooled_results_file,
+)
+from model_registry import ModelRegistry
+from model_router import MODEL_ROUTING_PATH, ModelRouter, load_routing_config
+from parallel_scoring import ParallelScorer
+from prediction_cache import PredictionCache, cache_for_batch
+from progress import ProgressReporter
+from sensitivity import SWEEP_POINTS_1D, SWEEP_POINTS_2D, default_sweep_range, sweep, sweep_frame
+from validation import QuarantiningScorer, format_range
+from scoring import (
+    REQUIRED_COLUMNS,
+    UNCLASSIFIED_MISSION,
+    build_results_frame,
+    count_exoplanets,
+    format_results,
+    normalize_missions,
+    predict_probabilities,
+    score_dataframe,
+)
 
 # --- CONFIGURAÇÕES GLOBAIS ---
-MODEL_AND_FEATURES_PATH = "data/model_and_features.pkl"
-IMPUTATION_VALUE = -999.0
-UNCLASSIFIED_MISSION = 'UNCLASSIFIED'
+RESULTS_PREVIEW_ROWS = 1000
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+CUSTOM_CSS_PATH = os.path.join(APP_DIR, "assets", "style.css")
+EXAMPLE_SPREADSHEET_PATH = "example_exoplanet_spreadsheet.csv"
+# Intervalo de atualização do painel de jobs enquanto houver jobs na fila ou em execução
+JOBS_REFRESH_SECONDS = 2
 
 # --- CSS PERSONALIZADO PARA TEMA ESPACIAL ---
+@st.cache_resource(show_spinner=False)
+def get_custom_css():
+    """Folha de estilo lida e compactada uma vez por processo; a cada rerun só o HTML pronto é reenviado."""
+    with open(CUSTOM_CSS_PATH, encoding="utf-8") as f:
+        css = f.read()
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.DOTALL)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    css = re.sub(r"\s+", " ", css)
+    return f"<style>{css.strip()}</style>"
+
 def load_custom_css():
-    st.markdown("""
-    <style>
-    /* Tema espacial escuro */
-    .stApp {
-        background: linear-gradient(135deg, #0a0a0a 0%, #1a1a2e 50%, #16213e 100%);
-        color: #ffffff;
-    }
-    
-    /* Efeito de estrelas no fundo */
-    .stApp::before {
-        content: '';
-        position: fixed;
-        top: 0;
-        left: 0;
-        width: 100%;
-        height: 100%;
-        background-image: 
-            radial-gradient(2px 2px at 20px 30px, #eee, transparent),
-            radial-gradient(2px 2px at 40px 70px, rgba(255,255,255,0.8), transparent),
-            radial-gradient(1px 1px at 90px 40px, #fff, transparent),
-            radial-gradient(1px 1px at 130px 80px, rgba(255,255,255,0.6), transparent),
-            radial-gradient(2px 2px at 160px 30px, #ddd, transparent);
-        background-repeat: repeat;
-        background-size: 200px 100px;
-        animation: sparkle 20s linear infinite;
-        pointer-events: none;
-        z-index: -1;
-    }
-    
-    @keyframes sparkle {
-        from { transform: translateY(0px); }
-        to { transform: translateY(-100px); }
-    }
-    
-    /* Cards para segmentação */
-    .parameter-card {
-        background: rgba(255, 255, 255, 0.05);
-        border: 1px solid rgba(255, 255, 255, 0.1);
-        border-radius: 12px;
-        padding: 20px;
-        margin: 10px 0;
-        backdrop-filter: blur(10px);
-        box-shadow: 0 8px 32px rgba(0, 0, 0, 0.3);
-        transition: all 0.3s ease;
-    }
-    
-    .parameter-card:hover {
-        border-color: rgba(255, 255, 255, 0.3);
-        box-shadow: 0 12px 40px rgba(0, 0, 0, 0.4);
-        transform: translateY(-2px);
-    }
-    
-    /* Título principal */
-    .main-title {
-        text-align: center;
-        font-size: 2.5rem;
-        font-weight: bold;
-        background: linear-gradient(45deg, #ff6b6b, #4ecdc4, #45b7d1, #96ceb4);
-        background-size: 400% 400%;
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        background-clip: text;
-        animation: gradientShift 3s ease infinite;
-        margin-bottom: 20px;
-    }
-    
-    @keyframes gradientShift {
-        0% { background-position: 0% 50%; }
-        50% { background-position: 100% 50%; }
-        100% { background-position: 0% 50%; }
-    }
-    
-    /* Subtítulos */
-    .section-title {
-        color: #4ecdc4;
-        font-size: 1.5rem;
-        font-weight: bold;
-        margin: 20px 0 15px 0;
-        text-align: center;
-        text-shadow: 0 0 10px rgba(78, 205, 196, 0.5);
-    }
-    
-    /* Labels dos parâmetros */
-    .param-label {
-        color: #ffffff;
-        font-weight: bold;
-        font-size: 1rem;
-        margin-bottom: 8px;
-        text-shadow: 0 0 5px rgba(255, 255, 255, 0.3);
-    }
-    
-    /* Inputs personalizados */
-    .stNumberInput > div > div > input {
-        background: rgba(255, 255, 255, 0.1);
-        border: 1px solid rgba(255, 255, 255, 0.2);
-        border-radius: 8px;
-        color: #ffffff;
-        font-size: 1rem;
-    }
-    
-    .stNumberInput > div > div > input:focus {
-        border-color: #4ecdc4;
-        box-shadow: 0 0 10px rgba(78, 205, 196, 0.3);
-    }
-    
-    /* Checkboxes personalizados */
-    .stCheckbox > label {
-        color: #ffffff;
-        font-weight: 500;
-    }
-    
-    /* Botão principal */
-    .stButton > button {
-        background: linear-gradient(45deg, #ff6b6b, #4ecdc4);
-        color: white;
-        border: none;
-        border-radius: 25px;
-        padding: 12px 30px;
-        font-size: 1.2rem;
-        font-weight: bold;
-        box-shadow: 0 4px 15px rgba(0, 0, 0, 0.3);
-        transition: all 0.3s ease;
-        width: 100%;
-    }
-    
-    .stButton > button:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 6px 20px rgba(0, 0, 0, 0.4);
-    }
-    
-    /* Resultado da classificação */
-    .result-card {
-        background: rgba(255, 255, 255, 0.1);
-        border: 2px solid #4ecdc4;
-        border-radius: 15px;
-        padding: 25px;
-        margin: 20px 0;
-        text-align: center;
-        backdrop-filter: blur(10px);
-        box-shadow: 0 10px 30px rgba(78, 205, 196, 0.2);
-    }
-    
-    .result-success {
-        border-color: #96ceb4;
-        box-shadow: 0 10px 30px rgba(150, 206, 180, 0.3);
-    }
-    
-    .result-error {
-        border-color: #ff6b6b;
-        box-shadow: 0 10px 30px rgba(255, 107, 107, 0.3);
-    }
-    
-    /* Métricas */
-    .stMetric {
-        background: rgba(255, 255, 255, 0.05);
-        border-radius: 10px;
-        padding: 15px;
-        border: 1px solid rgba(255, 255, 255, 0.1);
-    }
-    
-    /* Selectbox personalizado */
-    .stSelectbox > div > div > select {
-        background: rgba(255, 255, 255, 0.1);
-        border: 1px solid rgba(255, 255, 255, 0.2);
-        border-radius: 8px;
-        color: #ffffff;
-    }
-    
-    /* Configuração de classificação */
-    .config-section {
-        background: rgba(255, 255, 255, 0.05);
-        border: 1px solid rgba(255, 255, 255, 0.1);
-        border-radius: 12px;
-        padding: 20px;
-        margin: 20px 0;
-        backdrop-filter: blur(10px);
-    }
-    
-    /* Responsividade */
-    @media (max-width: 768px) {
-        .main-title {
-            font-size: 2rem;
-        }
-        
-        .parameter-card {
-            padding: 15px;
-        }
-    }
-    
-    /* Ocultar elementos padrão do Streamlit */
-    .stApp > header {
-        background: rgba(0, 0, 0, 0.8);
-    }
-    
-    #MainMenu {visibility: hidden;}
-    footer {visibility: hidden;}
-    header {visibility: hidden;}
-    
-    /* Estilização das Abas */
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 2px;
-        background: rgba(255, 255, 255, 0.05);
-        border-radius: 15px;
-        padding: 5px;
-        backdrop-filter: blur(10px);
-        border: 1px solid rgba(255, 255, 255, 0.1);
-    }
-    
-    .stTabs [data-baseweb="tab"] {
-        background: transparent;
-        border-radius: 12px;
-        padding: 12px 24px;
-        font-weight: bold;
-        font-size: 1.1rem;
-        transition: all 0.3s ease;
-        border: none;
-        color: #888;
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .stTabs [data-baseweb="tab"]:before {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: -100%;
-        width: 100%;
-        height: 100%;
-        background: linear-gradient(90deg, transparent, rgba(255, 255, 255, 0.1), transparent);
-        transition: left 0.5s ease;
-    }
-    
-    .stTabs [data-baseweb="tab"]:hover:before {
-        left: 100%;
-    }
-    
-    .stTabs [data-baseweb="tab"]:hover {
-        background: rgba(78, 205, 196, 0.1);
-        color: #4ecdc4;
-        transform: translateY(-2px);
-        box-shadow: 0 4px 15px rgba(78, 205, 196, 0.2);
-    }
-    
-    .stTabs [aria-selected="true"] {
-        background: linear-gradient(45deg, #4ecdc4, #45b7d1);
-        color: white;
-        box-shadow: 0 4px 20px rgba(78, 205, 196, 0.4);
-        transform: translateY(-1px);
-    }
-    
-    .stTabs [aria-selected="true"]:hover {
-        background: linear-gradient(45deg, #45b7d1, #4ecdc4);
-        transform: translateY(-2px);
-        box-shadow: 0 6px 25px rgba(78, 205, 196, 0.5);
-    }
-    
-    /* Ícones das abas */
-    .stTabs [data-baseweb="tab"] .stMarkdown {
-        display: flex;
-        align-items: center;
-        gap: 8px;
-    }
-    
-    /* Conteúdo das abas */
-    .stTabs [data-baseweb="tab-panel"] {
-        background: transparent;
-        border-radius: 15px;
-        padding: 20px;
-        margin-top: 20px;
-    }
-    
-    /* Animação de entrada das abas */
-    .stTabs [data-baseweb="tab-panel"] {
-        animation: fadeInUp 0.5s ease-out;
-    }
-    
-    @keyframes fadeInUp {
-        from {
-            opacity: 0;
-            transform: translateY(20px);
-        }
-        to {
-            opacity: 1;
-            transform: translateY(0);
-        }
-    }
-    
-    /* Responsividade das abas */
-    @media (max-width: 768px) {
-        .stTabs [data-baseweb="tab"] {
-            padding: 10px 16px;
-            font-size: 1rem;
-        }
-        
-        .stTabs [data-baseweb="tab-list"] {
-            flex-direction: column;
-            gap: 5px;
-        }
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    st.markdown(get_custom_css(), unsafe_allow_html=True)
+
+@st.cache_data(show_spinner=False)
+def get_example_spreadsheet():
+    """Conteúdo e DataFrame da planilha de exemplo, lidos do disco uma única vez."""
+    with open(EXAMPLE_SPREADSHEET_PATH, "r", encoding="utf-8") as f:
+        csv_data = f.read()
+    return csv_data, pd.read_csv(EXAMPLE_SPREADSHEET_PATH)
 
 # Colunas que serão solicitadas ao usuário
 # Formato: (Label para o usuário, Nome da coluna no modelo, Valor Padrão)
@@ -336,81 +101,126 @@ COLUMNS_TO_ASK_FOR = [
     ("Massa Estelar (Msol)", "st_mass", 1.0)
 ]
 
-# --- FUNÇÃO DE PRÉ-PROCESSAMENTO (IDÊNTICA AO TREINO) ---
+# --- CARREGAR MODELO ---
+@st.cache_resource(show_spinner=False)
+def get_model_registry():
+    """Registro de modelos compartilhado por todas as sessões e reruns do processo."""
+    return ModelRegistry()
+
+@st.cache_resource(show_spinner=False)
+def get_parallel_scorer(model_path, workers):
+    """Pool de processos compartilhado, com uma cópia do modelo em cada worker."""
+    return ParallelScorer(model_path, workers, registry=get_model_registry())
+
+@st.cache_resource(show_spinner=False)
+def get_prediction_cache():
+    """Cache de previsões compartilhado entre sessões, aba individual e importação em lote."""
+    return PredictionCache()
+
+@st.cache_resource(show_spinner=False)
+def get_model_router():
+    """Roteamento entre modelos (data/models.json) com scoring em sombra; sem o arquivo, só o modelo padrão."""
+    return ModelRouter(load_routing_config(MODEL_ROUTING_PATH), get_model_registry(), get_prediction_cache())
+
+@st.cache_resource(show_spinner=False)
+def get_job_store():
+    """Banco dos jobs em segundo plano; consultá-lo não cria o worker nem carrega o modelo."""
+    return JobStore(JOBS_DIR)
+
+@st.cache_resource(show_spinner=False)
+def get_job_runner():
+    """Worker de jobs em segundo plano; ao ser criado, retoma os jobs interrompidos."""
+    return JobRunner(get_job_store(), get_model_registry(), get_prediction_cache())
+
+@st.cache_resource(show_spinner=False)
+def get_metrics_server():
+    """Endpoint GET /metrics (Prometheus) na porta de EXOPLANET_METRICS_PORT, uma vez por processo."""
+    port = os.environ.get(METRICS_PORT_ENV_VAR)
+    if not port:
+        return None
+    return start_metrics_server(int(port))
+
+def show_batch_jobs(results_format, polling=False):
+    """Painel dos jobs em segundo plano (de todas as sessões), com download dos concluídos."""
+    store = get_job_store()
+    if polling and not store.pending_jobs():
+        # Todos os jobs terminaram: um rerun completo desliga a atualização periódica
+        st.rerun()
+    jobs = store.list_jobs()
+    if not jobs:
+        return
+
+    st.markdown('<div class="section-title">🗂️ Jobs em Segundo Plano</div>', unsafe_allow_html=True)
+    st.dataframe(
+        pd.DataFrame({
+            'Job': [job['id'] for job in jobs],
+            'Arquivo': [job['file_name'] for job in jobs],
+            'Status': [JOB_STATUS_LABELS[job['status']] for job in jobs],
+            'Processados': [job['rows_done'] for job in jobs],
+            'Total (aprox.)': [job['total_rows'] for job in jobs],
+            'Exoplanetas': [job['exoplanets'] for job in jobs],
+            'Quarentena': [job['quarantined'] for job in jobs],
+            'Enviado em': [job['created_at'] for job in jobs],
+        }),
+        use_container_width=True,
+        hide_index=True
+    )
+    for job in jobs:
+        if job['status'] == STATUS_FAILED:
+            st.error(f"❌ Job {job['id']} ({job['file_name']}): {job['error']}")
+
+    done_jobs = {job['id']: job for job in jobs if job['status'] == STATUS_DONE}
+    if not done_jobs:
+        return
+    job_id = st.selectbox(
+        "Job concluído",
+        options=list(done_jobs),
+        format_func=lambda job_id: f"{job_id} — {done_jobs[job_id]['file_name']}"
+    )
+    if st.button("📦 Preparar Download do Job"):
+        job = done_jobs[job_id]
+        results_file = spooled_results_file()
+        store.write_results(job_id, results_file, results_format)
+        results_file.seek(0)
+        extension, mime = RESULT_FORMATS[results_format]
+        st.download_button(
+            label=f"📥 Baixar Resultados do Job ({results_format.upper()})",
+            data=results_file.read(),
+            file_name=f"resultados_job_{job_id}_{job['rows_done']}_registros{extension}",
+            mime=mime,
+            key=f"download_job_{job_id}_{results_format}"
+        )
+        results_file.close()
+        if job['quarantined']:
+            quarantine_file = tempfile.TemporaryFile()
+            store.write_quarantine(job_id, quarantine_file)
+            quarantine_file.seek(0)
+            st.download_button(
+                label="📥 Baixar Linhas em Quarentena do Job (CSV)",
+                data=quarantine_file.read(),
+                file_name=f"quarentena_job_{job_id}_{job['quarantined']}_registros.csv",
+                mime="text/csv",
+                key=f"download_job_quarantine_{job_id}"
+            )
+            quarantine_file.close()
 
-def prepare_data_for_model(data_dict, train_features):
-    """Cria o DataFrame de input e aplica o pré-processamento (IDÊNTICO ao predict_sheet.py)."""
-    
-    # 1. Cria o DataFrame
-    df = pd.DataFrame([data_dict])
-    
-    # 2. TRATAMENTO DE MISSÃO (apenas se necessário)
-    if 'mission' not in df.columns or df['mission'].isna().all():
-        df['mission'] = UNCLASSIFIED_MISSION
-    
-    # 3. TRATAMENTO DE FLAGS BINÁRIOS (Imputação de 0) - IDÊNTICO ao predict_sheet.py
-    binary_cols = [col for col in train_features if 'fpflag' in col]
-    # Certificar que as colunas existem no DF antes de preencher
-    for col in binary_cols:
-        if col not in df.columns:
-            df[col] = pd.NA
-    df[binary_cols] = df[binary_cols].fillna(0)  # Mudança: 0 em vez de 0.0
-    
-    # 4. ONE-HOT ENCODING DA MISSÃO
-    df = pd.get_dummies(df, columns=['mission'], drop_first=False)
-
-    # 5. GARANTIR CONSISTÊNCIA DE COLUNAS (CRÍTICO!) - IDÊNTICO ao predict_sheet.py
-    # Preencher colunas One-Hot que podem estar faltando
-    ohe_cols = [col for col in train_features if 'mission_' in col]
-    for col in ohe_cols:
-        if col not in df.columns:
-            df[col] = 0  # Mudança: 0 em vez de 0.0
-            
-    # 6. IMPUTAÇÃO FINAL E ORDENAÇÃO - IDÊNTICO ao predict_sheet.py
-    # Preencher todos os NaNs restantes com -999
-    df = df.fillna(-999)  # Mudança: -999 em vez de IMPUTATION_VALUE
-    
-    # Selecionar e reordenar as colunas EXATAMENTE como no treino
-    return df[train_features]
+# Tempo de acesso ao modelo neste rerun (None se nenhuma previsão o pediu)
+model_lookup_seconds = None
 
+def get_loaded_model():
+    """Modelo padrão do roteamento, carregado só quando uma previsão é pedida (o xgboost é importado aqui)."""
+    global model_lookup_seconds
+    model_lookup_start = time.perf_counter()
+    router = get_model_router()
+    model_path = router.config.default_path
+    try:
+        loaded = router.loaded(router.config.default)
+    except FileNotFoundError:
+        st.error(f"Erro: Arquivo do modelo não encontrado em {model_path}. Execute o treinamento primeiro (python train_model.py)!")
+        st.stop()
+    model_lookup_seconds = time.perf_counter() - model_lookup_start
+    return loaded
 
-# --- CARREGAR MODELO ---
-try:
-    model_data = joblib.load(MODEL_AND_FEATURES_PATH)
-    xgb_model = model_data[0]
-    train_features = model_data[1]
-except FileNotFoundError:
-    st.error(f"Erro: Arquivo do modelo não encontrado em {MODEL_AND_FEATURES_PATH}. Execute o treinamento primeiro!")
-    st.stop()
-
-
-# --- CONFIGURAÇÃO DAS COLUNAS PARA IMPORT ---
-REQUIRED_COLUMNS = [
-    ("koi_period", "Período Orbital", "Dias", "Trânsito"),
-    ("koi_time0bk", "Tempo do 1º Trânsito", "BKJD", "Trânsito"),
-    ("koi_impact", "Parâmetro de Impacto", "Normalizado", "Trânsito"),
-    ("koi_duration", "Duração do Trânsito", "Horas", "Trânsito"),
-    ("koi_depth", "Profundidade do Trânsito", "ppm", "Trânsito"),
-    ("koi_prad", "Raio Planetário", "R⊕", "Planeta"),
-    ("koi_teq", "Temperatura de Equilíbrio", "K", "Planeta"),
-    ("koi_insol", "Insolação", "S⊕", "Planeta"),
-    ("koi_model_snr", "Razão Sinal/Ruído", "Unidade (s/ dimensão)", "Qualidade"),
-    ("koi_steff", "Temperatura Estelar", "K", "Estrela"),
-    ("koi_slogg", "Log g Estelar", "Log₁₀ (cgs)", "Estrela"),
-    ("koi_srad", "Raio Estelar", "R☉", "Estrela"),
-    ("ra", "Ascensão Reta", "Graus", "Coordenada"),
-    ("dec", "Declinação", "Graus", "Coordenada"),
-    ("koi_kepmag", "Magnitude Kepler", "mag", "Estrela"),
-    ("koi_fpflag_nt", "Flag: Não-Trânsito", "0 ou 1", "Flag FP"),
-    ("koi_fpflag_ss", "Flag: Eclipse Secundário", "0 ou 1", "Flag FP"),
-    ("koi_fpflag_co", "Flag: Desvio Centroide", "0 ou 1", "Flag FP"),
-    ("koi_fpflag_ec", "Flag: Contaminação", "0 ou 1", "Flag FP"),
-    ("mission", "Contexto da Missão", "Texto", "Missão"),
-    ("pl_orbsmax", "Semieixo Maior", "AU", "Órbita Extra"),
-    ("pl_bmasse", "Massa Planetária", "M⊕", "Massa Extra"),
-    ("pl_orbeccen", "Excentricidade Orbital", "(Valor de 0 a 1)", "Órbita Extra"),
-    ("st_mass", "Massa Estelar", "M☉", "Massa Estelar Extra")
-]
 
 # --- INTERFACE STREAMLIT ---
 
@@ -553,6 +363,11 @@ with tab1:
 
 
     # 3. Lógica de Previsão
+    explain_prediction = st.checkbox(
+        "🔍 Explicar a previsão (principais fatores)",
+        value=True,
+        help="Contribuição de cada parâmetro para a decisão, calculada pelo próprio XGBoost"
+    )
     st.markdown('<div style="text-align: center; margin: 30px 0;">', unsafe_allow_html=True)
     if st.button("🚀 Classificar Objeto", type="primary"):
         st.markdown('</div>', unsafe_allow_html=True)
@@ -562,16 +377,28 @@ with tab1:
         if input_data['mission'] == 'NO-MISSION':
             input_data['mission'] = UNCLASSIFIED_MISSION
             
-        # Aplica o pré-processamento
-        X_processed = prepare_data_for_model(input_data, train_features)
-        
-        # Realiza a Previsão
-        predictions = xgb_model.predict(X_processed)
-        probabilities = xgb_model.predict_proba(X_processed)[0]
-        
-        prob_exoplanet = probabilities[1]
+        # Aplica o pré-processamento (plano compilado no carregamento do modelo)
+        loaded_model = get_loaded_model()
+        router = get_model_router()
+        routed_model = None
+        if router.config.is_single_model:
+            with METRICS.stage('preprocess', path=PATH_INDIVIDUAL, rows=1):
+                X_processed = loaded_model.feature_plan.transform_records([input_data])
+            
+            # Realiza a Previsão (com o cache de previsões compartilhado com a importação em lote)
+            with METRICS.stage('predict', path=PATH_INDIVIDUAL, rows=1):
+                prob_exoplanet = predict_probabilities(
+                    loaded_model.scorer, X_processed, get_prediction_cache(), loaded_model.content_hash
+                )[0]
+        else:
+            # Vários modelos: o roteamento escolhe o modelo (por missão ou divisão de tráfego)
+            with METRICS.stage('predict', path=PATH_INDIVIDUAL, rows=1):
+                routed_result = router.score(pd.DataFrame([input_data]))
+            prob_exoplanet = routed_result['Probabilidade_Numerica'].iloc[0]
+            routed_model = routed_result['Modelo'].iloc[0] if 'Modelo' in routed_result else router.config.default
         
         # Seção de resultados com estilo personalizado
+        render_start = time.perf_counter()
         st.markdown('<div class="section-title">🎯 Resultado da Classificação</div>', unsafe_allow_html=True)
         
         # Card de resultado personalizado
@@ -594,11 +421,27 @@ with tab1:
         """, unsafe_allow_html=True)
         
         # Informação adicional
-        st.markdown("""
+        model_note = f" (modelo: {routed_model})" if routed_model is not None else ""
+        st.markdown(f"""
         <div style="text-align: center; color: #888; font-style: italic; margin-top: 20px;">
-            Previsão baseada no seu modelo XGBoost treinado
+            Previsão baseada no seu modelo XGBoost treinado{model_note}
         </div>
         """, unsafe_allow_html=True)
+        METRICS.observe(PATH_INDIVIDUAL, 'render', time.perf_counter() - render_start, 1)
+        
+        # Principais fatores: contribuições do modelo que classificou o objeto
+        if explain_prediction:
+            explained_model = router.loaded(routed_model) if routed_model is not None else loaded_model
+            with METRICS.stage('explain', path=PATH_INDIVIDUAL, rows=1):
+                drivers, _ = explain_record(explained_model, input_data)
+            st.markdown('<div class="section-title">🔍 Principais Fatores da Previsão</div>', unsafe_allow_html=True)
+            st.dataframe(
+                drivers,
+                use_container_width=True,
+                hide_index=True,
+                column_config={'Contribuição': st.column_config.NumberColumn(format="%+.3f")}
+            )
+            st.caption("Contribuições em log-odds (valores SHAP do XGBoost): positivas aproximam de EXOPLANETA, negativas de FALSO POSITIVO. As colunas de missão aparecem somadas em 'mission'.")
         
         # Aviso sobre confiabilidade
         if prob_exoplanet > 0.9 or prob_exoplanet < 0.1:
@@ -613,6 +456,75 @@ with tab1:
     else:
         st.markdown('</div>', unsafe_allow_html=True)
 
+    # 4. Análise de Sensibilidade (what-if): a grade inteira em uma única chamada ao modelo
+    with st.expander("📈 Análise de Sensibilidade (what-if)"):
+        st.caption("Varia um ou dois parâmetros a partir dos valores do formulário e mostra como a probabilidade muda.")
+        param_labels = {col_name: prompt for prompt, col_name, _ in COLUMNS_TO_ASK_FOR}
+        sweep_col_x, sweep_col_y = st.columns(2)
+        with sweep_col_x:
+            sweep_x = st.selectbox(
+                "Parâmetro 1", options=list(param_labels), format_func=param_labels.get,
+                index=list(param_labels).index('koi_model_snr'), key='sweep_x'
+            )
+            x_low, x_high = default_sweep_range(sweep_x, input_data.get(sweep_x))
+            # A chave inclui o parâmetro: trocar de parâmetro recomeça da faixa padrão
+            x_min = st.number_input("Mínimo", value=x_low, format="%.6f", key=f'sweep_x_min_{sweep_x}')
+            x_max = st.number_input("Máximo", value=x_high, format="%.6f", key=f'sweep_x_max_{sweep_x}')
+        with sweep_col_y:
+            sweep_y = st.selectbox(
+                "Parâmetro 2 (opcional)", options=[None] + [name for name in param_labels if name != sweep_x],
+                format_func=lambda name: "— Nenhum (curva) —" if name is None else param_labels[name], key='sweep_y'
+            )
+            if sweep_y is not None:
+                y_low, y_high = default_sweep_range(sweep_y, input_data.get(sweep_y))
+                y_min = st.number_input("Mínimo", value=y_low, format="%.6f", key=f'sweep_y_min_{sweep_y}')
+                y_max = st.number_input("Máximo", value=y_high, format="%.6f", key=f'sweep_y_max_{sweep_y}')
+
+        if st.button("📈 Gerar Análise"):
+            if x_min >= x_max or (sweep_y is not None and y_min >= y_max):
+                st.error("❌ O mínimo de cada parâmetro deve ser menor que o máximo.")
+            else:
+                # Mesma missão normalizada da classificação: 'NO-MISSION' vira UNCLASSIFIED
+                sweep_input = {**input_data, 'mission': normalize_missions(pd.DataFrame([input_data])).iloc[0]}
+                loaded_model = get_loaded_model()
+                router = get_model_router()
+                if not router.config.is_single_model:
+                    # Toda a grade usa o modelo da rota do objeto original
+                    routed_code = router.route(pd.DataFrame([sweep_input]))[0]
+                    loaded_model = router.loaded(router.model_names[routed_code])
+
+                if sweep_y is None:
+                    axes = [(sweep_x, np.linspace(x_min, x_max, SWEEP_POINTS_1D))]
+                else:
+                    axes = [
+                        (sweep_x, np.linspace(x_min, x_max, SWEEP_POINTS_2D)),
+                        (sweep_y, np.linspace(y_min, y_max, SWEEP_POINTS_2D)),
+                    ]
+                sweep_start = time.perf_counter()
+                probabilities = sweep(loaded_model, sweep_input, axes)
+                sweep_seconds = time.perf_counter() - sweep_start
+                METRICS.observe(PATH_INDIVIDUAL, 'sweep', sweep_seconds, probabilities.size)
+                sweep_df = sweep_frame(axes, probabilities)
+
+                if sweep_y is None:
+                    st.line_chart(sweep_df, x=sweep_x, y='Probabilidade')
+                else:
+                    st.vega_lite_chart(sweep_df, {
+                        'mark': 'rect',
+                        'encoding': {
+                            'x': {'field': sweep_x, 'type': 'quantitative', 'bin': {'maxbins': SWEEP_POINTS_2D}, 'title': param_labels[sweep_x]},
+                            'y': {'field': sweep_y, 'type': 'quantitative', 'bin': {'maxbins': SWEEP_POINTS_2D}, 'title': param_labels[sweep_y]},
+                            'color': {
+                                'field': 'Probabilidade', 'type': 'quantitative', 'aggregate': 'mean',
+                                'scale': {'domain': [0, 1], 'scheme': 'viridis'},
+                            },
+                        },
+                    }, use_container_width=True)
+                st.caption(
+                    f"{len(sweep_df):,} pontos classificados em uma única chamada ao modelo "
+                    f"({sweep_seconds * 1000:.1f} ms). Acima de 50% a previsão é EXOPLANETA.".replace(',', '.')
+                )
+
 with tab2:
     st.markdown("""
     <div style="text-align: center; color: #cccccc; margin-bottom: 30px; font-size: 1.1rem;">
@@ -628,11 +540,11 @@ with tab2:
     <div class="config-section">
         <h4 style="color: #4ecdc4; margin-bottom: 15px;">📝 Formato da Planilha</h4>
         <p style="color: #cccccc; margin-bottom: 10px;">
-            Sua planilha deve conter exatamente <strong>24 colunas</strong> na ordem especificada abaixo:
+            Sua planilha deve conter as <strong>24 colunas</strong> listadas abaixo (em qualquer ordem):
         </p>
         <ul style="color: #cccccc; margin-left: 20px;">
-            <li>Formato aceito: <strong>Excel (.xlsx, .xls)</strong> ou <strong>CSV (.csv)</strong></li>
-            <li>Primeira linha deve conter os nomes das colunas</li>
+            <li>Formato aceito: <strong>Excel (.xlsx, .xls)</strong>, <strong>CSV (.csv)</strong>, <strong>Parquet</strong> ou <strong>Arrow</strong></li>
+            <li>Primeira linha deve conter os nomes das colunas (maiúsculas, acentos e nomes do NASA Exoplanet Archive como <code>pl_rade</code> são reconhecidos)</li>
             <li>Valores ausentes devem ser deixados em branco ou como NaN</li>
             <li>Flags FP devem ser 0 ou 1</li>
             <li>Unidades devem estar conforme especificado na tabela</li>
@@ -645,8 +557,7 @@ with tab2:
     
     # Carregar e disponibilizar a planilha de exemplo
     try:
-        with open("example_exoplanet_spreadsheet.csv", "r", encoding="utf-8") as f:
-            csv_data = f.read()
+        csv_data, df_example = get_example_spreadsheet()
         
         st.markdown("""
         <div class="config-section">
@@ -658,51 +569,6 @@ with tab2:
         </div>
         """, unsafe_allow_html=True)
         
-        # CSS específico para o botão de download
-        st.markdown("""
-        <style>
-        /* Forçar estilo para todos os botões de download */
-        .stDownloadButton > button,
-        .stDownloadButton > button:focus,
-        .stDownloadButton > button:active,
-        .stDownloadButton > button:visited {
-            background: linear-gradient(45deg, #4ecdc4, #45b7d1) !important;
-            background-color: #4ecdc4 !important;
-            color: white !important;
-            border: none !important;
-            border-radius: 25px !important;
-            padding: 12px 30px !important;
-            font-size: 1.1rem !important;
-            font-weight: bold !important;
-            box-shadow: 0 4px 15px rgba(0, 0, 0, 0.3) !important;
-            transition: all 0.3s ease !important;
-            width: 100% !important;
-            text-align: center !important;
-            cursor: pointer !important;
-        }
-        
-        .stDownloadButton > button:hover {
-            background: linear-gradient(45deg, #45b7d1, #4ecdc4) !important;
-            background-color: #45b7d1 !important;
-            transform: translateY(-2px) !important;
-            box-shadow: 0 6px 20px rgba(0, 0, 0, 0.4) !important;
-            color: white !important;
-        }
-        
-        /* Garantir que o texto seja sempre visível */
-        .stDownloadButton > button * {
-            color: white !important;
-        }
-        
-        /* Estilo específico para o botão de exemplo */
-        div[data-testid="stDownloadButton"] > button {
-            background: linear-gradient(45deg, #4ecdc4, #45b7d1) !important;
-            background-color: #4ecdc4 !important;
-            color: white !important;
-        }
-        </style>
-        """, unsafe_allow_html=True)
-        
         # Botão de download único e bem estilizado
         st.markdown("""
         <div style="text-align: center; margin: 20px 0;">
@@ -727,8 +593,7 @@ with tab2:
         </div>
         """, unsafe_allow_html=True)
         
-        # Carregar e exibir preview
-        df_example = pd.read_csv("example_exoplanet_spreadsheet.csv")
+        # Exibir preview
         st.dataframe(df_example, use_container_width=True, hide_index=True)
         
     except FileNotFoundError:
@@ -760,7 +625,8 @@ with tab2:
         'Nome Técnico': [col[0] for col in REQUIRED_COLUMNS],
         'Conceito': [col[1] for col in REQUIRED_COLUMNS],
         'Unidade': [col[2] for col in REQUIRED_COLUMNS],
-        'Categoria': [col[3] for col in REQUIRED_COLUMNS]
+        'Categoria': [col[3] for col in REQUIRED_COLUMNS],
+        'Faixa Esperada': [format_range(col[4]) if col[4] is not None else '—' for col in REQUIRED_COLUMNS]
     })
     
     # Exibir tabela com estilo
@@ -781,45 +647,78 @@ with tab2:
     st.markdown('<div class="section-title">📁 Upload da Planilha</div>', unsafe_allow_html=True)
     
     uploaded_file = st.file_uploader(
-        "Escolha um arquivo Excel ou CSV",
-        type=['xlsx', 'xls', 'csv'],
-        help="Arquivo deve conter as 24 colunas na ordem especificada"
+        "Escolha um arquivo Excel, CSV, Parquet ou Arrow",
+        type=['xlsx', 'xls', 'csv', 'parquet', 'arrow', 'feather'],
+        help="Arquivo deve conter as 24 colunas, em qualquer ordem; colunas extras são ignoradas"
+    )
+    
+    stream_mode = st.checkbox(
+        "⚡ Modo streaming (arquivos grandes)",
+        value=False,
+        help=f"Lê e classifica a planilha em blocos de {STREAM_CHUNK_SIZE} linhas, sem carregá-la inteira na memória"
+    )
+    
+    scoring_workers = st.number_input(
+        "🧵 Processos em paralelo",
+        min_value=1,
+        max_value=os.cpu_count() or 1,
+        value=1,
+        step=1,
+        help="Divide a planilha em fragmentos classificados por vários processos (1 = processamento serial)"
+    )
+    
+    validate_values = st.checkbox(
+        "🛡️ Validar valores (quarentena de linhas inválidas)",
+        value=True,
+        help="Confere tipos e missões de cada coluna: linhas inválidas são separadas em vez de interromper o processamento. Flags fora de 0/1 e valores fora da faixa esperada só geram aviso"
+    )
+    
+    explain_batch = st.checkbox(
+        "🔍 Incluir explicação (principais fatores)",
+        value=False,
+        help=f"Acrescenta aos resultados os {EXPLANATION_TOP_FEATURES} parâmetros de maior contribuição de cada linha (Fator_i / Contribuicao_i); uma passada extra do modelo por bloco"
+    )
+    
+    results_format = st.selectbox(
+        "💾 Formato do download",
+        options=list(RESULT_FORMATS),
+        format_func=str.upper,
+        help="Parquet e Arrow mantêm a probabilidade numérica (float32) em vez do texto formatado"
     )
     
     if uploaded_file is not None:
         try:
-            # Ler o arquivo
-            if uploaded_file.name.endswith('.csv'):
-                df = pd.read_csv(uploaded_file)
-            else:
-                df = pd.read_excel(uploaded_file)
+            # Mapear as colunas do arquivo por nome (uma vez por arquivo; a ordem não importa)
+            resolution = resolve_upload_columns(uploaded_file, uploaded_file.name)
             
-            st.success(f"✅ Arquivo carregado com sucesso! {len(df)} registros encontrados.")
+            # Ler o arquivo (no modo streaming, apenas o cabeçalho e as primeiras linhas)
+            if stream_mode:
+                df = peek_upload(uploaded_file, uploaded_file.name, resolution=resolution)
+                st.success("✅ Arquivo aberto em modo streaming! Os registros serão lidos em blocos durante o processamento.")
+            else:
+                with METRICS.stage('parse') as parse_timer:
+                    df = read_upload(uploaded_file, uploaded_file.name, resolution=resolution)
+                    parse_timer.rows = len(df)
+                st.success(f"✅ Arquivo carregado com sucesso! {len(df)} registros encontrados.")
             
             # Validar colunas
-            required_col_names = [col[0] for col in REQUIRED_COLUMNS]
-            missing_cols = [col for col in required_col_names if col not in df.columns]
-            extra_cols = [col for col in df.columns if col not in required_col_names]
+            missing_cols = resolution.missing
             
             if missing_cols:
                 st.error(f"❌ Colunas ausentes: {', '.join(missing_cols)}")
-            if extra_cols:
-                st.warning(f"⚠️ Colunas extras (serão ignoradas): {', '.join(extra_cols)}")
-            
-            # Verificar ordem das colunas
-            df_cols = list(df.columns)
-            correct_order = [col for col in required_col_names if col in df_cols]
-            wrong_order = []
+            if resolution.extra:
+                st.warning(f"⚠️ Colunas extras (serão ignoradas): {', '.join(map(str, resolution.extra))}")
+            for target, ignored in resolution.duplicates.items():
+                st.warning(f"⚠️ Mais de uma coluna corresponde a '{target}'; ignoradas: {', '.join(map(str, ignored))}")
+            if resolution.renamed:
+                st.info("🔀 Colunas mapeadas pelo nome: " + ", ".join(
+                    f"'{source}' → '{target}'" for source, target in resolution.renamed.items()
+                ))
             
-            for i, col in enumerate(correct_order):
-                if df_cols[i] != col:
-                    wrong_order.append(f"Posição {i+1}: esperado '{col}', encontrado '{df_cols[i]}'")
-            
-            if wrong_order:
-                st.warning("⚠️ Ordem das colunas incorreta:")
-                for error in wrong_order:
-                    st.write(f"  • {error}")
-            else:
+            # A ordem das colunas não bloqueia o processamento: o mapeamento é feito por nome
+            if resolution.reordered:
+                st.info("ℹ️ As colunas estão fora da ordem do template; elas serão reordenadas automaticamente.")
+            elif not missing_cols:
                 st.success("✅ Ordem das colunas está correta!")
             
             # Mostrar preview dos dados
@@ -827,80 +726,173 @@ with tab2:
             st.dataframe(df.head(10), use_container_width=True)
             
             # Botão para processar
-            if not missing_cols and not wrong_order:
+            if not missing_cols:
                 st.markdown('<div style="text-align: center; margin: 30px 0;">', unsafe_allow_html=True)
-                if st.button("🚀 Processar Planilha", type="primary"):
+                process_clicked = st.button("🚀 Processar Planilha", type="primary")
+                background_clicked = st.button(
+                    "🗂️ Processar em Segundo Plano",
+                    help="Classifica a planilha em um worker, com checkpoint a cada bloco: fechar a aba não perde o progresso e jobs interrompidos são retomados"
+                )
+                if background_clicked:
+                    st.markdown('</div>', unsafe_allow_html=True)
+                    router = get_model_router()
+                    if not router.config.is_single_model:
+                        st.info(f"ℹ️ Jobs em segundo plano usam só o modelo padrão ({router.config.default}), sem roteamento nem sombra.")
+                    job_id = get_job_runner().submit(
+                        uploaded_file, uploaded_file.name, router.config.default_path, validate=validate_values
+                    )
+                    st.success(f"✅ Job {job_id} enviado! Acompanhe o andamento em 'Jobs em Segundo Plano'.")
+                if process_clicked:
                     st.markdown('</div>', unsafe_allow_html=True)
                     
-                    # Processar cada linha
-                    results = []
                     progress_bar = st.progress(0)
                     status_text = st.empty()
+
+                    def render_progress(snapshot):
+                        status_text.text(f'Processando: {snapshot.describe()}')
+                        if snapshot.fraction is not None:
+                            progress_bar.progress(snapshot.fraction)
+
+                    # Atualizações da interface com taxa limitada, em qualquer modo de processamento
+                    progress = ProgressReporter(render_progress)
+
+                    # No streaming os blocos chegam um a um: o total estimado decide se o cache de previsões compensa
+                    total_rows = estimate_row_count(uploaded_file, uploaded_file.name) if stream_mode else len(df)
+                    batch_cache = cache_for_batch(get_prediction_cache(), total_rows)
+
+                    router = get_model_router()
+                    if scoring_workers > 1 and not router.config.is_single_model:
+                        st.info("ℹ️ Com roteamento entre modelos a planilha é classificada em um único processo.")
+                    if explain_batch and not router.config.is_single_model:
+                        st.info("ℹ️ A explicação não está disponível com roteamento entre modelos.")
+                    elif explain_batch and scoring_workers > 1:
+                        st.info("ℹ️ Com explicação a planilha é classificada em um único processo.")
+                    if explain_batch and router.config.is_single_model:
+                        # Previsão e contribuições sobre a mesma matriz pré-processada de cada bloco
+                        score_chunk = ExplainingScorer(get_loaded_model(), cache=batch_cache).score
+                    elif scoring_workers > 1 and router.config.is_single_model:
+                        # As linhas já vistas saem do cache; só as ausentes vão aos workers
+                        score_chunk = functools.partial(
+                            get_parallel_scorer(router.config.default_path, int(scoring_workers)).score,
+                            cache=batch_cache,
+                        )
+                    elif router.config.is_single_model:
+                        # Previsões pelo Booster nativo (uma única passada por matriz float32)
+                        loaded_model = get_loaded_model()
+                        score_chunk = functools.partial(
+                            score_dataframe,
+                            model=loaded_model.scorer,
+                            train_features=loaded_model.train_features,
+                            cache=batch_cache,
+                            model_version=loaded_model.content_hash
+                        )
+                    else:
+                        # Cada linha vai ao modelo da sua rota; os modelos em sombra usam a mesma matriz
+                        get_loaded_model()
+                        score_chunk = router.score
+
+                    quarantine = None
+                    if validate_values:
+                        quarantine = QuarantiningScorer(score_chunk, quarantine_output=tempfile.TemporaryFile())
+                        score_chunk = quarantine
+
+                    if stream_mode:
+                        # Ler, classificar e gravar o arquivo de saída bloco a bloco
+                        results_file = spooled_results_file()
+                        total_count = 0
+                        exoplanet_count = 0
+                        preview_blocks = []
+                        preview_count = 0
+                        progress.total = total_rows
+
+                        chunks = METRICS.timed_iter(
+                            iter_upload_chunks(uploaded_file, uploaded_file.name, resolution=resolution), 'parse'
+                        )
+                        for chunk_results in score_upload_stream(chunks, score_chunk, results_file, results_format):
+                            total_count += len(chunk_results)
+                            exoplanet_count += count_exoplanets(chunk_results)
+                            if preview_count < RESULTS_PREVIEW_ROWS:
+                                preview_blocks.append(chunk_results.head(RESULTS_PREVIEW_ROWS - preview_count))
+                                preview_count += len(preview_blocks[-1])
+                            # Linhas lidas do arquivo, inclusive as que foram para a quarentena
+                            progress(total_count + (quarantine.n_invalid if quarantine is not None else 0))
+
+                        progress_bar.progress(1.0)
+                        results_df = pd.concat(preview_blocks, ignore_index=True) if preview_blocks else build_results_frame([], [])
+                        results_file.seek(0)
+                    else:
+                        # Processar a planilha inteira em blocos vetorizados (ou fragmentos em paralelo);
+                        # os resultados ficam em colunas tipadas e o arquivo de saída é gravado em fatias
+                        all_results = score_chunk(df, on_progress=progress)
+                        total_count = len(all_results)
+                        exoplanet_count = count_exoplanets(all_results)
+                        results_file = spool_results(all_results, results_format)
+                        results_df = all_results.head(RESULTS_PREVIEW_ROWS)
+                        del all_results
                     
-                    for idx, row in df.iterrows():
-                        status_text.text(f'Processando registro {idx + 1} de {len(df)}...')
-                        
-                        # Converter linha para dicionário
-                        row_data = row.to_dict()
-                        
-                        # Ajustar missão se necessário
-                        if row_data.get('mission') == 'NO-MISSION' or pd.isna(row_data.get('mission')):
-                            row_data['mission'] = UNCLASSIFIED_MISSION
-                        
-                        # Aplicar pré-processamento
-                        X_processed = prepare_data_for_model(row_data, train_features)
-                        
-                        # Realizar previsão
-                        predictions = xgb_model.predict(X_processed)
-                        probabilities = xgb_model.predict_proba(X_processed)[0]
-                        
-                        prob_exoplanet = probabilities[1]
-                        prediction_class = "EXOPLANETA" if prob_exoplanet > 0.5 else "FALSO_POSITIVO"
-                        
-                        results.append({
-                            'Registro': idx + 1,
-                            'Predição': prediction_class,
-                            'Probabilidade_Exoplaneta': f"{prob_exoplanet * 100:.2f}%",
-                            'Probabilidade_Numerica': prob_exoplanet
-                        })
-                        
-                        progress_bar.progress((idx + 1) / len(df))
-                    
-                    status_text.text('Processamento concluído!')
+                    final = progress.finish()
+                    status_text.text(f'Processamento concluído! {final.rows_per_second:,.0f} registros/s'.replace(',', '.'))
                     
                     # Exibir resultados
                     st.markdown('<div class="section-title">🎯 Resultados da Classificação</div>', unsafe_allow_html=True)
                     
-                    results_df = pd.DataFrame(results)
-                    
                     # Estatísticas gerais
-                    exoplanet_count = len([r for r in results if r['Predição'] == 'EXOPLANETA'])
-                    fp_count = len([r for r in results if r['Predição'] == 'FALSO_POSITIVO'])
+                    fp_count = total_count - exoplanet_count
                     
                     col1, col2, col3 = st.columns(3)
                     with col1:
-                        st.metric("Total de Registros", len(results))
+                        st.metric("Total de Registros", total_count)
                     with col2:
                         st.metric("Exoplanetas Detectados", exoplanet_count)
                     with col3:
                         st.metric("Falsos Positivos", fp_count)
                     
+                    # Linhas em quarentena (valores inválidos)
+                    if quarantine is not None and quarantine.n_invalid:
+                        st.warning(f"⚠️ {quarantine.n_invalid} linhas com valores inválidos foram colocadas em quarentena e não foram classificadas.")
+                        st.dataframe(quarantine.summary(), use_container_width=True, hide_index=True)
+                        quarantine_preview = quarantine.preview_frame()
+                        st.dataframe(quarantine_preview[['Registro', 'Erros']], use_container_width=True, hide_index=True)
+                        quarantine.quarantine_output.seek(0)
+                        st.download_button(
+                            label="📥 Baixar Linhas em Quarentena (CSV)",
+                            data=quarantine.quarantine_output.read(),
+                            file_name=f"quarentena_{quarantine.n_invalid}_registros.csv",
+                            mime="text/csv",
+                            key="download_quarantine_csv"
+                        )
+                    if quarantine is not None and quarantine.warnings:
+                        st.info("ℹ️ Valores fora da faixa esperada (as linhas foram classificadas normalmente):")
+                        st.dataframe(quarantine.warning_summary(), use_container_width=True, hide_index=True)
+                    if quarantine is not None:
+                        quarantine.quarantine_output.close()
+                    
                     # Tabela de resultados
-                    st.dataframe(
-                        results_df[['Registro', 'Predição', 'Probabilidade_Exoplaneta']],
-                        use_container_width=True,
-                        hide_index=True
-                    )
+                    if len(results_df) < total_count:
+                        st.info(f"ℹ️ Exibindo os primeiros {len(results_df)} resultados. Baixe o arquivo para ver todos.")
+                    display_df = format_results(results_df)
+                    # Coluna Modelo só existe com roteamento entre vários modelos; Fator_i, com explicação
+                    display_columns = [
+                        col for col in ['Registro', 'Modelo', 'Predição', 'Probabilidade_Exoplaneta'] if col in display_df.columns
+                    ] + [col for col in display_df.columns if col.startswith('Fator_')]
+                    with METRICS.stage('render', rows=len(display_df)):
+                        st.dataframe(
+                            display_df[display_columns],
+                            use_container_width=True,
+                            hide_index=True
+                        )
                     
                     # Download dos resultados
-                    csv_results = results_df.to_csv(index=False)
+                    extension, mime = RESULT_FORMATS[results_format]
                     st.download_button(
-                        label="📥 Baixar Resultados (CSV)",
-                        data=csv_results,
-                        file_name=f"resultados_classificacao_{len(results)}_registros.csv",
-                        mime="text/csv",
-                        key="download_results_csv"
+                        label=f"📥 Baixar Resultados ({results_format.upper()})",
+                        # O download_button guarda os bytes; o arquivo temporário é lido uma única vez
+                        data=results_file.read(),
+                        file_name=f"resultados_classificacao_{total_count}_registros{extension}",
+                        mime=mime,
+                        key=f"download_results_{results_format}"
                     )
+                    results_file.close()
                     
             else:
                 st.markdown('</div>', unsafe_allow_html=True)
@@ -909,4 +901,63 @@ with tab2:
         except Exception as e:
             st.error(f"❌ Erro ao processar o arquivo: {str(e)}")
             st.write("Verifique se o arquivo está no formato correto e tente novamente.")
-            
\ No newline at end of file
+    
+    # Jobs em segundo plano: sem banco, nenhum job foi enviado e o worker nem é criado
+    if os.path.exists(os.path.join(JOBS_DIR, JOBS_DATABASE)):
+        polling = bool(get_job_store().pending_jobs())
+        if polling:
+            # Jobs na fila ou interrompidos (ex.: reinício do app): o worker os retoma ao ser criado
+            get_job_runner()
+        # O painel se atualiza sozinho enquanto houver jobs ativos
+        st.fragment(show_batch_jobs, run_every=JOBS_REFRESH_SECONDS if polling else None)(results_format, polling)
+            
+
+# Métricas de carregamento do modelo (cache do processo vs. desserialização do arquivo).
+# Renderizadas por último: a barra lateral reflete um modelo carregado neste mesmo rerun.
+with st.sidebar:
+    st.markdown("**⏱️ Modelo**")
+    router = get_model_router()
+    loaded_model = get_model_registry().peek(router.config.default_path)
+    if loaded_model is None:
+        st.caption("Ainda não carregado: o modelo é carregado na primeira classificação.")
+    else:
+        if model_lookup_seconds is not None:
+            st.metric("Acesso ao modelo (este rerun)", f"{model_lookup_seconds * 1000:.2f} ms")
+        st.metric("Carregamento do arquivo", f"{loaded_model.load_seconds * 1000:.0f} ms")
+        artifact_format = "nativo (UBJSON)" if loaded_model.manifest is not None else "pickle"
+        st.caption(f"Versão: {loaded_model.content_hash[:12]} · Formato: {artifact_format}")
+    cache_stats = get_prediction_cache().stats()
+    st.markdown("**🗂️ Cache de Previsões**")
+    st.metric("Taxa de acerto", f"{cache_stats['hit_rate'] * 100:.1f}%")
+    st.caption(f"Acertos: {cache_stats['hits']} · Falhas: {cache_stats['misses']} · Entradas: {cache_stats['entries']}")
+    if router.config.shadow:
+        st.markdown("**👥 Modelos em Sombra**")
+        shadow_summary = router.shadow_stats.summary_frame()
+        if shadow_summary.empty:
+            st.caption(f"Sombra: {', '.join(router.config.shadow)} · nenhuma linha comparada ainda.")
+        else:
+            st.dataframe(shadow_summary, hide_index=True, use_container_width=True)
+        if router.shadow_errors:
+            st.caption(f"⚠️ Falhas nos modelos em sombra: {router.shadow_errors}")
+    # Instrumentação por etapa (desligada com EXOPLANET_METRICS=0)
+    if METRICS.enabled:
+        metrics_server = get_metrics_server()
+        with st.expander("📊 Tempo por Etapa"):
+            stage_summary = METRICS.summary_frame()
+            if stage_summary.empty:
+                st.caption("Nenhuma etapa medida ainda neste processo.")
+            else:
+                st.dataframe(
+                    stage_summary,
+                    hide_index=True,
+                    use_container_width=True,
+                    column_config={
+                        'Tempo_Total_s': st.column_config.NumberColumn(format="%.3f"),
+                        'Media_ms': st.column_config.NumberColumn(format="%.2f"),
+                        'P95_ms': st.column_config.NumberColumn(format="%.1f"),
+                        'Linhas_por_s': st.column_config.NumberColumn(format="%.0f"),
+                    }
+                )
+                st.caption("P95 aproximado pelo limite superior do bucket do histograma.")
+            if metrics_server is not None:
+                st.caption(f"Prometheus: porta {metrics_server.server_address[1]}, caminho /metrics")
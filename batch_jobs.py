@@ -0,0 +1,310 @@
+"""Classificação de planilhas em segundo plano, com checkpoint por bloco.
+
+O arquivo enviado é copiado para o diretório do job e processado por um worker em thread,
+independente da sessão do navegador. Cada bloco concluído é gravado em Parquet e registrado
+no SQLite junto com a linha do arquivo em que termina; um job interrompido (queda do processo,
+reinício do app) volta a ler o arquivo a partir dessa linha, sem reprocessar os blocos anteriores.
+"""
+import datetime
+import os
+import queue
+import shutil
+import sqlite3
+import threading
+import uuid
+from contextlib import closing
+from functools import partial
+
+import pandas as pd
+
+from ingestion import STREAM_CHUNK_SIZE, ResultsWriter, estimate_row_count, iter_upload_chunks, resolve_upload_columns
+from instrumentation import METRICS
+from prediction_cache import cache_for_batch
+from scoring import count_exoplanets, score_dataframe
+from validation import QuarantiningScorer
+
+# --- CONFIGURAÇÕES GLOBAIS ---
+JOBS_DIR = "data/jobs"
+JOBS_DATABASE = "jobs.sqlite"
+
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+JOB_STATUS_LABELS = {
+    STATUS_QUEUED: "⏳ Na fila",
+    STATUS_RUNNING: "⚙️ Processando",
+    STATUS_DONE: "✅ Concluído",
+    STATUS_FAILED: "❌ Falhou",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    file_name TEXT NOT NULL,
+    input_path TEXT NOT NULL,
+    model_path TEXT NOT NULL,
+    model_version TEXT,
+    status TEXT NOT NULL,
+    chunk_size INTEGER NOT NULL,
+    validate INTEGER NOT NULL,
+    total_rows INTEGER,
+    rows_done INTEGER NOT NULL DEFAULT 0,
+    exoplanets INTEGER NOT NULL DEFAULT 0,
+    quarantined INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    job_id TEXT NOT NULL,
+    chunk_index INTEGER NOT NULL,
+    rows INTEGER NOT NULL,
+    exoplanets INTEGER NOT NULL,
+    quarantined INTEGER NOT NULL,
+    -- Linha do arquivo (exclusiva) em que o bloco termina: ponto de retomada
+    row_end INTEGER,
+    PRIMARY KEY (job_id, chunk_index)
+);
+"""
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds')
+
+
+class JobStore:
+    """Jobs e checkpoints no SQLite; resultados de cada bloco em Parquet no diretório do job."""
+
+    def __init__(self, root=JOBS_DIR):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.db_path = os.path.join(root, JOBS_DATABASE)
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(_SCHEMA)
+            # Bancos criados antes de row_end: os checkpoints antigos ficam sem ponto de retomada
+            columns = {row['name'] for row in conn.execute("PRAGMA table_info(checkpoints)")}
+            if 'row_end' not in columns:
+                conn.execute("ALTER TABLE checkpoints ADD COLUMN row_end INTEGER")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _execute(self, sql, params=()):
+        with closing(self._connect()) as conn, conn:
+            return conn.execute(sql, params).fetchall()
+
+    # --- Arquivos do job ---
+
+    def job_dir(self, job_id):
+        return os.path.join(self.root, job_id)
+
+    def chunk_path(self, job_id, chunk_index):
+        return os.path.join(self.job_dir(job_id), f"chunk_{chunk_index:06d}.parquet")
+
+    def quarantine_chunk_path(self, job_id, chunk_index):
+        return os.path.join(self.job_dir(job_id), f"chunk_{chunk_index:06d}_quarentena.csv")
+
+    # --- Jobs ---
+
+    def create_job(self, file, file_name, model_path, chunk_size=STREAM_CHUNK_SIZE, validate=True):
+        """Copia o arquivo enviado para o diretório do job e o registra na fila. Retorna o ID."""
+        job_id = uuid.uuid4().hex[:12]
+        os.makedirs(self.job_dir(job_id))
+        input_path = os.path.join(self.job_dir(job_id), f"entrada{os.path.splitext(file_name)[1]}")
+        file.seek(0)
+        with open(input_path, 'wb') as f:
+            shutil.copyfileobj(file, f)
+        file.seek(0)
+
+        with open(input_path, 'rb') as f:
+            total_rows = estimate_row_count(f, file_name)
+
+        now = _now()
+        self._execute(
+            "INSERT INTO jobs (id, file_name, input_path, model_path, status, chunk_size, validate, total_rows,"
+            " created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (job_id, file_name, input_path, model_path, STATUS_QUEUED, chunk_size, int(validate), total_rows, now, now),
+        )
+        return job_id
+
+    def get_job(self, job_id):
+        rows = self._execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        return dict(rows[0]) if rows else None
+
+    def list_jobs(self, limit=20):
+        return [dict(row) for row in self._execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,))]
+
+    def pending_jobs(self):
+        """Jobs na fila ou interrompidos no meio do processamento, do mais antigo ao mais novo."""
+        rows = self._execute(
+            "SELECT id FROM jobs WHERE status IN (?, ?) ORDER BY created_at", (STATUS_QUEUED, STATUS_RUNNING)
+        )
+        return [row['id'] for row in rows]
+
+    def set_status(self, job_id, status, error=None):
+        self._execute(
+            "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?", (status, error, _now(), job_id)
+        )
+
+    def set_model_version(self, job_id, model_version):
+        self._execute("UPDATE jobs SET model_version = ?, updated_at = ? WHERE id = ?", (model_version, _now(), job_id))
+
+    # --- Checkpoints ---
+
+    def checkpointed_chunks(self, job_id):
+        return {row['chunk_index'] for row in self._execute(
+            "SELECT chunk_index FROM checkpoints WHERE job_id = ?", (job_id,)
+        )}
+
+    def resume_point(self, job_id):
+        """(próximo bloco, linha do arquivo onde ele começa) após os blocos já concluídos.
+
+        Só vale a sequência contínua de blocos 0..k-1 com `row_end` conhecido; sem ela, (0, 0).
+        """
+        rows = self._execute(
+            "SELECT chunk_index, row_end FROM checkpoints WHERE job_id = ? ORDER BY chunk_index", (job_id,)
+        )
+        next_chunk, start_row = 0, 0
+        for row in rows:
+            if row['chunk_index'] != next_chunk or row['row_end'] is None:
+                break
+            next_chunk, start_row = next_chunk + 1, row['row_end']
+        return next_chunk, start_row
+
+    def record_checkpoint(self, job_id, chunk_index, results_df, quarantined_df=None, row_end=None):
+        """Grava os resultados do bloco e só então o registra: um bloco pela metade nunca conta como concluído."""
+        path = self.chunk_path(job_id, chunk_index)
+        results_df.to_parquet(f"{path}.tmp", index=False)
+        os.replace(f"{path}.tmp", path)
+
+        n_quarantined = 0
+        if quarantined_df is not None and len(quarantined_df):
+            quarantined_df.to_csv(self.quarantine_chunk_path(job_id, chunk_index), index=False, encoding='utf-8')
+            n_quarantined = len(quarantined_df)
+
+        exoplanets = count_exoplanets(results_df)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (job_id, chunk_index, rows, exoplanets, quarantined, row_end)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, chunk_index, len(results_df), exoplanets, n_quarantined, row_end),
+            )
+            conn.execute(
+                "UPDATE jobs SET rows_done = rows_done + ?, exoplanets = exoplanets + ?,"
+                " quarantined = quarantined + ?, updated_at = ? WHERE id = ?",
+                (len(results_df), exoplanets, n_quarantined, _now(), job_id),
+            )
+
+    def reset_checkpoints(self, job_id):
+        """Descarta os blocos já classificados (ex.: o modelo mudou desde o início do job)."""
+        for index in self.checkpointed_chunks(job_id):
+            for path in (self.chunk_path(job_id, index), self.quarantine_chunk_path(job_id, index)):
+                if os.path.exists(path):
+                    os.remove(path)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM checkpoints WHERE job_id = ?", (job_id,))
+            conn.execute(
+                "UPDATE jobs SET rows_done = 0, exoplanets = 0, quarantined = 0, updated_at = ? WHERE id = ?",
+                (_now(), job_id),
+            )
+
+    # --- Exportação ---
+
+    def write_results(self, job_id, output, output_format='csv'):
+        """Grava os resultados do job em `output` (arquivo binário), bloco a bloco, na ordem original."""
+        with ResultsWriter(output, output_format) as writer:
+            for index in sorted(self.checkpointed_chunks(job_id)):
+                writer.write(pd.read_parquet(self.chunk_path(job_id, index)))
+
+    def write_quarantine(self, job_id, output):
+        """Concatena o CSV de quarentena de cada bloco em `output` (arquivo binário)."""
+        header = True
+        for index in sorted(self.checkpointed_chunks(job_id)):
+            path = self.quarantine_chunk_path(job_id, index)
+            if not os.path.exists(path):
+                continue
+            with open(path, 'rb') as f:
+                if not header:
+                    f.readline()
+                shutil.copyfileobj(f, output)
+            header = False
+
+
+class JobRunner:
+    """Worker em thread que processa os jobs um por vez, retomando os interrompidos ao iniciar."""
+
+    def __init__(self, store, registry, cache=None):
+        self.store = store
+        self.registry = registry
+        self.cache = cache
+        self._queue = queue.Queue()
+        for job_id in store.pending_jobs():
+            self._queue.put(job_id)
+        self._thread = threading.Thread(target=self._run, name='batch-jobs', daemon=True)
+        self._thread.start()
+
+    def submit(self, file, file_name, model_path, chunk_size=STREAM_CHUNK_SIZE, validate=True):
+        """Registra o arquivo como um novo job e o coloca na fila. Retorna o ID do job."""
+        job_id = self.store.create_job(file, file_name, model_path, chunk_size, validate)
+        self._queue.put(job_id)
+        return job_id
+
+    def _run(self):
+        while True:
+            job_id = self._queue.get()
+            try:
+                self._process(job_id)
+            except Exception as e:
+                self.store.set_status(job_id, STATUS_FAILED, error=str(e))
+
+    def _process(self, job_id):
+        job = self.store.get_job(job_id)
+        if job is None or job['status'] not in (STATUS_QUEUED, STATUS_RUNNING):
+            return
+
+        loaded = self.registry.get(job['model_path'])
+        if job['model_version'] is not None and job['model_version'] != loaded.content_hash:
+            # Blocos classificados por outra versão do modelo não podem ser misturados
+            self.store.reset_checkpoints(job_id)
+        self.store.set_model_version(job_id, loaded.content_hash)
+        self.store.set_status(job_id, STATUS_RUNNING)
+
+        score_chunk = partial(
+            score_dataframe,
+            model=loaded.scorer,
+            train_features=loaded.train_features,
+            # Cada bloco é classificado à parte: o tamanho do arquivo decide se o cache compensa
+            cache=cache_for_batch(self.cache, job['total_rows']),
+            model_version=loaded.content_hash,
+        )
+        if job['validate']:
+            # A mesma validação da importação interativa e do predict_sheet.py
+            score_chunk = QuarantiningScorer(score_chunk)
+        done = self.store.checkpointed_chunks(job_id)
+        # Retomada pela linha em que o último bloco concluído termina: o início do arquivo não é relido
+        first_chunk, start_row = self.store.resume_point(job_id)
+
+        with open(job['input_path'], 'rb') as f:
+            resolution = resolve_upload_columns(f, job['file_name'])
+            if resolution.missing:
+                raise ValueError(f"Colunas ausentes: {', '.join(resolution.missing)}")
+
+            chunks = METRICS.timed_iter(
+                iter_upload_chunks(f, job['file_name'], job['chunk_size'], resolution, start_row=start_row), 'parse'
+            )
+            row_end = start_row
+            with closing(chunks):
+                for chunk_index, chunk in enumerate(chunks, start=first_chunk):
+                    row_end += len(chunk)
+                    if chunk_index in done:
+                        continue
+                    results_df = score_chunk(chunk)
+                    quarantined = score_chunk.last_quarantined if job['validate'] else None
+                    with METRICS.stage('checkpoint', rows=len(results_df)):
+                        self.store.record_checkpoint(job_id, chunk_index, results_df, quarantined, row_end)
+
+        self.store.set_status(job_id, STATUS_DONE)
@@ -0,0 +1,383 @@
+"""Benchmark reproduzível de ingestão, pré-processamento, previsão e exportação.
+
+Gera catálogos sintéticos no formato de example_exoplanet_spreadsheet.csv, mede cada etapa
+separadamente (segundos e linhas/s) e grava tudo em JSON. A ingestão passa pelo mesmo caminho
+do app (resolve_upload_columns + iter_upload_chunks). A previsão é medida pelo Booster nativo
+(predict) e pelo wrapper sklearn (predict_sklearn).
+
+O pico de memória de cada etapa vem de uma segunda passada com tracemalloc (o rastreamento
+deixa o Python várias vezes mais lento e não pode valer para os tempos). Conta o que o
+Python, o NumPy e o pandas alocam; buffers internos do XGBoost ficam de fora.
+
+Uso:
+    python benchmark.py                          # 1k, 100k e 1M linhas
+    python benchmark.py --sizes 1000 20000 --output bench.json
+    python benchmark.py --baseline bench_anterior.json --max-regression 0.2
+
+Sem data/model_and_features.pkl (ou com --stand-in), um modelo substituto é treinado localmente.
+"""
+import argparse
+import datetime
+import functools
+import hashlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import OrderedDict
+from itertools import repeat
+
+import numpy as np
+import pandas as pd
+
+from ingestion import ResultsWriter, iter_upload_chunks, resolve_upload_columns
+from model_registry import MODEL_AND_FEATURES_PATH, ModelRegistry, build_scorer
+from prediction_cache import PredictionCache
+from scoring import (
+    NO_MISSION,
+    REQUIRED_COLUMN_NAMES,
+    UNCLASSIFIED_MISSION,
+    build_results_frame,
+    compile_feature_plan,
+    positive_probabilities,
+    predict_probabilities,
+    prepare_data_for_model,
+)
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+DEFAULT_OUTPUT = "benchmark_results.json"
+
+# O laço linha a linha é lento demais para 1M linhas: mede numa amostra e extrapola
+PER_ROW_SAMPLE = 500
+
+# Carga do cache: fração de linhas reenviadas numa segunda planilha e consultas de um objeto só
+CACHE_OVERLAP = 0.5
+CACHE_SINGLE_LOOKUPS = 200
+
+MISSIONS = ['Kepler', 'TOI', 'K2', NO_MISSION]
+
+# Faixas (mín, máx) dos valores sintéticos, próximas das do template
+SYNTHETIC_RANGES = {
+    'koi_period': (0.3, 500.0),
+    'koi_time0bk': (120.0, 2500.0),
+    'koi_impact': (0.0, 1.2),
+    'koi_duration': (0.5, 15.0),
+    'koi_depth': (20.0, 50_000.0),
+    'koi_prad': (0.5, 30.0),
+    'koi_teq': (200.0, 3000.0),
+    'koi_insol': (0.1, 5000.0),
+    'koi_model_snr': (5.0, 500.0),
+    'koi_steff': (3000.0, 8000.0),
+    'koi_slogg': (3.5, 5.0),
+    'koi_srad': (0.3, 3.0),
+    'ra': (0.0, 360.0),
+    'dec': (-90.0, 90.0),
+    'koi_kepmag': (8.0, 17.0),
+    'pl_orbsmax': (0.01, 5.0),
+    'pl_bmasse': (0.5, 3000.0),
+    'pl_orbeccen': (0.0, 0.9),
+    'st_mass': (0.2, 2.0),
+}
+
+STAND_IN_FEATURES = (
+    [col for col in REQUIRED_COLUMN_NAMES if col != 'mission']
+    + [f"mission_{m}" for m in ('K2', 'Kepler', 'TOI', UNCLASSIFIED_MISSION)]
+)
+
+
+def generate_catalog(n_rows, seed=0, missing_fraction=0.1):
+    """Catálogo sintético com as 24 colunas de REQUIRED_COLUMNS, incluindo valores ausentes."""
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for col in REQUIRED_COLUMN_NAMES:
+        if col == 'mission':
+            columns[col] = rng.choice(MISSIONS, size=n_rows)
+        elif 'fpflag' in col:
+            columns[col] = (rng.random(n_rows) < 0.15).astype(np.int64)
+        else:
+            low, high = SYNTHETIC_RANGES[col]
+            values = rng.uniform(low, high, size=n_rows)
+            values[rng.random(n_rows) < missing_fraction] = np.nan
+            columns[col] = values
+    return pd.DataFrame(columns, columns=REQUIRED_COLUMN_NAMES)
+
+
+def train_stand_in_model(seed=0, n_rows=20_000):
+    """Treina um XGBoost pequeno sobre dados sintéticos, com o mesmo formato de entrada do modelo real."""
+    from xgboost import XGBClassifier
+
+    df = generate_catalog(n_rows, seed=seed)
+    flags = df[[col for col in REQUIRED_COLUMN_NAMES if 'fpflag' in col]].sum(axis=1)
+    label = ((flags == 0) & (df['koi_model_snr'].fillna(0) > 20)).astype(int)
+
+    X = compile_feature_plan(STAND_IN_FEATURES).transform_frame(df)
+    model = XGBClassifier(n_estimators=100, max_depth=6, tree_method='hist', random_state=seed)
+    model.fit(pd.DataFrame(X, columns=STAND_IN_FEATURES), label)
+    return model, list(STAND_IN_FEATURES)
+
+
+def timed(stages, name, n_rows, fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    seconds = time.perf_counter() - start
+    stages[name] = {'seconds': seconds, 'rows_per_sec': n_rows / seconds if seconds > 0 else None}
+    return result
+
+
+def traced(peaks, name, n_rows, fn, *args, **kwargs):
+    """Executa a etapa com o tracemalloc ligado e guarda o pico alocado por ela, em MB."""
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    result = fn(*args, **kwargs)
+    peaks[name] = (tracemalloc.get_traced_memory()[1] - before) / (1024 * 1024)
+    return result
+
+
+def read_catalog(input_path):
+    """Lê o arquivo como a importação do app: colunas resolvidas e leitura em blocos."""
+    file_name = os.path.basename(input_path)
+    with open(input_path, 'rb') as f:
+        resolution = resolve_upload_columns(f, file_name)
+        return pd.concat(iter_upload_chunks(f, file_name, resolution=resolution))
+
+
+def per_row_preprocess(df, train_features):
+    """O laço antigo da aba de importação: um DataFrame por linha via prepare_data_for_model."""
+    for _, row in df.iterrows():
+        row_data = row.to_dict()
+        if row_data.get('mission') == NO_MISSION or pd.isna(row_data.get('mission')):
+            row_data['mission'] = UNCLASSIFIED_MISSION
+        prepare_data_for_model(row_data, train_features)
+
+
+class DictPredictionCache:
+    """Referência simples para o PredictionCache: OrderedDict (LRU + TTL) com chave nos bytes da linha.
+
+    Existe só para o benchmark mostrar o que a tabela NumPy do PredictionCache ganha sobre ela.
+    """
+
+    def __init__(self, max_entries, ttl_seconds=24 * 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def keys(X_processed, model_version):
+        """Versão do modelo (8 bytes) + vetor float32 da linha, como um objeto bytes por linha."""
+        rows = np.ascontiguousarray(X_processed, dtype=np.float32) + np.float32(0.0)
+        raw = np.empty((rows.shape[0], 8 + rows.shape[1] * 4), dtype=np.uint8)
+        raw[:, :8] = np.frombuffer(hashlib.blake2b(str(model_version).encode(), digest_size=8).digest(), np.uint8)
+        raw[:, 8:] = rows.view(np.uint8)
+        return raw.view(np.dtype((np.void, raw.shape[1]))).ravel().tolist()
+
+    def get_many(self, keys):
+        probabilities = np.full(len(keys), np.nan, dtype=np.float32)
+        now = time.monotonic()
+        entries = list(map(self._entries.get, keys))
+        for i, entry in enumerate(entries):
+            if entry is not None and entry[1] >= now:
+                self._entries.move_to_end(keys[i])
+                probabilities[i] = entry[0]
+        return probabilities, np.isnan(probabilities)
+
+    def put_many(self, keys, probabilities):
+        expires_at = time.monotonic() + self.ttl_seconds
+        self._entries.update(zip(keys, zip(np.asarray(probabilities, dtype=np.float32).tolist(), repeat(expires_at))))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+def dict_cached_probabilities(model, X_processed, cache, model_version):
+    """predict_probabilities com o DictPredictionCache: só as linhas ausentes vão ao modelo."""
+    keys = cache.keys(X_processed, model_version)
+    probabilities, missing = cache.get_many(keys)
+    if missing.all():
+        probabilities = positive_probabilities(model, X_processed)
+        cache.put_many(keys, probabilities)
+    elif missing.any():
+        missing_rows = np.flatnonzero(missing)
+        probabilities[missing_rows] = positive_probabilities(model, X_processed[missing_rows])
+        cache.put_many([keys[i] for i in missing_rows], probabilities[missing_rows])
+    return probabilities
+
+
+def single_lookups(predict, X_processed, cache):
+    """Uma chamada por objeto, como o formulário da aba individual reenviando objetos já vistos."""
+    for i in range(min(len(X_processed), CACHE_SINGLE_LOOKUPS)):
+        predict(X_processed[i:i + 1], cache)
+
+
+def export_csv(results_df, output_path):
+    """Grava os resultados como o download do app (probabilidade formatada gerada por fatias)."""
+    with open(output_path, 'wb') as output, ResultsWriter(output) as writer:
+        writer.write(results_df)
+
+
+def check_parity(train_features, n_rows=500, seed=1):
+    """Confere se o FeaturePlan gera exatamente a mesma matriz que prepare_data_for_model."""
+    df = generate_catalog(n_rows, seed=seed)
+    reference = []
+    for row_data in df.to_dict('records'):
+        if row_data.get('mission') == NO_MISSION or pd.isna(row_data.get('mission')):
+            row_data['mission'] = UNCLASSIFIED_MISSION
+        reference.append(prepare_data_for_model(row_data, train_features).to_numpy(dtype=np.float32)[0])
+    reference = np.array(reference, dtype=np.float32)
+
+    plan = compile_feature_plan(train_features)
+    return bool(
+        np.array_equal(reference, plan.transform_frame(df))
+        and np.array_equal(reference, plan.transform_records(df.to_dict('records')))
+    )
+
+
+def run_stages(measure, n_rows, model, train_features, input_path, output_path, seed=0):
+    """Executa as etapas em ordem; `measure(nome, linhas, fn, *args)` mede cada uma e devolve o resultado."""
+    plan = compile_feature_plan(train_features)
+
+    df = measure('ingestion_csv', n_rows, read_catalog, input_path)
+
+    sample = df.head(min(n_rows, PER_ROW_SAMPLE))
+    measure('preprocess_per_row', len(sample), per_row_preprocess, sample, train_features)
+
+    X = measure('preprocess', n_rows, plan.transform_frame, df)
+    measure('predict_sklearn', n_rows, lambda: model.predict_proba(X)[:, 1])
+    scorer = build_scorer(model)
+    probabilities = measure('predict', n_rows, positive_probabilities, scorer, X)
+    # Cada cache é medido vazio (todas as linhas ausentes), cheio (as mesmas linhas), com uma
+    # planilha que repete parte das linhas e com consultas de um objeto só
+    n_repeated = int(n_rows * CACHE_OVERLAP)
+    X_new = plan.transform_frame(generate_catalog(n_rows - n_repeated, seed=seed + 1))
+    X_overlap = np.concatenate([X[:n_repeated], X_new])
+    caches = {
+        'predict_cache': (PredictionCache(max_entries=max(2 * n_rows, 1)), predict_probabilities),
+        'predict_dict_cache': (DictPredictionCache(max_entries=max(2 * n_rows, 1)), dict_cached_probabilities),
+    }
+    for name, (cache, cached_predict) in caches.items():
+        predict = functools.partial(cached_predict, scorer, model_version='benchmark')
+        measure(f'{name}_cold', n_rows, predict, X, cache)
+        measure(f'{name}_warm', n_rows, predict, X, cache)
+        measure(f'{name}_overlap', n_rows, predict, X_overlap, cache)
+        measure(f'{name}_single', min(n_rows, CACHE_SINGLE_LOOKUPS), single_lookups, predict, X, cache)
+
+    measure(
+        'export_csv', n_rows,
+        lambda: export_csv(build_results_frame(np.asarray(df.index) + 1, probabilities), output_path),
+    )
+
+
+def run_size(n_rows, model, train_features, workdir, seed=0, memory=True):
+    """Mede as etapas para um catálogo de `n_rows` linhas (tempo e, com `memory`, pico por etapa)."""
+    input_path = os.path.join(workdir, f"catalogo_{n_rows}.csv")
+    output_path = os.path.join(workdir, f"resultados_{n_rows}.csv")
+    generate_catalog(n_rows, seed=seed).to_csv(input_path, index=False)
+
+    stages = {}
+    run_stages(functools.partial(timed, stages), n_rows, model, train_features, input_path, output_path, seed)
+    stages['preprocess_per_row']['sample_rows'] = min(n_rows, PER_ROW_SAMPLE)
+
+    if memory:
+        peaks = {}
+        tracemalloc.start()
+        try:
+            run_stages(functools.partial(traced, peaks), n_rows, model, train_features, input_path, output_path, seed)
+        finally:
+            tracemalloc.stop()
+        for name, peak_mb in peaks.items():
+            stages[name]['peak_mb'] = peak_mb
+
+    os.remove(input_path)
+    os.remove(output_path)
+    return {'rows': n_rows, 'stages': stages}
+
+
+def compare_with_baseline(report, baseline, max_regression):
+    """Lista as etapas cujo throughput caiu mais que `max_regression` (fração) em relação ao baseline."""
+    previous = {
+        (entry['rows'], stage): values['rows_per_sec']
+        for entry in baseline.get('results', [])
+        for stage, values in entry['stages'].items()
+    }
+    regressions = []
+    for entry in report['results']:
+        for stage, values in entry['stages'].items():
+            before = previous.get((entry['rows'], stage))
+            after = values['rows_per_sec']
+            if before and after and after < before * (1 - max_regression):
+                regressions.append(f"{stage} @ {entry['rows']} linhas: {before:,.0f} -> {after:,.0f} linhas/s")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline de classificação.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="Tamanhos dos catálogos")
+    parser.add_argument('--model', default=MODEL_AND_FEATURES_PATH, help="Pickle legado ou diretório do artefato nativo (padrão: %(default)s)")
+    parser.add_argument('--stand-in', action='store_true', help="Usa sempre o modelo substituto treinado localmente")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', action='store_true',
+                        help="Não mede o pico de memória por etapa (passada extra com tracemalloc)")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="Arquivo JSON de saída (padrão: %(default)s)")
+    parser.add_argument('--baseline', help="JSON de uma execução anterior para comparação")
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help="Queda de throughput tolerada em relação ao baseline (padrão: %(default)s)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if not args.stand_in and os.path.exists(args.model):
+        loaded = ModelRegistry().get(args.model)
+        model, train_features = loaded.model, loaded.train_features
+        model_info = {'kind': 'artifact', 'path': args.model, 'content_hash': loaded.content_hash}
+    else:
+        model, train_features = train_stand_in_model(seed=args.seed)
+        model_info = {'kind': 'stand-in'}
+
+    parity_ok = check_parity(train_features)
+    print(f"{'✅' if parity_ok else '❌'} Paridade FeaturePlan x prepare_data_for_model")
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for n_rows in args.sizes:
+            entry = run_size(n_rows, model, train_features, workdir, seed=args.seed, memory=not args.no_memory)
+            results.append(entry)
+            print(f"\n{n_rows:,} linhas")
+            for stage, values in entry['stages'].items():
+                peak = f"  {values['peak_mb']:>9.1f} MB" if 'peak_mb' in values else ""
+                print(f"  {stage:<26} {values['seconds']:>9.3f}s  {values['rows_per_sec'] or 0:>14,.0f} linhas/s{peak}")
+
+    report = {
+        'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'versions': {'pandas': pd.__version__, 'numpy': np.__version__, 'xgboost': _xgboost_version()},
+        'model': model_info,
+        'parity': parity_ok,
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResultados gravados em {args.output}")
+
+    exit_code = 0 if parity_ok else 1
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare_with_baseline(report, json.load(f), args.max_regression)
+        for regression in regressions:
+            print(f"⚠️ Regressão: {regression}")
+        if regressions:
+            exit_code = 1
+    return exit_code
+
+
+def _xgboost_version():
+    import xgboost
+    return xgboost.__version__
+
+
+if __name__ == '__main__':
+    sys.exit(main())
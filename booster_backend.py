@@ -0,0 +1,76 @@
+import json
+
+import numpy as np
+
+from scoring import CLASSIFICATION_THRESHOLD
+
+
+class BoosterBackend:
+    """Previsão direta no Booster nativo do XGBoost, sem passar pelo wrapper sklearn.
+
+    Faz uma única passada `inplace_predict` sobre uma matriz float32 contígua e deriva a classe
+    pelo limiar. `predict_proba` mantém o formato do sklearn para ser um substituto direto.
+    """
+
+    def __init__(self, model, nthread=None):
+        self.booster = model.get_booster() if hasattr(model, 'get_booster') else model
+        self.missing = getattr(model, 'missing', np.nan)
+
+        # Mesmo intervalo de árvores que o wrapper usa (respeita early stopping)
+        best_iteration = getattr(model, 'best_iteration', None) if hasattr(model, 'get_booster') else None
+        self.iteration_range = (0, best_iteration + 1) if best_iteration is not None else (0, 0)
+
+        objective = json.loads(self.booster.save_config())['learner']['objective']['name']
+        if objective == 'binary:logistic':
+            self.output_margin = False
+        elif objective == 'binary:logitraw':
+            self.output_margin = True
+        else:
+            raise ValueError(f"Objetivo não suportado pelo backend nativo: {objective}")
+
+        if nthread is not None:
+            self.set_nthread(nthread)
+
+    def set_nthread(self, nthread):
+        """Número de threads do XGBoost por chamada de previsão."""
+        self.booster.set_param({'nthread': int(nthread)})
+
+    def predict_positive(self, X):
+        """Probabilidade da classe 1 (float32) para a matriz já pré-processada."""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if len(X) == 0:
+            return np.empty(0, dtype=np.float32)
+
+        output = self.booster.inplace_predict(
+            X,
+            iteration_range=self.iteration_range,
+            predict_type='margin' if self.output_margin else 'value',
+            missing=self.missing,
+            validate_features=False,
+        )
+        if self.output_margin:
+            output = 1.0 / (1.0 + np.exp(-output))
+        return np.asarray(output, dtype=np.float32)
+
+    def predict_contributions(self, X):
+        """Contribuição de cada feature (SHAP do próprio XGBoost, em log-odds) + viés na última coluna."""
+        import xgboost as xgb
+
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if len(X) == 0:
+            return np.empty((0, X.shape[1] + 1), dtype=np.float32)
+        # pred_contribs não existe no inplace_predict: uma DMatrix por lote
+        dmatrix = xgb.DMatrix(X, missing=self.missing)
+        output = self.booster.predict(
+            dmatrix, pred_contribs=True, iteration_range=self.iteration_range, validate_features=False
+        )
+        return np.asarray(output, dtype=np.float32)
+
+    def predict_labels(self, X):
+        """Classe prevista (0/1) a partir do limiar, sem uma segunda passada pelo modelo."""
+        return (self.predict_positive(X) > CLASSIFICATION_THRESHOLD).astype(np.uint8)
+
+    def predict_proba(self, X):
+        """Mesmo formato de XGBClassifier.predict_proba: colunas [P(classe 0), P(classe 1)]."""
+        positive = self.predict_positive(X)
+        return np.column_stack((1.0 - positive, positive))
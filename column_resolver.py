@@ -0,0 +1,124 @@
+import re
+import unicodedata
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from scoring import REQUIRED_COLUMNS, REQUIRED_COLUMN_NAMES
+
+# --- APELIDOS DAS COLUNAS ---
+# Nomes equivalentes (mesma grandeza e unidade) usados pelo NASA Exoplanet Archive e pelas tabelas KOI/TOI/K2.
+# Grandezas com unidade diferente (ex.: pl_tranmid em BJD, pl_trandep em %) ficam de fora de propósito.
+COLUMN_ALIASES = {
+    'koi_period': ('pl_orbper', 'period'),
+    'koi_impact': ('pl_imppar',),
+    'koi_duration': ('pl_trandurh', 'pl_trandur'),
+    'koi_prad': ('pl_rade',),
+    'koi_teq': ('pl_eqt',),
+    'koi_insol': ('pl_insol',),
+    'koi_model_snr': ('snr',),
+    'koi_steff': ('st_teff',),
+    'koi_slogg': ('st_logg',),
+    'koi_srad': ('st_rad',),
+    'ra': ('ra_deg',),
+    'dec': ('dec_deg',),
+    'koi_kepmag': ('kepmag', 'kep_mag'),
+    'mission': ('missao', 'disc_mission'),
+    'pl_orbsmax': ('koi_sma',),
+    'pl_orbeccen': ('koi_eccen',),
+    'st_mass': ('koi_smass',),
+}
+
+
+def normalize_column_name(name):
+    """Forma canônica para comparação: sem acentos, minúscula, separadores trocados por '_'."""
+    text = unicodedata.normalize('NFKD', str(name))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return re.sub(r'[^0-9a-z]+', '_', text.lower()).strip('_')
+
+
+def _build_lookup():
+    """Nome normalizado -> (coluna de REQUIRED_COLUMNS, prioridade). Nome técnico vence apelidos e conceitos."""
+    lookup = {}
+    for col, concept, *_ in REQUIRED_COLUMNS:
+        candidates = [(col, 0)] + [(alias, 1) for alias in COLUMN_ALIASES.get(col, ())] + [(concept, 2)]
+        for name, priority in candidates:
+            lookup.setdefault(normalize_column_name(name), (col, priority))
+    return lookup
+
+
+_LOOKUP = _build_lookup()
+
+
+@dataclass
+class ColumnResolution:
+    """Mapeamento do cabeçalho de um arquivo para REQUIRED_COLUMNS, calculado uma vez por arquivo."""
+    header: list
+    # Colunas resolvidas, na ordem de REQUIRED_COLUMNS
+    target_columns: list
+    source_columns: list
+    # Posições das colunas de origem no cabeçalho
+    positions: np.ndarray
+    missing: list = field(default_factory=list)
+    extra: list = field(default_factory=list)
+    # coluna canônica -> colunas do arquivo ignoradas por mapearem para o mesmo nome
+    duplicates: dict = field(default_factory=dict)
+
+    @property
+    def renamed(self):
+        """Colunas do arquivo com nome diferente do canônico: origem -> destino."""
+        return {src: dst for src, dst in zip(self.source_columns, self.target_columns) if src != dst}
+
+    @property
+    def reordered(self):
+        """True se as colunas do arquivo não seguem a ordem de REQUIRED_COLUMNS."""
+        return bool(np.any(np.diff(self.positions) < 0))
+
+    def project(self, df):
+        """Seleciona as colunas resolvidas pela posição e as renomeia para os nomes canônicos."""
+        return df.iloc[:, self.positions].set_axis(self.target_columns, axis=1)
+
+    def project_subset(self, df):
+        """Como `project`, para um DataFrame lido apenas com as colunas resolvidas (usecols), na ordem do arquivo."""
+        order = np.argsort(np.argsort(self.positions))
+        return df.iloc[:, order].set_axis(self.target_columns, axis=1)
+
+
+def resolve_columns(header):
+    """Resolve o cabeçalho por nome (sem diferenciar maiúsculas, acentos e separadores) e por apelidos."""
+    header = list(header)
+    chosen = {}
+    for position, name in enumerate(header):
+        match = _LOOKUP.get(normalize_column_name(name))
+        if match is None:
+            continue
+        target, priority = match
+        current = chosen.get(target)
+        # Em caso de conflito fica a correspondência mais exata (depois, a primeira no arquivo)
+        if current is None or (priority, position) < (current[0], current[1]):
+            chosen[target] = (priority, position)
+
+    target_columns = [col for col in REQUIRED_COLUMN_NAMES if col in chosen]
+    positions = np.array([chosen[col][1] for col in target_columns], dtype=np.intp)
+    used = set(positions.tolist())
+
+    duplicates = {}
+    extra = []
+    for position, name in enumerate(header):
+        if position in used:
+            continue
+        match = _LOOKUP.get(normalize_column_name(name))
+        if match is not None:
+            duplicates.setdefault(match[0], []).append(name)
+        else:
+            extra.append(name)
+
+    return ColumnResolution(
+        header=header,
+        target_columns=target_columns,
+        source_columns=[header[p] for p in positions],
+        positions=positions,
+        missing=[col for col in REQUIRED_COLUMN_NAMES if col not in chosen],
+        extra=extra,
+        duplicates=duplicates,
+    )
@@ -0,0 +1,218 @@
+"""Cache colunar da planilha unificada: o xlsx é convertido uma única vez em colunas NumPy no disco.
+
+A leitura do xlsx pelo openpyxl leva segundos; a versão em cache é um diretório com um .npy por
+coluna, aberto com memória mapeada (np.load(mmap_mode='r')): abrir o catálogo e acessar uma
+coluna não copia nem converte nada, e só as páginas efetivamente lidas saem do disco.
+
+O cache é identificado pelo SHA-256 da planilha: qualquer mudança no arquivo gera um novo
+diretório na próxima abertura, e os diretórios de versões anteriores da mesma planilha são apagados.
+Colunas de texto (ex.: mission) são gravadas como códigos inteiros + categorias no manifest.
+
+Uso:
+    python dataset_cache.py                                   # converte data/exoplanet_unified_results.xlsx
+    python dataset_cache.py outra_planilha.xlsx --cache-dir /tmp/cache
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from model_artifact import file_content_hash
+
+# --- CONFIGURAÇÕES GLOBAIS ---
+UNIFIED_DATASET_PATH = "data/exoplanet_unified_results.xlsx"
+DATASET_CACHE_DIR = "data/dataset_cache"
+DATASET_MANIFEST_FILE_NAME = "manifest.json"
+
+# Versão do formato do cache: mudar invalida os diretórios gravados por versões anteriores
+DATASET_CACHE_VERSION = 1
+
+# (caminho, tamanho, mtime) -> hash: evita reler a planilha inteira a cada abertura no mesmo processo
+_hash_memo = {}
+_hash_lock = threading.Lock()
+
+
+def source_hash(path):
+    """SHA-256 da planilha, recalculado só quando o tamanho ou o mtime mudam."""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _hash_lock:
+        cached = _hash_memo.get(key)
+    if cached is None:
+        cached = file_content_hash(path)
+        with _hash_lock:
+            _hash_memo[key] = cached
+    return cached
+
+
+def _source_stem(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def cache_path_for(path, content_hash, cache_dir=DATASET_CACHE_DIR):
+    """Diretório do cache da planilha `path` com o conteúdo `content_hash`."""
+    return os.path.join(cache_dir, f"{_source_stem(path)}-v{DATASET_CACHE_VERSION}-{content_hash[:16]}")
+
+
+class CachedDataset:
+    """Catálogo aberto a partir do cache: colunas como arrays NumPy mapeados em memória (somente leitura)."""
+
+    def __init__(self, cache_path):
+        self.cache_path = cache_path
+        with open(os.path.join(cache_path, DATASET_MANIFEST_FILE_NAME), encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self.columns = [column['name'] for column in self.manifest['columns']]
+        self.num_rows = self.manifest['num_rows']
+        self._specs = {column['name']: column for column in self.manifest['columns']}
+        self._arrays = {}
+
+    @property
+    def source_hash(self):
+        return self.manifest['source_sha256']
+
+    def __len__(self):
+        return self.num_rows
+
+    def __contains__(self, name):
+        return name in self._specs
+
+    def _array(self, name):
+        array = self._arrays.get(name)
+        if array is None:
+            spec = self._specs[name]
+            array = np.load(os.path.join(self.cache_path, spec['file']), mmap_mode='r', allow_pickle=False)
+            self._arrays[name] = array
+        return array
+
+    def column(self, name):
+        """Coluna como array NumPy sem cópia (códigos inteiros para colunas de texto; -1 = ausente)."""
+        if name not in self._specs:
+            raise KeyError(f"Coluna não encontrada no catálogo: {name}")
+        return self._array(name)
+
+    def categories(self, name):
+        """Categorias de uma coluna de texto (None para colunas numéricas)."""
+        return self._specs[name].get('categories')
+
+    def series(self, name):
+        """Coluna como pd.Series: numéricas sobre o próprio array mapeado; texto como categoria."""
+        array = self.column(name)
+        categories = self.categories(name)
+        if categories is not None:
+            return pd.Series(pd.Categorical.from_codes(array, categories=categories), name=name, copy=False)
+        return pd.Series(array, name=name, copy=False)
+
+    def to_frame(self, columns=None):
+        """DataFrame das colunas pedidas (todas por padrão), sem consolidar as colunas em um bloco 2D."""
+        columns = self.columns if columns is None else list(columns)
+        missing = [name for name in columns if name not in self._specs]
+        if missing:
+            raise KeyError(f"Colunas não encontradas no catálogo: {', '.join(missing)}")
+        return pd.DataFrame({name: self.series(name) for name in columns}, copy=False)
+
+
+def read_source(path):
+    """Lê a planilha de origem diretamente (sem cache)."""
+    if path.endswith('.csv'):
+        return pd.read_csv(path)
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path)
+    return pd.read_excel(path)
+
+
+def _column_payload(values):
+    """Array gravado no .npy e as categorias (para colunas de texto)."""
+    if pd.api.types.is_bool_dtype(values) and not values.isna().any():
+        return values.to_numpy(dtype=np.bool_), None
+    if pd.api.types.is_numeric_dtype(values):
+        if pd.api.types.is_integer_dtype(values) and not values.isna().any():
+            return values.to_numpy(dtype=np.int64), None
+        return values.to_numpy(dtype=np.float64, na_value=np.nan), None
+    categorical = pd.Categorical(values.astype(object).where(values.notna(), None))
+    # Códigos no menor tipo inteiro (o mesmo do pandas): pd.Categorical.from_codes os usa sem conversão
+    return categorical.codes, [str(category) for category in categorical.categories]
+
+
+def build_cache(path, cache_dir=DATASET_CACHE_DIR, content_hash=None):
+    """Converte a planilha em um diretório de colunas .npy. Retorna o caminho do cache."""
+    content_hash = content_hash or source_hash(path)
+    target = cache_path_for(path, content_hash, cache_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    df = read_source(path)
+    tmp_dir = tempfile.mkdtemp(dir=cache_dir, prefix='.tmp-')
+    try:
+        columns = []
+        for i, name in enumerate(df.columns):
+            array, categories = _column_payload(df[name])
+            file_name = f"col_{i:03d}.npy"
+            np.save(os.path.join(tmp_dir, file_name), array, allow_pickle=False)
+            spec = {'name': str(name), 'file': file_name, 'dtype': str(array.dtype)}
+            if categories is not None:
+                spec['categories'] = categories
+            columns.append(spec)
+
+        manifest = {
+            'format_version': DATASET_CACHE_VERSION,
+            'source': os.path.basename(path),
+            'source_sha256': content_hash,
+            'num_rows': len(df),
+            'columns': columns,
+        }
+        with open(os.path.join(tmp_dir, DATASET_MANIFEST_FILE_NAME), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        try:
+            os.rename(tmp_dir, target)
+        except OSError:
+            # Outro processo gravou o mesmo cache antes: o conteúdo é o mesmo
+            if not os.path.isdir(target):
+                raise
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    _remove_stale_caches(path, target, cache_dir)
+    return target
+
+
+def _remove_stale_caches(path, current, cache_dir):
+    """Apaga os caches de versões anteriores da mesma planilha."""
+    prefix = f"{_source_stem(path)}-v"
+    for name in os.listdir(cache_dir):
+        candidate = os.path.join(cache_dir, name)
+        if name.startswith(prefix) and candidate != current and os.path.isdir(candidate):
+            shutil.rmtree(candidate, ignore_errors=True)
+
+
+def open_dataset(path=UNIFIED_DATASET_PATH, cache_dir=DATASET_CACHE_DIR):
+    """Abre o catálogo pelo cache, convertendo a planilha na primeira vez (ou quando ela muda)."""
+    content_hash = source_hash(path)
+    target = cache_path_for(path, content_hash, cache_dir)
+    if not os.path.exists(os.path.join(target, DATASET_MANIFEST_FILE_NAME)):
+        target = build_cache(path, cache_dir, content_hash)
+    return CachedDataset(target)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Converte a planilha unificada para o cache colunar (.npy).")
+    parser.add_argument('path', nargs='?', default=UNIFIED_DATASET_PATH, help="Planilha de origem (padrão: %(default)s)")
+    parser.add_argument('--cache-dir', default=DATASET_CACHE_DIR, help="Diretório do cache (padrão: %(default)s)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    dataset = open_dataset(args.path, args.cache_dir)
+    print(f"✅ {args.path} -> {dataset.cache_path}: {dataset.num_rows} registros, "
+          f"{len(dataset.columns)} colunas ({time.perf_counter() - start:.3f}s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
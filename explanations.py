@@ -0,0 +1,139 @@
+"""Explicação das previsões: contribuição de cada variável pelo próprio XGBoost (pred_contribs).
+
+As contribuições são valores SHAP em log-odds: somadas ao viés, dão a margem do modelo, então
+valores positivos empurram para EXOPLANETA e negativos para FALSO_POSITIVO. As colunas one-hot
+mission_* são somadas de volta no campo original `mission`.
+
+O cálculo é uma passada extra do modelo por bloco, sobre a mesma matriz float32 da previsão
+(sem laço por linha); a escolha dos principais fatores também é vetorizada.
+"""
+import numpy as np
+import pandas as pd
+
+from instrumentation import METRICS
+from model_artifact import MISSION_PREFIX
+from prediction_cache import cache_for_batch
+from scoring import (
+    BATCH_CHUNK_SIZE,
+    REQUIRED_COLUMNS,
+    build_results_frame,
+    predict_probabilities,
+)
+
+# --- CONFIGURAÇÕES GLOBAIS ---
+# Fatores por linha nas colunas opcionais dos resultados em lote (Fator_1, Contribuicao_1, ...)
+EXPLANATION_TOP_FEATURES = 3
+
+# Fatores exibidos no card da classificação individual
+RECORD_TOP_FEATURES = 8
+
+# Nome legível de cada coluna (conceito e unidade de REQUIRED_COLUMNS)
+FEATURE_LABELS = {name: f"{concept} ({name})" for name, concept, _, _, _ in REQUIRED_COLUMNS}
+
+
+def feature_groups(train_features):
+    """Campos originais (mission_* -> mission) e a matriz 0/1 que soma as features de cada campo."""
+    names = []
+    positions = {}
+    for feature in train_features:
+        name = 'mission' if feature.startswith(MISSION_PREFIX) else feature
+        if name not in positions:
+            positions[name] = len(names)
+            names.append(name)
+
+    membership = np.zeros((len(train_features), len(names)), dtype=np.float32)
+    for j, feature in enumerate(train_features):
+        membership[j, positions['mission' if feature.startswith(MISSION_PREFIX) else feature]] = 1.0
+    return names, membership
+
+
+def feature_contributions(model, X_processed):
+    """Contribuições (n, features + 1) do BoosterBackend ou, na falta dele, do booster do wrapper sklearn."""
+    if hasattr(model, 'predict_contributions'):
+        return model.predict_contributions(X_processed)
+
+    import xgboost as xgb
+
+    X = np.ascontiguousarray(X_processed, dtype=np.float32)
+    output = model.get_booster().predict(xgb.DMatrix(X), pred_contribs=True, validate_features=False)
+    return np.asarray(output, dtype=np.float32)
+
+
+def grouped_contributions(contributions, membership):
+    """Soma as contribuições por campo original. Retorna (contribuições por campo, viés)."""
+    return contributions[:, :-1] @ membership, contributions[:, -1]
+
+
+def top_drivers(grouped, top=EXPLANATION_TOP_FEATURES):
+    """Índices e valores dos `top` campos de maior contribuição absoluta de cada linha."""
+    top = min(top, grouped.shape[1])
+    order = np.argsort(-np.abs(grouped), axis=1, kind='stable')[:, :top]
+    return order, np.take_along_axis(grouped, order, axis=1)
+
+
+def add_explanation_columns(results_df, grouped, names, top=EXPLANATION_TOP_FEATURES):
+    """Acrescenta Fator_i (categoria) e Contribuicao_i (float32, log-odds) aos resultados."""
+    order, values = top_drivers(grouped, top)
+    for i in range(order.shape[1]):
+        results_df[f'Fator_{i + 1}'] = pd.Categorical.from_codes(order[:, i], categories=names)
+        results_df[f'Contribuicao_{i + 1}'] = values[:, i].astype(np.float32)
+    return results_df
+
+
+class ExplainingScorer:
+    """Mesmo contrato de score_dataframe, com os `top` principais fatores de cada linha.
+
+    Cada bloco é pré-processado uma vez; a mesma matriz vai à previsão (com o cache de previsões)
+    e ao cálculo das contribuições.
+    """
+
+    def __init__(self, loaded, top=EXPLANATION_TOP_FEATURES, cache=None, chunk_size=BATCH_CHUNK_SIZE):
+        self.loaded = loaded
+        self.top = top
+        self.cache = cache
+        self.chunk_size = chunk_size
+        self.names, self.membership = feature_groups(loaded.train_features)
+
+    def score(self, df, on_progress=None):
+        n_rows = len(df)
+        probabilities = np.empty(n_rows, dtype=np.float32)
+        grouped = np.empty((n_rows, len(self.names)), dtype=np.float32)
+        cache = cache_for_batch(self.cache, n_rows)
+
+        for start in range(0, n_rows, self.chunk_size):
+            stop = min(start + self.chunk_size, n_rows)
+            with METRICS.stage('preprocess', rows=stop - start):
+                X_processed = self.loaded.feature_plan.transform_frame(df.iloc[start:stop])
+            with METRICS.stage('predict', rows=stop - start):
+                probabilities[start:stop] = predict_probabilities(
+                    self.loaded.scorer, X_processed, cache, self.loaded.content_hash
+                )
+            with METRICS.stage('explain', rows=stop - start):
+                grouped[start:stop], _ = grouped_contributions(
+                    feature_contributions(self.loaded.scorer, X_processed), self.membership
+                )
+            if on_progress is not None:
+                on_progress(stop, n_rows)
+
+        results = build_results_frame(np.asarray(df.index) + 1, probabilities)
+        return add_explanation_columns(results, grouped, self.names, self.top)
+
+
+def explain_record(loaded, record, top=RECORD_TOP_FEATURES):
+    """Principais fatores de um único objeto (dicionário do formulário), do maior efeito ao menor."""
+    X_processed = loaded.feature_plan.transform_records([record])
+    names, membership = feature_groups(loaded.train_features)
+    grouped, bias = grouped_contributions(feature_contributions(loaded.scorer, X_processed), membership)
+    order, values = top_drivers(grouped, top)
+
+    rows = []
+    for j, value in zip(order[0], values[0]):
+        name = names[j]
+        raw = record.get(name)
+        rows.append({
+            'Fator': FEATURE_LABELS.get(name, name),
+            'Valor': 'NaN' if raw is None or pd.isna(raw) else str(raw),
+            'Contribuição': float(value),
+            'Efeito': "↑ EXOPLANETA" if value > 0 else "↓ FALSO POSITIVO",
+        })
+    return pd.DataFrame(rows), float(bias[0])
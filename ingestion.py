@@ -0,0 +1,349 @@
+import tempfile
+
+import pandas as pd
+
+from column_resolver import resolve_columns
+from instrumentation import METRICS
+from scoring import BATCH_CHUNK_SIZE, format_results
+
+# Linhas lidas por bloco no modo streaming (limita o pico de memória, não o tamanho do arquivo)
+STREAM_CHUNK_SIZE = BATCH_CHUNK_SIZE
+
+# Formatos colunares: leitura só das colunas usadas pelo modelo
+PARQUET_EXTENSIONS = ('.parquet',)
+ARROW_EXTENSIONS = ('.arrow', '.feather')
+
+# Formatos de exportação dos resultados
+RESULT_FORMATS = {
+    'csv': ('.csv', 'text/csv'),
+    'parquet': ('.parquet', 'application/vnd.apache.parquet'),
+    'arrow': ('.arrow', 'application/vnd.apache.arrow.file'),
+}
+
+# Resultados exportados até este tamanho ficam em memória; acima disso, vão para um arquivo temporário
+RESULTS_SPOOL_MAX_BYTES = 32 * 1024 * 1024
+
+# --- LEITURA DE PLANILHAS ---
+# Toda leitura passa por uma ColumnResolution: os DataFrames gerados já têm as colunas de
+# REQUIRED_COLUMNS com os nomes canônicos, na ordem canônica, independentemente do arquivo.
+
+def read_header(file, file_name):
+    """Nomes das colunas do arquivo (sem ler os dados), devolvendo o arquivo à posição inicial."""
+    if file_name.endswith(PARQUET_EXTENSIONS):
+        import pyarrow.parquet as pq
+        names = pq.ParquetFile(file).schema_arrow.names
+    elif file_name.endswith(ARROW_EXTENSIONS):
+        import pyarrow as pa
+        names = pa.ipc.open_file(file).schema.names
+    elif file_name.endswith('.csv'):
+        names = list(pd.read_csv(file, nrows=0).columns)
+    elif file_name.endswith('.xlsx'):
+        names = _xlsx_header(file)
+    else:
+        names = list(pd.read_excel(file, nrows=0).columns)
+    file.seek(0)
+    return names
+
+
+def resolve_upload_columns(file, file_name):
+    """Resolve o cabeçalho do arquivo para REQUIRED_COLUMNS (por nome, apelido ou conceito)."""
+    return resolve_columns(read_header(file, file_name))
+
+
+def read_upload(file, file_name, nrows=None, resolution=None):
+    """Lê a planilha inteira (ou apenas as primeiras `nrows` linhas) com as colunas resolvidas."""
+    if resolution is None:
+        resolution = resolve_upload_columns(file, file_name)
+
+    if file_name.endswith(PARQUET_EXTENSIONS + ARROW_EXTENSIONS):
+        if nrows is None:
+            return _read_columnar(file, file_name, resolution)
+        return next(iter_upload_chunks(file, file_name, nrows, resolution), _empty_frame(resolution))
+    if file_name.endswith('.csv'):
+        return resolution.project_subset(pd.read_csv(file, nrows=nrows, usecols=list(resolution.positions)))
+    return resolution.project_subset(pd.read_excel(file, nrows=nrows, usecols=list(resolution.positions)))
+
+
+def peek_upload(file, file_name, nrows=10, resolution=None):
+    """Lê só o cabeçalho e as primeiras linhas, devolvendo o arquivo à posição inicial."""
+    df = read_upload(file, file_name, nrows=nrows, resolution=resolution)
+    file.seek(0)
+    return df
+
+
+def iter_upload_chunks(file, file_name, chunk_size=STREAM_CHUNK_SIZE, resolution=None, start_row=0):
+    """Gera DataFrames de até `chunk_size` linhas, com índice contínuo ao longo do arquivo.
+
+    Colunas fora de REQUIRED_COLUMNS nem chegam a ser convertidas (usecols / projeção do Arrow).
+    Com `start_row` (retomada de jobs), as linhas de dados anteriores são puladas sem virar
+    DataFrame: skiprows no CSV, row groups no Parquet e fatias dos record batches no Arrow.
+    O índice continua contando a partir de `start_row`.
+    """
+    if resolution is None:
+        resolution = resolve_upload_columns(file, file_name)
+
+    if file_name.endswith('.csv'):
+        # A linha 0 é o cabeçalho: pula as linhas de dados 1..start_row
+        skiprows = range(1, start_row + 1) if start_row else None
+        with pd.read_csv(file, chunksize=chunk_size, usecols=list(resolution.positions), skiprows=skiprows) as reader:
+            for chunk in reader:
+                if start_row:
+                    chunk.index += start_row
+                yield resolution.project_subset(chunk)
+    elif file_name.endswith('.xlsx'):
+        for chunk in _iter_xlsx_chunks(file, chunk_size, start_row):
+            yield resolution.project(chunk)
+    elif file_name.endswith(PARQUET_EXTENSIONS):
+        yield from _iter_parquet_chunks(file, chunk_size, resolution, start_row)
+    elif file_name.endswith(ARROW_EXTENSIONS):
+        yield from _iter_arrow_chunks(file, chunk_size, resolution, start_row)
+    else:
+        # .xls (xlrd) não tem leitura linha a linha: carrega e fatia
+        df = resolution.project_subset(pd.read_excel(file, usecols=list(resolution.positions)))
+        for start in range(start_row, len(df), chunk_size):
+            yield df.iloc[start:start + chunk_size]
+
+
+def estimate_row_count(file, file_name):
+    """Número de linhas de dados, sem classificar nada; None se não der para saber sem ler tudo.
+
+    Parquet/Arrow: exato (metadados). CSV: linhas do arquivo menos o cabeçalho. xlsx: dimensão
+    declarada da aba (pode incluir linhas em branco). Devolve o arquivo à posição inicial.
+    """
+    try:
+        if file_name.endswith(PARQUET_EXTENSIONS):
+            import pyarrow.parquet as pq
+            return pq.ParquetFile(file).metadata.num_rows
+        if file_name.endswith(ARROW_EXTENSIONS):
+            import pyarrow as pa
+            reader = pa.ipc.open_file(file)
+            return sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+        if file_name.endswith('.csv'):
+            lines = 0
+            last = b'\n'
+            for block in iter(lambda: file.read(1 << 20), b''):
+                lines += block.count(b'\n')
+                last = block[-1:]
+            # Última linha sem quebra de linha final
+            return max(lines - 1 + (last != b'\n'), 0)
+        if file_name.endswith('.xlsx'):
+            from openpyxl import load_workbook
+            workbook = load_workbook(file, read_only=True)
+            try:
+                max_row = workbook.worksheets[0].max_row
+            finally:
+                workbook.close()
+            return max(max_row - 1, 0) if max_row else None
+        return None
+    finally:
+        file.seek(0)
+
+
+def _empty_frame(resolution):
+    return pd.DataFrame(columns=resolution.target_columns)
+
+
+def _xlsx_header(file):
+    """Primeira linha da primeira aba, sem carregar o restante da planilha."""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        header = next(workbook.worksheets[0].iter_rows(max_row=1, values_only=True), ())
+    finally:
+        workbook.close()
+    return [name if name is not None else f"Unnamed: {i}" for i, name in enumerate(header)]
+
+
+def _iter_xlsx_chunks(file, chunk_size, start_row=0):
+    """Percorre a primeira aba com o iterador read-only do openpyxl (as `start_row` primeiras linhas só são contadas)."""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [name if name is not None else f"Unnamed: {i}" for i, name in enumerate(header)]
+        width = len(columns)
+
+        buffer = []
+        offset = start_row
+        skipped = 0
+        for row in rows:
+            # Linhas em branco são ignoradas, como em pd.read_excel
+            if all(value is None for value in row):
+                continue
+            if skipped < start_row:
+                skipped += 1
+                continue
+            buffer.append((tuple(row) + (None,) * width)[:width])
+            if len(buffer) == chunk_size:
+                yield _records_to_frame(buffer, columns, offset)
+                offset += len(buffer)
+                buffer = []
+        if buffer:
+            yield _records_to_frame(buffer, columns, offset)
+    finally:
+        workbook.close()
+
+
+def _arrow_to_frame(table, resolution, offset=0):
+    # split_blocks evita consolidar as colunas numéricas em um bloco 2D (sem cópia extra)
+    df = table.to_pandas(split_blocks=True).set_axis(resolution.target_columns, axis=1)
+    df.index = pd.RangeIndex(offset, offset + len(df))
+    return df
+
+
+def _read_columnar(file, file_name, resolution):
+    """Lê o arquivo Parquet/Arrow inteiro, projetado nas colunas resolvidas."""
+    if file_name.endswith(PARQUET_EXTENSIONS):
+        import pyarrow.parquet as pq
+        return _arrow_to_frame(pq.ParquetFile(file).read(columns=resolution.source_columns), resolution)
+
+    import pyarrow as pa
+    table = pa.ipc.open_file(file).read_all().select(resolution.source_columns)
+    return _arrow_to_frame(table, resolution)
+
+
+def _iter_parquet_chunks(file, chunk_size, resolution, start_row=0):
+    """Lê o Parquet em lotes de registros via pyarrow, só com as colunas resolvidas.
+
+    Os row groups inteiramente antes de `start_row` nem são lidos (os metadados dão o tamanho de cada um).
+    """
+    import pyarrow.parquet as pq
+
+    parquet = pq.ParquetFile(file)
+    first_group, offset = 0, 0
+    while first_group < parquet.num_row_groups:
+        group_rows = parquet.metadata.row_group(first_group).num_rows
+        if offset + group_rows > start_row:
+            break
+        offset += group_rows
+        first_group += 1
+
+    row_groups = range(first_group, parquet.num_row_groups)
+    for batch in parquet.iter_batches(batch_size=chunk_size, row_groups=row_groups, columns=resolution.source_columns):
+        if offset < start_row:
+            skip = min(start_row - offset, batch.num_rows)
+            batch, offset = batch.slice(skip), offset + skip
+            if not batch.num_rows:
+                continue
+        yield _arrow_to_frame(batch, resolution, offset)
+        offset += batch.num_rows
+
+
+def _iter_arrow_chunks(file, chunk_size, resolution, start_row=0):
+    """Percorre os record batches de um arquivo Arrow IPC (Feather v2), só com as colunas resolvidas.
+
+    Antes de `start_row`, os batches são pulados inteiros e o primeiro é fatiado (sem cópia).
+    """
+    import pyarrow as pa
+
+    reader = pa.ipc.open_file(file)
+    offset = 0
+    for i in range(reader.num_record_batches):
+        batch = reader.get_batch(i)
+        if offset + batch.num_rows <= start_row:
+            offset += batch.num_rows
+            continue
+        batch = batch.select(resolution.source_columns)
+        first = max(start_row - offset, 0)
+        offset += first
+        for start in range(first, batch.num_rows, chunk_size):
+            piece = batch.slice(start, chunk_size)
+            yield _arrow_to_frame(piece, resolution, offset)
+            offset += piece.num_rows
+
+
+def _records_to_frame(records, columns, offset):
+    df = pd.DataFrame.from_records(records, columns=columns)
+    # Colunas só com células vazias viram float (NaN), como no pd.read_excel, e não object com None
+    empty = df.columns[df.isna().all()]
+    if len(empty):
+        df = df.astype(dict.fromkeys(empty, float))
+    df.index = pd.RangeIndex(offset, offset + len(df))
+    return df
+
+
+# --- EXPORTAÇÃO DOS RESULTADOS ---
+
+class ResultsWriter:
+    """Grava blocos de resultados em `output` (arquivo binário) como CSV, Parquet ou Arrow IPC.
+
+    O CSV recebe a probabilidade formatada ("12.34%"), gerada por fatias de BATCH_CHUNK_SIZE linhas;
+    Parquet/Arrow gravam as colunas tipadas (Predição como dicionário, probabilidade float32).
+    """
+
+    def __init__(self, output, output_format='csv'):
+        if output_format not in RESULT_FORMATS:
+            raise ValueError(f"Formato de saída não suportado: {output_format}")
+        self.output = output
+        self.output_format = output_format
+        self._writer = None
+        self._header = True
+
+    def write(self, results_df):
+        with METRICS.stage('export', rows=len(results_df)):
+            self._write(results_df)
+
+    def _write(self, results_df):
+        if self.output_format == 'csv':
+            for start in range(0, max(len(results_df), 1), BATCH_CHUNK_SIZE):
+                piece = format_results(results_df.iloc[start:start + BATCH_CHUNK_SIZE])
+                piece.to_csv(self.output, index=False, header=self._header, encoding='utf-8')
+                self._header = False
+            return
+
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(results_df, preserve_index=False)
+        if self._writer is None:
+            if self.output_format == 'parquet':
+                import pyarrow.parquet as pq
+                self._writer = pq.ParquetWriter(self.output, table.schema)
+            else:
+                self._writer = pa.ipc.new_file(self.output, table.schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        """Finaliza o arquivo (rodapé do Parquet/Arrow). Não fecha `output`."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def spooled_results_file():
+    """Arquivo temporário para resultados: em memória se pequeno, em disco acima de RESULTS_SPOOL_MAX_BYTES."""
+    return tempfile.SpooledTemporaryFile(max_size=RESULTS_SPOOL_MAX_BYTES)
+
+
+def spool_results(results_df, output_format='csv'):
+    """Grava os resultados em um spooled_results_file, devolvido na posição inicial."""
+    output = spooled_results_file()
+    with ResultsWriter(output, output_format) as writer:
+        writer.write(results_df)
+    output.seek(0)
+    return output
+
+
+# --- CLASSIFICAÇÃO EM STREAMING ---
+
+def score_upload_stream(chunks, score_chunk, output, output_format='csv'):
+    """Classifica cada bloco e grava os resultados em `output` (arquivo binário) à medida que avança.
+
+    `score_chunk(df)` devolve o DataFrame de resultados do bloco (score_dataframe ou ParallelScorer.score).
+    Gera o DataFrame de resultados de cada bloco para que o chamador acumule contagens e preview.
+    """
+    with ResultsWriter(output, output_format) as writer:
+        for chunk in chunks:
+            results_df = score_chunk(chunk)
+            writer.write(results_df)
+            yield results_df
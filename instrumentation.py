@@ -0,0 +1,250 @@
+"""Instrumentação por etapa do caminho de classificação: timers, contadores e histogramas.
+
+Cada etapa (leitura, validação, pré-processamento, previsão, explicação, exibição, exportação)
+é medida com `METRICS.stage(etapa, path=..., rows=...)` e alimenta, por (path, etapa):
+- histograma de latência (segundos) e de vazão (linhas/s, quando `rows` é informado);
+- contador de linhas processadas.
+
+`render_prometheus()` gera o formato texto do Prometheus (GET /metrics do service.py ou o
+servidor opcional do app); `summary_frame()` alimenta o painel da barra lateral.
+
+Desligada (EXOPLANET_METRICS=0), `stage()` devolve sempre o mesmo objeto inerte: o custo é uma
+checagem de atributo por etapa, não por linha. Ligada, cada medida custa alguns microssegundos
+(um lock e uma busca binária), o que é desprezível perto de um bloco de milhares de linhas.
+"""
+import bisect
+import os
+import threading
+import time
+
+import pandas as pd
+
+# --- CONFIGURAÇÕES GLOBAIS ---
+METRICS_ENV_VAR = "EXOPLANET_METRICS"
+METRICS_PORT_ENV_VAR = "EXOPLANET_METRICS_PORT"
+METRIC_PREFIX = "exoplanet"
+
+PATH_INDIVIDUAL = 'individual'
+PATH_BATCH = 'batch'
+
+# Limites superiores dos buckets (como nos histogramas do Prometheus; +Inf é implícito)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+THROUGHPUT_BUCKETS = (10, 100, 1_000, 10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 2_500_000, 5_000_000, 10_000_000)
+
+
+class Histogram:
+    """Contagens por bucket, soma e número de observações (não é thread-safe; o registro serializa)."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Quantil aproximado: limite superior do bucket onde a fração `q` das observações é atingida."""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return float('inf')
+
+
+class _StageTimer:
+    """Context manager de uma etapa; `rows` pode ser definido dentro do bloco (ex.: linhas lidas)."""
+
+    __slots__ = ('registry', 'path', 'stage', 'rows', 'start')
+
+    def __init__(self, registry, path, stage, rows):
+        self.registry = registry
+        self.path = path
+        self.stage = stage
+        self.rows = rows
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.registry.observe(self.path, self.stage, time.perf_counter() - self.start, self.rows)
+
+
+class _NullTimer:
+    """Timer inerte usado com a instrumentação desligada."""
+
+    __slots__ = ('rows',)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return None
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class MetricsRegistry:
+    """Histogramas e contadores por (path, etapa), compartilhados pelas sessões do processo."""
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    def stage(self, stage, path=PATH_BATCH, rows=None):
+        """Mede o bloco `with` como uma execução da etapa (exceções não são registradas)."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _StageTimer(self, path, stage, rows)
+
+    def observe(self, path, stage, seconds, rows=None):
+        """Registra uma execução já medida."""
+        if not self.enabled:
+            return
+        with self._lock:
+            entry = self._stages.get((path, stage))
+            if entry is None:
+                entry = self._stages[(path, stage)] = {
+                    'latency': Histogram(LATENCY_BUCKETS),
+                    'throughput': Histogram(THROUGHPUT_BUCKETS),
+                    'rows': 0,
+                }
+            entry['latency'].observe(seconds)
+            if rows:
+                entry['rows'] += rows
+                if seconds > 0:
+                    entry['throughput'].observe(rows / seconds)
+
+    def timed_iter(self, iterable, stage, path=PATH_BATCH):
+        """Repassa os itens de `iterable` medindo o tempo de produzir cada um (ex.: blocos lidos do arquivo)."""
+        iterator = iter(iterable)
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    # O fim da iteração não produziu bloco: não conta como execução da etapa
+                    return
+                self.observe(path, stage, time.perf_counter() - start, len(item) if hasattr(item, '__len__') else None)
+                yield item
+        finally:
+            # Fecha o gerador de origem (ex.: libera o arquivo do openpyxl) se o consumo parar antes do fim
+            if hasattr(iterator, 'close'):
+                iterator.close()
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+
+    def summary_frame(self):
+        """Uma linha por (path, etapa): execuções, linhas, tempo total/médio, p95 aproximado e linhas/s."""
+        with self._lock:
+            rows = []
+            for (path, stage), entry in sorted(self._stages.items()):
+                latency = entry['latency']
+                rows.append((
+                    path, stage, latency.count, entry['rows'], latency.sum,
+                    latency.sum / latency.count * 1000, (latency.quantile(0.95) or 0.0) * 1000,
+                    entry['rows'] / latency.sum if entry['rows'] and latency.sum > 0 else None,
+                ))
+        return pd.DataFrame(rows, columns=[
+            'Caminho', 'Etapa', 'Execucoes', 'Linhas', 'Tempo_Total_s', 'Media_ms', 'P95_ms', 'Linhas_por_s',
+        ])
+
+    def render_prometheus(self, gauges=None):
+        """Métricas no formato texto do Prometheus (0.0.4). `gauges`: {nome: (ajuda, valor)} extras."""
+        latency_name = f"{METRIC_PREFIX}_stage_duration_seconds"
+        throughput_name = f"{METRIC_PREFIX}_stage_rows_per_second"
+        rows_name = f"{METRIC_PREFIX}_stage_rows_total"
+
+        lines = [
+            f"# HELP {latency_name} Duração de cada etapa da classificação.",
+            f"# TYPE {latency_name} histogram",
+        ]
+        with self._lock:
+            stages = sorted(self._stages.items())
+            for (path, stage), entry in stages:
+                lines.extend(_histogram_lines(latency_name, {'path': path, 'stage': stage}, entry['latency']))
+            lines += [
+                f"# HELP {throughput_name} Vazão (linhas por segundo) de cada execução da etapa.",
+                f"# TYPE {throughput_name} histogram",
+            ]
+            for (path, stage), entry in stages:
+                if entry['throughput'].count:
+                    lines.extend(_histogram_lines(throughput_name, {'path': path, 'stage': stage}, entry['throughput']))
+            lines += [
+                f"# HELP {rows_name} Linhas processadas por etapa.",
+                f"# TYPE {rows_name} counter",
+            ]
+            for (path, stage), entry in stages:
+                lines.append(f"{rows_name}{_labels({'path': path, 'stage': stage})} {entry['rows']}")
+
+        for name, (help_text, value) in (gauges or {}).items():
+            if value is None:
+                continue
+            lines += [
+                f"# HELP {METRIC_PREFIX}_{name} {help_text}",
+                f"# TYPE {METRIC_PREFIX}_{name} gauge",
+                f"{METRIC_PREFIX}_{name} {_format_value(value)}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels):
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _histogram_lines(name, labels, histogram):
+    cumulative = 0
+    for bound, count in zip(histogram.buckets, histogram.counts):
+        cumulative += count
+        yield f"{name}_bucket{_labels({**labels, 'le': _format_value(float(bound))})} {cumulative}"
+    yield f"{name}_bucket{_labels({**labels, 'le': '+Inf'})} {histogram.count}"
+    yield f"{name}_sum{_labels(labels)} {_format_value(histogram.sum)}"
+    yield f"{name}_count{_labels(labels)} {histogram.count}"
+
+
+# Registro do processo: ligado por padrão, desligado com EXOPLANET_METRICS=0
+METRICS = MetricsRegistry(enabled=os.environ.get(METRICS_ENV_VAR, '1') != '0')
+
+
+def start_metrics_server(port, registry=METRICS, host='0.0.0.0'):
+    """Servidor HTTP em thread que responde GET /metrics (para processos sem HTTP próprio, como o Streamlit)."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    return server
@@ -0,0 +1,125 @@
+import asyncio
+import time
+from collections import deque
+
+
+class MicroBatcher:
+    """Agrupa requisições individuais concorrentes em lotes para uma única previsão vetorizada.
+
+    Um lote é fechado quando atinge `max_batch_size` registros ou quando `max_wait_ms` se passam
+    desde a chegada do primeiro registro. `score_batch(registros)` é síncrona, roda em um thread
+    do executor e deve devolver um resultado por registro, na mesma ordem.
+    """
+
+    def __init__(self, score_batch, max_batch_size=64, max_wait_ms=2.0):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size deve ser pelo menos 1")
+        self.score_batch = score_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._pending = deque()
+        self._has_items = None
+        self._is_full = None
+        self._worker = None
+
+        # Métricas
+        self.batches_total = 0
+        self.records_total = 0
+        self.max_queue_depth = 0
+        self.last_batch_size = 0
+        self.batch_seconds_total = 0.0
+
+    @property
+    def running(self):
+        return self._worker is not None
+
+    async def start(self):
+        """Inicia o laço de lotes no event loop atual."""
+        if self._worker is None:
+            self._has_items = asyncio.Event()
+            self._is_full = asyncio.Event()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Encerra o laço; requisições ainda na fila recebem erro."""
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        while self._pending:
+            _, future = self._pending.popleft()
+            if not future.done():
+                future.set_exception(RuntimeError("micro-batcher encerrado"))
+        self._worker = None
+
+    async def submit(self, record):
+        """Enfileira um registro e aguarda o resultado do lote em que ele for incluído."""
+        if self._worker is None:
+            raise RuntimeError("micro-batcher não iniciado")
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((record, future))
+        self.max_queue_depth = max(self.max_queue_depth, len(self._pending))
+        self._has_items.set()
+        if len(self._pending) >= self.max_batch_size:
+            self._is_full.set()
+        return await future
+
+    async def _collect_batch(self):
+        await self._has_items.wait()
+        try:
+            # Espera o lote encher ou a janela de tempo fechar, o que vier primeiro
+            await asyncio.wait_for(self._is_full.wait(), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            pass
+
+        size = min(self.max_batch_size, len(self._pending))
+        batch = [self._pending.popleft() for _ in range(size)]
+
+        if not self._pending:
+            self._has_items.clear()
+        if len(self._pending) < self.max_batch_size:
+            self._is_full.clear()
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect_batch()
+            records = [record for record, _ in batch]
+
+            start = time.perf_counter()
+            try:
+                # Roda fora do event loop: o próximo lote se forma enquanto este é classificado
+                results = await loop.run_in_executor(None, self.score_batch, records)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batch_seconds_total += time.perf_counter() - start
+            self.batches_total += 1
+            self.records_total += len(batch)
+            self.last_batch_size = len(batch)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def metrics(self):
+        """Profundidade da fila e preenchimento médio dos lotes."""
+        mean_batch_size = self.records_total / self.batches_total if self.batches_total else 0.0
+        return {
+            'queue_depth': len(self._pending),
+            'max_queue_depth': self.max_queue_depth,
+            'batches_total': self.batches_total,
+            'records_total': self.records_total,
+            'last_batch_size': self.last_batch_size,
+            'mean_batch_size': mean_batch_size,
+            'mean_batch_fill': mean_batch_size / self.max_batch_size,
+            'mean_batch_seconds': self.batch_seconds_total / self.batches_total if self.batches_total else 0.0,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000.0,
+        }
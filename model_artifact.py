@@ -0,0 +1,192 @@
+"""Artefato nativo do modelo: booster em UBJSON do XGBoost + manifest.json versionado.
+
+Substitui o pickle `(modelo, train_features)`: carrega sem desserializar objetos Python, não
+depende das versões exatas de sklearn/xgboost que geraram o arquivo e traz os metadados do
+pré-processamento. O pickle antigo é convertido automaticamente no primeiro carregamento.
+
+Uso:
+    python model_artifact.py data/model_and_features.pkl            # gera data/model_and_features/
+    python model_artifact.py modelo.pkl --output-dir artefatos/modelo
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import math
+import os
+import sys
+import tempfile
+
+from scoring import CLASSIFICATION_THRESHOLD, IMPUTATION_VALUE
+
+# --- CONFIGURAÇÕES GLOBAIS ---
+ARTIFACT_FORMAT_VERSION = 1
+MANIFEST_FILE_NAME = "manifest.json"
+MISSION_PREFIX = "mission_"
+
+
+def file_content_hash(path, block_size=1 << 20):
+    """SHA-256 do conteúdo do arquivo (identifica a versão do modelo)."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def is_native_artifact(path):
+    """Diretório do artefato nativo ou o próprio manifest.json."""
+    return os.path.isdir(path) or os.path.basename(path) == MANIFEST_FILE_NAME
+
+
+def resolve_artifact_path(path):
+    """Caminho do arquivo que identifica o artefato: o manifest.json (nativo) ou o próprio pickle."""
+    if os.path.isdir(path):
+        return os.path.join(path, MANIFEST_FILE_NAME)
+    return path
+
+
+def converted_artifact_dir(legacy_path):
+    """Diretório onde o pickle é convertido: data/model_and_features.pkl -> data/model_and_features/."""
+    return os.path.splitext(legacy_path)[0]
+
+
+def build_manifest(model, train_features, booster_file, booster_sha256, source=None):
+    """Metadados necessários para reproduzir o pré-processamento e a decisão do modelo."""
+    import xgboost
+
+    train_features = list(train_features)
+    booster = model.get_booster()
+    best_iteration = getattr(model, 'best_iteration', None)
+    # O UBJSON não guarda o parâmetro `missing` do wrapper; None representa NaN (JSON não tem NaN)
+    missing = float(getattr(model, 'missing', math.nan))
+    return {
+        'format_version': ARTIFACT_FORMAT_VERSION,
+        'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'xgboost_version': xgboost.__version__,
+        'booster_file': booster_file,
+        'booster_sha256': booster_sha256,
+        'objective': json.loads(booster.save_config())['learner']['objective']['name'],
+        'best_iteration': best_iteration,
+        'missing': None if math.isnan(missing) else missing,
+        'train_features': train_features,
+        'feature_dtype': 'float32',
+        'mission_categories': [
+            feature[len(MISSION_PREFIX):] for feature in train_features if feature.startswith(MISSION_PREFIX)
+        ],
+        'imputation_value': IMPUTATION_VALUE,
+        'classification_threshold': CLASSIFICATION_THRESHOLD,
+        'source': source,
+    }
+
+
+def _write_json_atomic(path, data):
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.json')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def save_native_artifact(model, train_features, artifact_dir, source=None):
+    """Grava o booster em UBJSON e o manifest.json em `artifact_dir`. Retorna o caminho do manifest.
+
+    O booster recebe o hash no nome e o manifest é gravado por último, de forma atômica:
+    leitores concorrentes (ex.: workers convertendo ao mesmo tempo) nunca veem um artefato pela metade.
+    """
+    os.makedirs(artifact_dir, exist_ok=True)
+
+    # O sufixo .ubj seleciona o formato binário do XGBoost
+    fd, tmp_path = tempfile.mkstemp(dir=artifact_dir, prefix='.tmp-', suffix='.ubj')
+    os.close(fd)
+    try:
+        model.save_model(tmp_path)
+        booster_sha256 = file_content_hash(tmp_path)
+        booster_file = f"model-{booster_sha256[:16]}.ubj"
+        os.replace(tmp_path, os.path.join(artifact_dir, booster_file))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+    manifest = build_manifest(model, train_features, booster_file, booster_sha256, source)
+    manifest_path = os.path.join(artifact_dir, MANIFEST_FILE_NAME)
+    _write_json_atomic(manifest_path, manifest)
+    return manifest_path
+
+
+def read_manifest(manifest_path):
+    """Lê e valida o manifest.json."""
+    with open(manifest_path, encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    if manifest.get('format_version') != ARTIFACT_FORMAT_VERSION:
+        raise ValueError(f"Versão de artefato não suportada: {manifest.get('format_version')}")
+    if manifest.get('imputation_value') != IMPUTATION_VALUE:
+        raise ValueError(
+            f"Artefato gerado com valor de imputação {manifest.get('imputation_value')}, "
+            f"mas o pré-processamento usa {IMPUTATION_VALUE}"
+        )
+    return manifest
+
+
+def load_native_model(manifest_path, manifest):
+    """Carrega o XGBClassifier a partir do booster UBJSON referenciado pelo manifest."""
+    from xgboost import XGBClassifier
+
+    missing = manifest.get('missing')
+    model = XGBClassifier(missing=math.nan if missing is None else missing)
+    model.load_model(os.path.join(os.path.dirname(manifest_path), manifest['booster_file']))
+    return model
+
+
+def load_legacy_pickle(path):
+    """Desserializa o pickle antigo `(modelo, train_features)`."""
+    import joblib
+
+    model_data = joblib.load(path)
+    return model_data[0], list(model_data[1])
+
+
+def find_converted_artifact(legacy_path, legacy_hash):
+    """Manifest da conversão do pickle, se existir e tiver sido gerado a partir deste mesmo conteúdo."""
+    manifest_path = os.path.join(converted_artifact_dir(legacy_path), MANIFEST_FILE_NAME)
+    try:
+        manifest = read_manifest(manifest_path)
+    except (OSError, ValueError):
+        return None, None
+    if (manifest.get('source') or {}).get('sha256') != legacy_hash:
+        return None, None
+    return manifest_path, manifest
+
+
+def convert_legacy_artifact(legacy_path, artifact_dir=None, legacy_hash=None, model_data=None):
+    """Converte o pickle para o formato nativo. Retorna o caminho do manifest gerado."""
+    model, train_features = model_data if model_data is not None else load_legacy_pickle(legacy_path)
+    source = {
+        'path': os.path.basename(legacy_path),
+        'sha256': legacy_hash or file_content_hash(legacy_path),
+    }
+    return save_native_artifact(
+        model, train_features, artifact_dir or converted_artifact_dir(legacy_path), source=source
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Converte o pickle do modelo para o artefato nativo (UBJSON + manifest).")
+    parser.add_argument('legacy_path', help="Pickle (modelo, train_features)")
+    parser.add_argument('--output-dir', help="Diretório do artefato (padrão: ao lado do pickle, sem a extensão)")
+    args = parser.parse_args(argv)
+
+    manifest_path = convert_legacy_artifact(args.legacy_path, args.output_dir)
+    manifest = read_manifest(manifest_path)
+    print(f"✅ {args.legacy_path} -> {manifest_path} ({len(manifest['train_features'])} features)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,131 @@
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+from booster_backend import BoosterBackend
+from model_artifact import (
+    convert_legacy_artifact,
+    file_content_hash,
+    find_converted_artifact,
+    is_native_artifact,
+    load_legacy_pickle,
+    load_native_model,
+    read_manifest,
+    resolve_artifact_path,
+)
+from scoring import FeaturePlan, compile_feature_plan
+
+# --- CONFIGURAÇÕES GLOBAIS ---
+MODEL_AND_FEATURES_PATH = "data/model_and_features.pkl"
+
+
+@dataclass
+class LoadedModel:
+    """Modelo carregado em memória junto com os metadados do arquivo de origem."""
+    model: object
+    train_features: list
+    path: str
+    mtime: float
+    content_hash: str
+    load_seconds: float
+    feature_plan: FeaturePlan
+    # Objeto usado nas previsões: BoosterBackend nativo ou, se incompatível, o próprio modelo
+    scorer: object
+    # Manifest do artefato nativo (None se o pickle não pôde ser convertido)
+    manifest: dict = None
+
+
+def build_scorer(model, nthread=None):
+    """BoosterBackend para o modelo; cai para o wrapper sklearn se o objetivo não for suportado."""
+    try:
+        return BoosterBackend(model, nthread=nthread)
+    except (ValueError, AttributeError):
+        return model
+
+
+def load_model_artifact(path, nthread=None):
+    """Carrega o artefato (nativo ou pickle), mede o tempo e compila o FeaturePlan.
+
+    Um pickle `(modelo, train_features)` é convertido para o formato nativo na primeira carga;
+    as seguintes usam a conversão enquanto o conteúdo do pickle não mudar.
+    """
+    path = resolve_artifact_path(path)
+    content_hash = file_content_hash(path)
+
+    if is_native_artifact(path):
+        manifest_path, manifest = path, read_manifest(path)
+    else:
+        manifest_path, manifest = find_converted_artifact(path, content_hash)
+
+    start = time.perf_counter()
+    if manifest is not None:
+        model = load_native_model(manifest_path, manifest)
+        train_features = list(manifest['train_features'])
+    else:
+        model, train_features = load_legacy_pickle(path)
+    load_seconds = time.perf_counter() - start
+
+    if manifest is None:
+        try:
+            manifest = read_manifest(convert_legacy_artifact(
+                path, legacy_hash=content_hash, model_data=(model, train_features)
+            ))
+        except (OSError, AttributeError, ValueError):
+            # Diretório somente leitura ou modelo sem formato nativo: segue com o pickle
+            pass
+
+    return LoadedModel(
+        model=model,
+        train_features=train_features,
+        path=path,
+        mtime=os.path.getmtime(path),
+        content_hash=content_hash,
+        load_seconds=load_seconds,
+        feature_plan=compile_feature_plan(train_features),
+        scorer=build_scorer(model, nthread),
+        manifest=manifest,
+    )
+
+
+class ModelRegistry:
+    """Carrega cada artefato uma única vez por processo e o compartilha entre sessões e reruns.
+
+    O arquivo só é desserializado de novo quando o mtime muda E o hash do conteúdo também.
+    `path` pode ser o pickle legado, o diretório do artefato nativo ou o seu manifest.json.
+    `nthread` fixa o número de threads do XGBoost dos modelos carregados (None = padrão).
+    """
+
+    def __init__(self, nthread=None):
+        self.nthread = nthread
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        """Retorna o LoadedModel de `path`, recarregando-o apenas se o arquivo mudou."""
+        path = resolve_artifact_path(os.path.abspath(path))
+        mtime = os.path.getmtime(path)  # FileNotFoundError se o artefato não existir
+
+        with self._lock:
+            cached = self._models.get(path)
+            if cached is not None and cached.mtime == mtime:
+                return cached
+
+            if cached is not None and file_content_hash(path) == cached.content_hash:
+                # Arquivo "tocado" sem mudança de conteúdo: mantém o modelo já carregado
+                cached.mtime = mtime
+                return cached
+
+            loaded = load_model_artifact(path, self.nthread)
+            self._models[path] = loaded
+            return loaded
+
+    def peek(self, path):
+        """LoadedModel de `path` se já estiver em memória, sem carregar nem checar o arquivo."""
+        path = resolve_artifact_path(os.path.abspath(path))
+        with self._lock:
+            return self._models.get(path)
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
@@ -0,0 +1,266 @@
+"""Roteamento entre vários modelos (por missão ou divisão de tráfego) e scoring em sombra.
+
+A configuração é um JSON como:
+
+    {
+        "models": {
+            "principal": "data/model_and_features.pkl",
+            "kepler_v2": "data/kepler_v2",
+            "candidato": "data/candidato/manifest.json"
+        },
+        "default": "principal",
+        "missions": {"Kepler": "kepler_v2"},
+        "split": {"principal": 0.9, "candidato": 0.1},
+        "shadow": ["candidato"]
+    }
+
+Linhas cuja missão aparece em `missions` vão para o modelo indicado; as demais são divididas
+entre os modelos de `split` (ou vão todas para `default`). A divisão usa o hash do conteúdo da
+linha: o mesmo objeto cai sempre no mesmo modelo. Os modelos de `shadow` classificam o bloco
+inteiro sem alterar o resultado devolvido; só as diferenças de probabilidade são registradas.
+Cada bloco é pré-processado uma única vez por lista de train_features, e essa mesma matriz
+serve aos modelos roteados e aos de sombra.
+"""
+import json
+import os
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import METRICS
+from model_registry import MODEL_AND_FEATURES_PATH
+from prediction_cache import cache_for_batch
+from scoring import (
+    BATCH_CHUNK_SIZE,
+    CLASSIFICATION_THRESHOLD,
+    REQUIRED_COLUMN_NAMES,
+    build_results_frame,
+    normalize_missions,
+    predict_probabilities,
+)
+
+# --- CONFIGURAÇÕES GLOBAIS ---
+MODEL_ROUTING_PATH = "data/models.json"
+DEFAULT_MODEL_NAME = "principal"
+
+# Diferenças recentes guardadas por par (modelo, sombra) para histograma/inspeção
+SHADOW_RECENT_DELTAS = 10_000
+
+
+@dataclass
+class RoutingConfig:
+    """Modelos disponíveis (nome -> artefato) e as regras de roteamento e sombra."""
+    models: dict
+    default: str
+    # missão -> modelo
+    missions: dict = field(default_factory=dict)
+    # modelo -> fração do tráfego não roteado por missão
+    split: dict = field(default_factory=dict)
+    shadow: list = field(default_factory=list)
+
+    def __post_init__(self):
+        names = set(self.models)
+        referenced = {self.default, *self.missions.values(), *self.split, *self.shadow}
+        unknown = sorted(referenced - names)
+        if unknown:
+            raise ValueError(f"Modelos não declarados em 'models': {', '.join(unknown)}")
+        if self.split:
+            if any(weight < 0 for weight in self.split.values()) or sum(self.split.values()) <= 0:
+                raise ValueError("'split' deve ter pesos não negativos com soma positiva")
+        routed = set(self.missions.values()) | set(self.split) | {self.default}
+        if routed & set(self.shadow):
+            raise ValueError("Um modelo em 'shadow' não pode receber tráfego real")
+
+    @property
+    def is_single_model(self):
+        """True quando todas as linhas vão para o modelo padrão e não há sombra."""
+        routed = {*self.missions.values(), *self.split}
+        return routed <= {self.default} and not self.shadow
+
+    @property
+    def default_path(self):
+        return self.models[self.default]
+
+    @classmethod
+    def single(cls, path=MODEL_AND_FEATURES_PATH, name=DEFAULT_MODEL_NAME):
+        return cls(models={name: path}, default=name)
+
+    @classmethod
+    def from_dict(cls, data, base_dir="."):
+        """Lê o JSON de roteamento; caminhos relativos são resolvidos a partir de `base_dir`."""
+        if not data.get('models'):
+            raise ValueError("A configuração de roteamento precisa declarar ao menos um modelo em 'models'")
+        models = {
+            name: path if os.path.isabs(path) else os.path.normpath(os.path.join(base_dir, path))
+            for name, path in data['models'].items()
+        }
+        return cls(
+            models=models,
+            default=data.get('default', next(iter(models))),
+            missions=dict(data.get('missions', {})),
+            split={name: float(weight) for name, weight in data.get('split', {}).items()},
+            shadow=list(data.get('shadow', [])),
+        )
+
+
+def load_routing_config(path=MODEL_ROUTING_PATH, fallback_model=MODEL_AND_FEATURES_PATH):
+    """Configuração de roteamento de `path`; sem o arquivo, um único modelo (`fallback_model`)."""
+    if not os.path.exists(path):
+        return RoutingConfig.single(fallback_model)
+    with open(path, encoding='utf-8') as f:
+        # Caminhos relativos ao diretório de trabalho, como MODEL_AND_FEATURES_PATH
+        return RoutingConfig.from_dict(json.load(f))
+
+
+class ShadowStats:
+    """Diferenças de probabilidade (sombra - modelo roteado) acumuladas por par de modelos."""
+
+    def __init__(self, recent=SHADOW_RECENT_DELTAS):
+        self._lock = threading.Lock()
+        self._pairs = {}
+        self._recent = recent
+
+    def record(self, model, shadow, routed_probabilities, shadow_probabilities):
+        delta = shadow_probabilities.astype(np.float64) - routed_probabilities
+        flips = np.count_nonzero(
+            (routed_probabilities > CLASSIFICATION_THRESHOLD) != (shadow_probabilities > CLASSIFICATION_THRESHOLD)
+        )
+        with self._lock:
+            pair = self._pairs.setdefault((model, shadow), {
+                'rows': 0, 'sum': 0.0, 'sum_abs': 0.0, 'max_abs': 0.0, 'flips': 0,
+                'recent': deque(maxlen=self._recent),
+            })
+            pair['rows'] += len(delta)
+            pair['sum'] += float(delta.sum())
+            pair['sum_abs'] += float(np.abs(delta).sum())
+            pair['max_abs'] = max(pair['max_abs'], float(np.abs(delta).max(initial=0.0)))
+            pair['flips'] += int(flips)
+            pair['recent'].extend(delta[-self._recent:].tolist())
+
+    def recent_deltas(self, model, shadow):
+        with self._lock:
+            pair = self._pairs.get((model, shadow))
+            return np.array(pair['recent'] if pair else [], dtype=np.float64)
+
+    def summary_frame(self):
+        """Uma linha por par (modelo, sombra): linhas comparadas, diferença média/absoluta e decisões trocadas."""
+        with self._lock:
+            rows = [
+                (model, shadow, pair['rows'], pair['sum'] / pair['rows'], pair['sum_abs'] / pair['rows'],
+                 pair['max_abs'], pair['flips'], pair['flips'] / pair['rows'])
+                for (model, shadow), pair in sorted(self._pairs.items()) if pair['rows']
+            ]
+        return pd.DataFrame(rows, columns=[
+            'Modelo', 'Sombra', 'Linhas', 'Delta_Medio', 'Delta_Abs_Medio', 'Delta_Abs_Max',
+            'Decisoes_Trocadas', 'Taxa_Troca',
+        ])
+
+
+class ModelRouter:
+    """Classifica cada linha pelo modelo escolhido pelas regras de roteamento, com modelos em sombra.
+
+    Mesmo contrato de score_dataframe (`score(df, on_progress=...)`); com mais de um modelo ativo,
+    o resultado ganha a coluna Modelo (categoria) com o nome do modelo que classificou a linha.
+    """
+
+    def __init__(self, config, registry, cache=None, chunk_size=BATCH_CHUNK_SIZE):
+        self.config = config
+        self.registry = registry
+        self.cache = cache
+        self.chunk_size = chunk_size
+        self.shadow_stats = ShadowStats()
+        self.shadow_errors = 0
+        # Modelos que recebem tráfego, em ordem estável (o índice é o código da coluna Modelo)
+        self.model_names = list(dict.fromkeys(
+            [config.default, *config.missions.values(), *config.split]
+        ))
+        self._split_names = list(config.split)
+        weights = np.array([config.split[name] for name in self._split_names], dtype=np.float64)
+        self._split_edges = np.cumsum(weights / weights.sum()) if len(weights) else weights
+
+    def loaded(self, name):
+        """LoadedModel de `name` pelo ModelRegistry (carregado uma vez, recarregado se o arquivo mudar)."""
+        return self.registry.get(self.config.models[name])
+
+    def route(self, df):
+        """Código (posição em model_names) do modelo de cada linha."""
+        codes = np.zeros(len(df), dtype=np.int8)
+        pending = np.ones(len(df), dtype=bool)
+
+        if self.config.missions:
+            mission = normalize_missions(df).astype(str).to_numpy()
+            for mission_name, model in self.config.missions.items():
+                rows = pending & (mission == mission_name)
+                codes[rows] = self.model_names.index(model)
+                pending &= ~rows
+
+        if len(self._split_names) and pending.any():
+            columns = [col for col in REQUIRED_COLUMN_NAMES if col in df.columns]
+            hashes = pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+            # Posição do hash em [0, 1): o mesmo conteúdo vai sempre para o mesmo modelo
+            position = (hashes >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+            arm = np.minimum(np.searchsorted(self._split_edges, position, side='right'), len(self._split_names) - 1)
+            split_codes = np.array([self.model_names.index(name) for name in self._split_names], dtype=np.int8)
+            codes[pending] = split_codes[arm[pending]]
+        return codes
+
+    def score(self, df, on_progress=None):
+        n_rows = len(df)
+        probabilities = np.empty(n_rows, dtype=np.float32)
+        codes = np.empty(n_rows, dtype=np.int8)
+        cache = cache_for_batch(self.cache, n_rows)
+
+        for start in range(0, n_rows, self.chunk_size):
+            stop = min(start + self.chunk_size, n_rows)
+            chunk_codes, chunk_probabilities = self._score_chunk(df.iloc[start:stop], cache)
+            probabilities[start:stop] = chunk_probabilities
+            codes[start:stop] = chunk_codes
+            if on_progress is not None:
+                on_progress(stop, n_rows)
+
+        results = build_results_frame(np.asarray(df.index) + 1, probabilities)
+        if len(self.model_names) > 1:
+            results.insert(1, 'Modelo', pd.Categorical.from_codes(codes, categories=self.model_names))
+        return results
+
+    def _score_chunk(self, chunk, cache):
+        matrices = {}
+
+        def matrix_for(loaded):
+            # Uma passada de pré-processamento por lista de train_features, compartilhada no bloco
+            key = tuple(loaded.train_features)
+            if key not in matrices:
+                with METRICS.stage('preprocess', rows=len(chunk)):
+                    matrices[key] = loaded.feature_plan.transform_frame(chunk)
+            return matrices[key]
+
+        codes = self.route(chunk)
+        probabilities = np.empty(len(chunk), dtype=np.float32)
+        for code, name in enumerate(self.model_names):
+            rows = np.flatnonzero(codes == code)
+            if len(rows) == 0:
+                continue
+            loaded = self.loaded(name)
+            X = matrix_for(loaded)
+            X_rows = X if len(rows) == len(chunk) else X[rows]
+            with METRICS.stage('predict', rows=len(rows)):
+                probabilities[rows] = predict_probabilities(loaded.scorer, X_rows, cache, loaded.content_hash)
+
+        for shadow in self.config.shadow:
+            try:
+                loaded = self.loaded(shadow)
+                X = matrix_for(loaded)
+                with METRICS.stage('shadow_predict', rows=len(chunk)):
+                    shadow_probabilities = predict_probabilities(loaded.scorer, X, cache, loaded.content_hash)
+            except Exception:
+                # A sombra nunca interfere no resultado devolvido
+                self.shadow_errors += 1
+                continue
+            for code, name in enumerate(self.model_names):
+                rows = np.flatnonzero(codes == code)
+                if len(rows):
+                    self.shadow_stats.record(name, shadow, probabilities[rows], shadow_probabilities[rows])
+        return codes, probabilities
@@ -0,0 +1,124 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from instrumentation import METRICS
+from model_registry import ModelRegistry
+from prediction_cache import cache_for_batch, feature_vector_keys
+from scoring import BATCH_CHUNK_SIZE, build_results_frame, positive_probabilities
+
+# Fragmentos por worker: mais de um para equilibrar a carga entre os processos
+SHARDS_PER_WORKER = 4
+
+# Registro do próprio processo worker (cada worker mantém sua cópia do modelo).
+# Um thread do XGBoost por processo: o paralelismo vem dos workers.
+_worker_registry = ModelRegistry(nthread=1)
+
+
+def _init_worker(model_path):
+    """Carrega o modelo assim que o worker sobe, antes do primeiro fragmento."""
+    _worker_registry.get(model_path)
+
+
+def _score_shard(model_path, shard):
+    """Pré-processa e classifica um fragmento dentro do worker. Retorna as probabilidades da classe 1."""
+    loaded = _worker_registry.get(model_path)
+    X_processed = loaded.feature_plan.transform_frame(shard)
+    return positive_probabilities(loaded.scorer, X_processed)
+
+
+def _predict_shard(model_path, X_processed):
+    """Classifica linhas já pré-processadas (as ausentes do cache) dentro do worker."""
+    return positive_probabilities(_worker_registry.get(model_path).scorer, X_processed)
+
+
+class ParallelScorer:
+    """Classifica DataFrames fragmentados em um pool de processos reutilizável.
+
+    Os resultados são remontados na ordem original e são idênticos aos de score_dataframe.
+    Com um PredictionCache, o pré-processamento e a consulta ao cache rodam no processo
+    principal (onde o cache vive) e só as linhas ausentes vão aos workers, como matriz float32.
+    """
+
+    def __init__(self, model_path, workers=None, shard_size=None, registry=None):
+        self.model_path = os.path.abspath(model_path)
+        self.workers = workers or os.cpu_count() or 1
+        self.shard_size = shard_size
+        # Modelo do processo principal: só é carregado quando há cache (versão e FeaturePlan)
+        self.registry = registry if registry is not None else ModelRegistry()
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.model_path,),
+        )
+
+    def _shard_size_for(self, n_rows):
+        if self.shard_size is not None:
+            return self.shard_size
+        return max(1, min(BATCH_CHUNK_SIZE, math.ceil(n_rows / (self.workers * SHARDS_PER_WORKER))))
+
+    def score(self, df, on_progress=None, cache=None):
+        """Mesmo contrato de score_dataframe; `on_progress` é chamado a cada fragmento concluído.
+
+        Com `cache`, só as linhas ainda não vistas pela versão atual do modelo são classificadas;
+        lotes maiores que o cache não o usam.
+        Os workers não compartilham o METRICS do processo: a etapa é medida inteira, como 'score_parallel'.
+        """
+        with METRICS.stage('score_parallel', rows=len(df)):
+            cache = cache_for_batch(cache, len(df))
+            if cache is None:
+                probabilities = self._run_shards(_score_shard, df, on_progress)
+            else:
+                probabilities = self._score_cached(df, on_progress, cache)
+        return build_results_frame(np.asarray(df.index) + 1, probabilities)
+
+    def _score_cached(self, df, on_progress, cache):
+        loaded = self.registry.get(self.model_path)
+        X_processed = loaded.feature_plan.transform_frame(df)
+        keys = feature_vector_keys(X_processed, loaded.content_hash)
+        probabilities, missing = cache.get_many(keys)
+
+        missing_rows = np.flatnonzero(missing)
+        if len(missing_rows):
+            probabilities[missing_rows] = self._run_shards(
+                _predict_shard, X_processed[missing_rows], on_progress, done=len(df) - len(missing_rows), total=len(df)
+            )
+            cache.put_many(keys[missing_rows], probabilities[missing_rows])
+        elif on_progress is not None:
+            on_progress(len(df), len(df))
+        return probabilities
+
+    def _run_shards(self, score_shard, data, on_progress, done=0, total=None):
+        """Distribui `data` (DataFrame ou matriz) em fragmentos e remonta as probabilidades na ordem."""
+        n_rows = len(data)
+        total = n_rows if total is None else total
+        probabilities = np.empty(n_rows, dtype=np.float32)
+        shard_size = self._shard_size_for(n_rows)
+
+        futures = {
+            self._executor.submit(
+                score_shard, self.model_path,
+                data.iloc[start:start + shard_size] if hasattr(data, 'iloc') else data[start:start + shard_size],
+            ): start
+            for start in range(0, n_rows, shard_size)
+        }
+
+        for future in as_completed(futures):
+            start = futures[future]
+            shard_probabilities = future.result()
+            probabilities[start:start + len(shard_probabilities)] = shard_probabilities
+            done += len(shard_probabilities)
+            if on_progress is not None:
+                on_progress(done, total)
+        return probabilities
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
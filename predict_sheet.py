@@ -0,0 +1,264 @@
+"""Classificação de planilhas pela linha de comando, sem Streamlit.
+
+Uso:
+    python predict_sheet.py catalogo.csv
+    python predict_sheet.py toi.xlsx k2.parquet --output-dir resultados/ --workers 4
+    python predict_sheet.py catalogo.arrow --format parquet
+    python predict_sheet.py catalogo.csv --routing data/models.json
+    python predict_sheet.py catalogo.csv --explain 5
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from contextlib import closing
+from functools import partial
+
+from explanations import EXPLANATION_TOP_FEATURES, ExplainingScorer
+from ingestion import (
+    RESULT_FORMATS,
+    STREAM_CHUNK_SIZE,
+    estimate_row_count,
+    iter_upload_chunks,
+    resolve_upload_columns,
+    score_upload_stream,
+)
+from instrumentation import METRICS
+from model_registry import MODEL_AND_FEATURES_PATH, ModelRegistry
+from model_router import ModelRouter, RoutingConfig
+from parallel_scoring import ParallelScorer
+from progress import ProgressReporter
+from scoring import count_exoplanets, score_dataframe
+from validation import QuarantiningScorer
+
+SUPPORTED_EXTENSIONS = ('.csv', '.xlsx', '.xls', '.parquet', '.arrow', '.feather')
+
+# Intervalo entre atualizações da linha de progresso no terminal
+CLI_PROGRESS_INTERVAL_SECONDS = 1.0
+
+
+def default_output_path(input_path, output_dir=None, output_format='csv'):
+    """Caminho de saída padrão: <nome>_resultados.<formato> ao lado da entrada (ou em output_dir)."""
+    stem = os.path.splitext(os.path.basename(input_path))[0]
+    directory = output_dir if output_dir is not None else os.path.dirname(input_path)
+    return os.path.join(directory, f"{stem}_resultados{RESULT_FORMATS[output_format][0]}")
+
+
+def quarantine_output_path(output_path):
+    """Linhas inválidas de <nome>_resultados.* vão para <nome>_resultados_quarentena.csv."""
+    return f"{os.path.splitext(output_path)[0]}_quarentena.csv"
+
+
+def temporary_path_for(path):
+    """Arquivo temporário vazio no diretório de `path` (o os.replace final não atravessa sistemas de arquivos)."""
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix=os.path.splitext(path)[1])
+    os.close(fd)
+    return tmp_path
+
+
+def score_file(input_path, output_path, score_chunk, chunk_size=STREAM_CHUNK_SIZE, output_format='csv',
+               validate=True, on_progress=None):
+    """Classifica uma planilha em streaming e grava o arquivo de resultados. Retorna um resumo.
+
+    Os resultados só aparecem em `output_path` quando o arquivo inteiro foi classificado; em caso de
+    erro nada é deixado no destino.
+
+    `score_chunk(df)` classifica cada bloco lido (serial ou ParallelScorer.score). Com `validate`,
+    linhas com valores inválidos vão para o CSV de quarentena em vez de interromper o arquivo.
+    `on_progress(linhas_lidas, total_estimado)` é chamado ao fim de cada bloco.
+    """
+    start = time.perf_counter()
+
+    with open(input_path, 'rb') as f:
+        # Colunas mapeadas por nome uma única vez; a ordem no arquivo não importa
+        resolution = resolve_upload_columns(f, input_path)
+        if resolution.missing:
+            raise ValueError(f"Colunas ausentes: {', '.join(resolution.missing)}")
+        estimated_rows = estimate_row_count(f, input_path) if on_progress is not None else None
+
+        total_count = 0
+        exoplanet_count = 0
+        quarantine = None
+        quarantine_path = quarantine_output_path(output_path)
+        # Grava em temporários ao lado dos destinos: um arquivo interrompido não parece completo
+        tmp_output_path = temporary_path_for(output_path)
+        tmp_quarantine_path = temporary_path_for(quarantine_path)
+        try:
+            with open(tmp_output_path, 'wb') as output, open(tmp_quarantine_path, 'wb') as quarantine_output:
+                if validate:
+                    quarantine = QuarantiningScorer(score_chunk, quarantine_output, preview_rows=0)
+                    score_chunk = quarantine
+                # closing: o leitor de blocos é encerrado antes do arquivo de entrada, mesmo em caso de erro
+                chunks = METRICS.timed_iter(iter_upload_chunks(f, input_path, chunk_size, resolution), 'parse')
+                with closing(chunks):
+                    for results_df in score_upload_stream(chunks, score_chunk, output, output_format):
+                        total_count += len(results_df)
+                        exoplanet_count += count_exoplanets(results_df)
+                        if on_progress is not None:
+                            rows_read = total_count + (quarantine.n_invalid if quarantine is not None else 0)
+                            on_progress(rows_read, estimated_rows)
+
+            invalid_count = quarantine.n_invalid if quarantine is not None else 0
+            os.replace(tmp_output_path, output_path)
+            if invalid_count:
+                os.replace(tmp_quarantine_path, quarantine_path)
+            else:
+                os.remove(tmp_quarantine_path)
+                # Quarentena de uma execução anterior não vale para os resultados novos
+                if os.path.exists(quarantine_path):
+                    os.remove(quarantine_path)
+        except BaseException:
+            for path in (tmp_output_path, tmp_quarantine_path):
+                if os.path.exists(path):
+                    os.unlink(path)
+            raise
+
+    return {
+        'input': input_path,
+        'output': output_path,
+        'registros': total_count,
+        'exoplanetas': exoplanet_count,
+        'quarentena': invalid_count,
+        'avisos': sum(quarantine.warnings.values()) if quarantine is not None else 0,
+        'arquivo_quarentena': quarantine_path if invalid_count else None,
+        'segundos': time.perf_counter() - start,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Classifica planilhas de objetos astronômicos com o modelo XGBoost.")
+    parser.add_argument('inputs', nargs='+', help="Planilhas de entrada (.csv, .xlsx, .xls, .parquet, .arrow ou .feather)")
+    parser.add_argument('-o', '--output', help="Arquivo de saída (apenas com uma entrada)")
+    parser.add_argument('--output-dir', help="Diretório dos arquivos de saída (padrão: ao lado de cada entrada)")
+    parser.add_argument('--format', choices=list(RESULT_FORMATS), default='csv',
+                        help="Formato dos resultados; parquet/arrow mantêm a probabilidade numérica (padrão: %(default)s)")
+    parser.add_argument('--model', default=MODEL_AND_FEATURES_PATH, help="Pickle legado ou diretório do artefato nativo (padrão: %(default)s)")
+    parser.add_argument('--routing',
+                        help="JSON de roteamento entre vários modelos (por missão/divisão de tráfego, com sombra); ignora --model")
+    parser.add_argument('--explain', type=int, nargs='?', const=EXPLANATION_TOP_FEATURES, metavar='N',
+                        help=f"Acrescenta os N principais fatores de cada linha (Fator_i/Contribuicao_i; padrão N={EXPLANATION_TOP_FEATURES})")
+    parser.add_argument('--workers', type=int, default=1, help="Processos que classificam fragmentos de cada bloco em paralelo (padrão: %(default)s)")
+    parser.add_argument('--nthread', type=int,
+                        help="Threads do XGBoost no modo serial (padrão: todos os núcleos)")
+    parser.add_argument('--no-validation', action='store_true',
+                        help="Não valida tipos e faixas dos valores (sem quarentena de linhas inválidas)")
+    parser.add_argument('--no-progress', action='store_true',
+                        help="Não mostra a linha de progresso (só é exibida quando a saída de erro é um terminal)")
+    parser.add_argument('--chunk-size', type=int, default=STREAM_CHUNK_SIZE,
+                        help="Linhas lidas e classificadas por bloco (padrão: %(default)s)")
+    args = parser.parse_args(argv)
+
+    if args.output and len(args.inputs) > 1:
+        parser.error("--output só pode ser usado com uma única entrada; use --output-dir")
+    if args.workers < 1:
+        parser.error("--workers deve ser pelo menos 1")
+    if args.routing and args.workers > 1:
+        parser.error("--routing classifica em um único processo; não use com --workers")
+    if args.explain is not None:
+        if args.explain < 1:
+            parser.error("--explain deve ser pelo menos 1")
+        if args.routing or args.workers > 1:
+            parser.error("--explain classifica com um único modelo em um único processo; não use com --routing ou --workers")
+    for path in args.inputs:
+        if not path.endswith(SUPPORTED_EXTENSIONS):
+            parser.error(f"Formato não suportado: {path}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    jobs = [(path, args.output or default_output_path(path, args.output_dir, args.format)) for path in args.inputs]
+    output_paths = [os.path.abspath(output_path) for _, output_path in jobs]
+    if len(set(output_paths)) != len(output_paths):
+        print("❌ Duas entradas gerariam o mesmo arquivo de saída; renomeie-as ou separe-as por diretório.", file=sys.stderr)
+        return 2
+
+    router = None
+    if args.routing:
+        try:
+            with open(args.routing, encoding='utf-8') as f:
+                # Caminhos dos modelos relativos ao diretório de trabalho, como no app
+                config = RoutingConfig.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"❌ Configuração de roteamento inválida ({args.routing}): {e}", file=sys.stderr)
+            return 2
+
+    registry = ModelRegistry(nthread=args.nthread)
+    try:
+        if args.routing:
+            router = ModelRouter(config, registry, chunk_size=args.chunk_size)
+            # Carrega todos os modelos antes da primeira planilha (falha cedo se faltar algum)
+            for name in [*router.model_names, *config.shadow]:
+                router.loaded(name)
+        else:
+            loaded = registry.get(args.model)
+    except FileNotFoundError as e:
+        print(f"❌ Arquivo do modelo não encontrado em {e.filename or args.model}. Execute o treinamento primeiro (python train_model.py)!", file=sys.stderr)
+        return 1
+
+    scorer = None
+    if router is not None:
+        score_chunk = router.score
+    elif args.explain is not None:
+        score_chunk = ExplainingScorer(loaded, top=args.explain).score
+    elif args.workers > 1:
+        scorer = ParallelScorer(args.model, args.workers)
+        score_chunk = scorer.score
+    else:
+        score_chunk = partial(score_dataframe, model=loaded.scorer, train_features=loaded.train_features)
+
+    show_progress = not args.no_progress and sys.stderr.isatty()
+
+    failures = 0
+    try:
+        for input_path, output_path in jobs:
+            progress = None
+            if show_progress:
+                progress = ProgressReporter(
+                    lambda snapshot, name=input_path: print(f"\r⏳ {name}: {snapshot.describe()}\033[K", end='', file=sys.stderr),
+                    interval=CLI_PROGRESS_INTERVAL_SECONDS,
+                )
+            try:
+                outcome = score_file(
+                    input_path, output_path, score_chunk, args.chunk_size, args.format,
+                    validate=not args.no_validation, on_progress=progress,
+                )
+            except Exception as e:
+                if progress is not None:
+                    print(file=sys.stderr)
+                print(f"❌ {input_path}: {e}", file=sys.stderr)
+                failures += 1
+                continue
+            if progress is not None:
+                # Encerra a linha de progresso antes do resumo
+                progress.finish()
+                print(file=sys.stderr)
+            print(
+                f"✅ {outcome['input']} -> {outcome['output']}: {outcome['registros']} registros, "
+                f"{outcome['exoplanetas']} exoplanetas ({outcome['segundos']:.2f}s)"
+            )
+            if outcome['quarentena']:
+                print(f"⚠️ {outcome['quarentena']} linhas inválidas em quarentena: {outcome['arquivo_quarentena']}")
+            if outcome['avisos']:
+                print(f"ℹ️ {outcome['avisos']} valores fora da faixa esperada (linhas classificadas normalmente)")
+    finally:
+        if scorer is not None:
+            scorer.close()
+
+    if router is not None and config.shadow:
+        print("\n👥 Modelos em sombra (sombra - modelo roteado):")
+        print(router.shadow_stats.summary_frame().to_string(index=False))
+        if router.shadow_errors:
+            print(f"⚠️ Falhas nos modelos em sombra: {router.shadow_errors}")
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,265 @@
+import hashlib
+import threading
+import time
+
+import numpy as np
+
+# Limites padrão do cache de previsões
+PREDICTION_CACHE_SIZE = 200_000
+PREDICTION_CACHE_TTL_SECONDS = 24 * 3600
+
+# Fração do cache liberada de uma vez quando ele enche (despejo em lote, não entrada a entrada)
+EVICTION_FRACTION = 0.1
+
+# Ocupação máxima da tabela de endereçamento aberto (entradas + lápides) antes de reconstruí-la
+MAX_TABLE_LOAD = 0.75
+
+# Marcadores da tabela: posição nunca usada / entrada removida (a sondagem continua depois dela)
+_EMPTY = -1
+_TOMBSTONE = -2
+
+# Multiplicadores de 64 bits (razão áurea e finalizador do splitmix64)
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX = np.uint64(0xBF58476D1CE4E5B9)
+_SHIFT = np.uint64(32)
+_GOLDEN_INT, _MIX_INT, _MASK = int(_GOLDEN), int(_MIX), (1 << 64) - 1
+
+# Até este número de linhas o hash roda em inteiros do Python: com uma linha só (aba individual),
+# as dezenas de operações NumPy sobre arrays de 1 elemento custam mais que o próprio laço
+SCALAR_KEY_ROWS = 8
+
+
+def feature_vector_keys(X_processed, model_version):
+    """Uma chave uint64 por linha: hash do vetor pré-processado (na ordem de train_features) + versão do modelo.
+
+    Os vetores são convertidos para float32 (a precisão que o XGBoost usa), de modo que entradas
+    que o modelo não distingue compartilham a mesma chave. O hash percorre
+    a matriz de 8 em 8 bytes (duas colunas por vez), sempre sobre o bloco inteiro: não há laço
+    por linha. Com 64 bits, a chance de colisão entre 200 mil entradas é da ordem de 1e-9.
+    """
+    rows = np.ascontiguousarray(X_processed, dtype=np.float32)
+    if rows.ndim == 1:
+        rows = rows.reshape(1, -1)
+    words = rows.view(np.uint32)
+    n_paired = words.shape[1] - words.shape[1] % 2
+    seed = int.from_bytes(hashlib.blake2b(str(model_version).encode(), digest_size=8).digest(), 'little')
+    if rows.shape[0] <= SCALAR_KEY_ROWS:
+        return np.array([
+            _scalar_key(seed, paired + rest)
+            for paired, rest in zip(words[:, :n_paired].view(np.uint64).tolist(), words[:, n_paired:].tolist())
+        ], dtype=np.uint64)
+
+    columns = list(words[:, :n_paired].view(np.uint64).T) + list(words[:, n_paired:].T)
+    h = np.full(rows.shape[0], seed, dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for column in columns:
+            h ^= column
+            h *= _GOLDEN
+            h ^= h >> _SHIFT
+        h *= _MIX
+        h ^= h >> np.uint64(29)
+    return h
+
+
+def _scalar_key(seed, columns):
+    """O mesmo hash de feature_vector_keys para uma linha, em inteiros do Python."""
+    h = seed
+    for column in columns:
+        h = ((h ^ column) * _GOLDEN_INT) & _MASK
+        h ^= h >> 32
+    h = (h * _MIX_INT) & _MASK
+    return h ^ (h >> 29)
+
+
+def cache_for_batch(cache, n_rows):
+    """O cache, ou None quando um lote de `n_rows` linhas não cabe nele.
+
+    Um lote maior que o cache expulsaria as próprias entradas antes de qualquer acerto: o custo
+    das chaves seria pago sem retorno. `n_rows` None (total desconhecido) mantém o cache.
+    """
+    if cache is None or n_rows is None or n_rows <= cache.max_entries:
+        return cache
+    return None
+
+
+class PredictionCache:
+    """Cache LRU com expiração (TTL) de probabilidades, limitado em número de entradas.
+
+    Tudo fica em arrays NumPy: uma tabela de endereçamento aberto (sondagem linear) leva a chave
+    ao slot da entrada, e cada slot guarda probabilidade, expiração e último uso. Consultas e
+    inserções tratam o lote inteiro de uma vez, sem laço por linha em Python. O LRU é por lote:
+    quando o cache enche, os slots usados há mais tempo são liberados juntos.
+    """
+
+    def __init__(self, max_entries=PREDICTION_CACHE_SIZE, ttl_seconds=PREDICTION_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # Potência de 2 com folga (ocupação <= 50% com o cache cheio e sem lápides)
+        self._table_size = 1 << max(4, (2 * max_entries - 1).bit_length())
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.clear()
+
+    def get_many(self, keys):
+        """Retorna (probabilidades, máscara de ausentes); as posições ausentes ficam com NaN."""
+        keys = np.asarray(keys, dtype=np.uint64)
+        now = time.monotonic()
+
+        with self._lock:
+            slots = self._find(keys)
+            found = slots >= 0
+            found[found] = self._expires[slots[found]] >= now
+            missing = ~found
+
+            probabilities = np.full(len(keys), np.nan, dtype=np.float32)
+            hit_slots = slots[found]
+            probabilities[found] = self._probabilities[hit_slots]
+            self._tick += 1
+            self._last_used[hit_slots] = self._tick
+
+            n_missing = int(np.count_nonzero(missing))
+            self.misses += n_missing
+            self.hits += len(keys) - n_missing
+
+        return probabilities, missing
+
+    def put_many(self, keys, probabilities):
+        keys = np.asarray(keys, dtype=np.uint64)
+        probabilities = np.asarray(probabilities, dtype=np.float32)
+        if len(keys) > self.max_entries:
+            keys, probabilities = keys[:self.max_entries], probabilities[:self.max_entries]
+
+        with self._lock:
+            self._tick += 1
+            if self._tombstones == 0 and len(keys) <= len(self._free):
+                # Sem lápides, a sondagem da inserção passa pela chave se ela já existir: dispensa a busca prévia
+                slots = self._insert(keys, self._allocate(len(keys)))
+            else:
+                slots = self._find(keys)
+                new = slots < 0
+                # As chaves já presentes são as mais recentes: nunca são despejadas para abrir espaço às novas
+                self._last_used[slots[~new]] = self._tick
+                if new.any():
+                    new_slots = self._allocate(int(np.count_nonzero(new)))
+                    slots[new] = self._insert(keys[new], new_slots)
+
+            self._probabilities[slots] = probabilities
+            self._expires[slots] = time.monotonic() + self.ttl_seconds
+            self._last_used[slots] = self._tick
+
+    # --- Tabela de endereçamento aberto ---
+
+    def _find(self, keys):
+        """Slot de cada chave (-1 quando ausente)."""
+        slots = np.full(len(keys), -1, dtype=np.int64)
+        positions = (keys & np.uint64(self._table_size - 1)).astype(np.int64)
+        pending = np.arange(len(keys))
+        while len(pending):
+            probed = positions[pending]
+            table_slots = self._table_slots[probed]
+            match = (table_slots >= 0) & (self._table_keys[probed] == keys[pending])
+            slots[pending[match]] = table_slots[match]
+            # Continua sondando enquanto não achar a chave nem uma posição vazia
+            pending = pending[~match & (table_slots != _EMPTY)]
+            positions[pending] = (positions[pending] + 1) & (self._table_size - 1)
+        return slots
+
+    def _insert(self, keys, slots):
+        """Insere as chaves nos slots reservados e retorna o slot final de cada uma.
+
+        No conflito pela mesma posição, uma chave vence e as outras sondam a mesma posição de
+        novo. Uma chave que encontra a si mesma na sondagem (repetida no lote ou já presente
+        antes de qualquer lápide) reaproveita o slot existente, e o reservado volta para a lista
+        livre; as demais seguem para a posição seguinte.
+        """
+        slots = slots.copy()
+        positions = (keys & np.uint64(self._table_size - 1)).astype(np.int64)
+        pending = np.arange(len(keys))
+        duplicates = []
+        while len(pending):
+            probed = positions[pending]
+            table_slots = self._table_slots[probed]
+            free = table_slots < 0
+
+            occupied = pending[~free]
+            same = self._table_keys[probed[~free]] == keys[occupied]
+            if same.any():
+                duplicates.append(slots[occupied[same]])
+                slots[occupied[same]] = table_slots[~free][same]
+            occupied = occupied[~same]
+            positions[occupied] = (positions[occupied] + 1) & (self._table_size - 1)
+
+            candidates = pending[free]
+            self._claims[probed[free]] = candidates
+            claimed = self._claims[probed[free]] == candidates
+            winners = candidates[claimed]
+
+            won = probed[free][claimed]
+            n_empty = int(np.count_nonzero(table_slots[free][claimed] == _EMPTY))
+            self._filled += n_empty
+            self._tombstones -= len(won) - n_empty
+            self._table_keys[won] = keys[winners]
+            self._table_slots[won] = slots[winners]
+
+            pending = np.concatenate([occupied, candidates[~claimed]])
+
+        if duplicates:
+            released = np.concatenate(duplicates)
+            self._last_used[released] = -1
+            self._free = np.concatenate([self._free, released])
+        if self._filled > MAX_TABLE_LOAD * self._table_size:
+            self._rebuild()
+        return slots
+
+    def _rebuild(self):
+        """Recria a tabela só com as entradas vivas (descarta as lápides)."""
+        live = np.flatnonzero(self._table_slots >= 0)
+        keys, slots = self._table_keys[live], self._table_slots[live]
+        self._table_keys[:] = 0
+        self._table_slots[:] = _EMPTY
+        self._filled = 0
+        self._tombstones = 0
+        self._insert(keys, slots)
+
+    def _allocate(self, n):
+        """`n` slots livres, liberando em lote os usados há mais tempo quando o cache está cheio."""
+        if n > len(self._free):
+            used = np.flatnonzero((self._last_used >= 0) & (self._last_used < self._tick))
+            n_evict = min(len(used), max(n - len(self._free), int(self.max_entries * EVICTION_FRACTION)))
+            victims = used[np.argpartition(self._last_used[used], n_evict - 1)[:n_evict]]
+            self._last_used[victims] = -1
+            # Posições das vítimas: uma varredura da tabela, só quando há despejo
+            positions = np.flatnonzero(self._table_slots >= 0)
+            positions = positions[self._last_used[self._table_slots[positions]] < 0]
+            self._table_slots[positions] = _TOMBSTONE
+            self._tombstones += len(positions)
+            self._free = np.concatenate([self._free, victims])
+
+        slots, self._free = self._free[:n], self._free[n:]
+        self._last_used[slots] = self._tick
+        return slots
+
+    def clear(self):
+        with self._lock:
+            self._table_keys = np.zeros(self._table_size, dtype=np.uint64)
+            self._table_slots = np.full(self._table_size, _EMPTY, dtype=np.int64)
+            self._claims = np.empty(self._table_size, dtype=np.int64)
+            self._filled = 0
+            self._tombstones = 0
+            self._probabilities = np.zeros(self.max_entries, dtype=np.float32)
+            self._expires = np.zeros(self.max_entries, dtype=np.float64)
+            # -1 = slot livre
+            self._last_used = np.full(self.max_entries, -1, dtype=np.int64)
+            self._free = np.arange(self.max_entries, dtype=np.int64)
+            self._tick = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'entries': self.max_entries - len(self._free),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,92 @@
+"""Progresso com taxa de atualização limitada, igual para os modos serial, streaming e paralelo.
+
+Cada atualização de `st.progress`/`st.text` é uma mensagem pelo websocket; o ProgressReporter
+recebe todas as notificações (`on_progress`) mas só repassa a `render` no máximo uma a cada
+`interval` segundos (ou `every_rows` linhas), sempre incluindo a última.
+"""
+import math
+import time
+from dataclasses import dataclass
+
+# Intervalo mínimo entre duas atualizações da interface
+PROGRESS_INTERVAL_SECONDS = 0.25
+
+
+def format_duration(seconds):
+    """Duração como m:ss (ou h:mm:ss)."""
+    minutes, secs = divmod(int(math.ceil(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes}:{secs:02d}"
+
+
+@dataclass
+class ProgressSnapshot:
+    """Estado do processamento no momento de uma atualização."""
+    done: int
+    # None quando o total de linhas não é conhecido (ex.: leitura em streaming sem estimativa)
+    total: int
+    elapsed: float
+
+    @property
+    def rows_per_second(self):
+        return self.done / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def fraction(self):
+        if not self.total:
+            return None
+        return min(self.done / self.total, 1.0)
+
+    @property
+    def eta_seconds(self):
+        if not self.total or self.rows_per_second == 0:
+            return None
+        return max(self.total - self.done, 0) / self.rows_per_second
+
+    def describe(self):
+        text = f"{self.done:,} registros".replace(',', '.')
+        if self.total:
+            text = f"{self.done:,} de {max(self.total, self.done):,} registros ({self.fraction:.0%})".replace(',', '.')
+        text += f" · {self.rows_per_second:,.0f} registros/s".replace(',', '.')
+        if self.eta_seconds is not None:
+            text += f" · restante ~{format_duration(self.eta_seconds)}"
+        return text
+
+
+class ProgressReporter:
+    """Callback `on_progress(linhas_processadas, total)` que limita a frequência de `render(snapshot)`."""
+
+    def __init__(self, render, total=None, interval=PROGRESS_INTERVAL_SECONDS, every_rows=None,
+                 clock=time.perf_counter):
+        self.render = render
+        self.total = total
+        self.interval = interval
+        self.every_rows = every_rows
+        self.clock = clock
+        self.start = clock()
+        self.snapshot = ProgressSnapshot(0, total, 0.0)
+        self._rendered_at = -math.inf
+        self._rendered_done = None
+
+    def __call__(self, done, total=None):
+        if total is not None:
+            self.total = total
+        now = self.clock()
+        self.snapshot = ProgressSnapshot(done, self.total, now - self.start)
+
+        due = now - self._rendered_at >= self.interval
+        if self.every_rows is not None and self._rendered_done is not None:
+            due = due or done - self._rendered_done >= self.every_rows
+        if due or (self.total is not None and done >= self.total):
+            self._render(now)
+
+    def finish(self):
+        """Repassa o estado final, caso a última notificação tenha sido descartada."""
+        if self._rendered_done != self.snapshot.done:
+            self._render(self.clock())
+        return self.snapshot
+
+    def _render(self, now):
+        self._rendered_at = now
+        self._rendered_done = self.snapshot.done
+        self.render(self.snapshot)
@@ -0,0 +1,285 @@
+import functools
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import METRICS
+from prediction_cache import cache_for_batch, feature_vector_keys
+
+# --- CONFIGURAÇÕES GLOBAIS ---
+IMPUTATION_VALUE = -999.0
+UNCLASSIFIED_MISSION = 'UNCLASSIFIED'
+NO_MISSION = 'NO-MISSION'
+CLASSIFICATION_THRESHOLD = 0.5
+
+# Rótulos da coluna Predição, na ordem dos códigos de classe (0 = falso positivo, 1 = exoplaneta)
+PREDICTION_LABELS = ('FALSO_POSITIVO', 'EXOPLANETA')
+EXOPLANET_LABEL = PREDICTION_LABELS[1]
+
+# Número de linhas pré-processadas e enviadas ao modelo por chamada de predict_proba
+BATCH_CHUNK_SIZE = 50_000
+
+# Missões reconhecidas pelo one-hot do modelo (além de NO-MISSION/UNCLASSIFIED)
+KNOWN_MISSIONS = ('Kepler', 'K2', 'TOI')
+
+# --- CONFIGURAÇÃO DAS COLUNAS PARA IMPORT ---
+# (nome, conceito, unidade, categoria, faixa esperada (mín, máx) ou None; limites inclusivos)
+# Fora da faixa esperada a validação só avisa: a linha continua sendo classificada
+REQUIRED_COLUMNS = [
+    ("koi_period", "Período Orbital", "Dias", "Trânsito", (0, None)),
+    ("koi_time0bk", "Tempo do 1º Trânsito", "BKJD", "Trânsito", None),
+    ("koi_impact", "Parâmetro de Impacto", "Normalizado", "Trânsito", (0, None)),
+    ("koi_duration", "Duração do Trânsito", "Horas", "Trânsito", (0, None)),
+    ("koi_depth", "Profundidade do Trânsito", "ppm", "Trânsito", (0, None)),
+    ("koi_prad", "Raio Planetário", "R⊕", "Planeta", (0, None)),
+    ("koi_teq", "Temperatura de Equilíbrio", "K", "Planeta", (0, None)),
+    ("koi_insol", "Insolação", "S⊕", "Planeta", (0, None)),
+    ("koi_model_snr", "Razão Sinal/Ruído", "Unidade (s/ dimensão)", "Qualidade", (0, None)),
+    ("koi_steff", "Temperatura Estelar", "K", "Estrela", (0, None)),
+    ("koi_slogg", "Log g Estelar", "Log₁₀ (cgs)", "Estrela", None),
+    ("koi_srad", "Raio Estelar", "R☉", "Estrela", (0, None)),
+    ("ra", "Ascensão Reta", "Graus", "Coordenada", (0, 360)),
+    ("dec", "Declinação", "Graus", "Coordenada", (-90, 90)),
+    ("koi_kepmag", "Magnitude Kepler", "mag", "Estrela", None),
+    ("koi_fpflag_nt", "Flag: Não-Trânsito", "0 ou 1", "Flag FP", (0, 1)),
+    ("koi_fpflag_ss", "Flag: Eclipse Secundário", "0 ou 1", "Flag FP", (0, 1)),
+    ("koi_fpflag_co", "Flag: Desvio Centroide", "0 ou 1", "Flag FP", (0, 1)),
+    ("koi_fpflag_ec", "Flag: Contaminação", "0 ou 1", "Flag FP", (0, 1)),
+    ("mission", "Contexto da Missão", "Texto", "Missão", None),
+    ("pl_orbsmax", "Semieixo Maior", "AU", "Órbita Extra", (0, None)),
+    ("pl_bmasse", "Massa Planetária", "M⊕", "Massa Extra", (0, None)),
+    ("pl_orbeccen", "Excentricidade Orbital", "(Valor de 0 a 1)", "Órbita Extra", (0, 1)),
+    ("st_mass", "Massa Estelar", "M☉", "Massa Estelar Extra", (0, None))
+]
+
+REQUIRED_COLUMN_NAMES = [col[0] for col in REQUIRED_COLUMNS]
+
+# --- FUNÇÃO DE PRÉ-PROCESSAMENTO (IDÊNTICA AO TREINO) ---
+
+def prepare_data_for_model(data_dict, train_features):
+    """Cria o DataFrame de input e aplica o pré-processamento (IDÊNTICO ao predict_sheet.py)."""
+
+    # 1. Cria o DataFrame
+    df = pd.DataFrame([data_dict])
+
+    # 2. TRATAMENTO DE MISSÃO (apenas se necessário)
+    if 'mission' not in df.columns or df['mission'].isna().all():
+        df['mission'] = UNCLASSIFIED_MISSION
+
+    # 3. TRATAMENTO DE FLAGS BINÁRIOS (Imputação de 0) - IDÊNTICO ao predict_sheet.py
+    binary_cols = [col for col in train_features if 'fpflag' in col]
+    # Certificar que as colunas existem no DF antes de preencher
+    for col in binary_cols:
+        if col not in df.columns:
+            df[col] = pd.NA
+    df[binary_cols] = df[binary_cols].fillna(0)  # Mudança: 0 em vez de 0.0
+
+    # 4. ONE-HOT ENCODING DA MISSÃO
+    df = pd.get_dummies(df, columns=['mission'], drop_first=False)
+
+    # 5. GARANTIR CONSISTÊNCIA DE COLUNAS (CRÍTICO!) - IDÊNTICO ao predict_sheet.py
+    # Preencher colunas One-Hot que podem estar faltando
+    ohe_cols = [col for col in train_features if 'mission_' in col]
+    for col in ohe_cols:
+        if col not in df.columns:
+            df[col] = 0  # Mudança: 0 em vez de 0.0
+
+    # 6. IMPUTAÇÃO FINAL E ORDENAÇÃO - IDÊNTICO ao predict_sheet.py
+    # Preencher todos os NaNs restantes com -999
+    df = df.fillna(-999)  # Mudança: -999 em vez de IMPUTATION_VALUE
+
+    # Selecionar e reordenar as colunas EXATAMENTE como no treino
+    return df[train_features]
+
+
+# --- PRÉ-PROCESSAMENTO VETORIZADO (LOTE) ---
+
+def normalize_missions(df):
+    """Retorna a coluna de missão com 'NO-MISSION' e valores ausentes trocados por UNCLASSIFIED."""
+    if 'mission' not in df.columns:
+        return pd.Series(UNCLASSIFIED_MISSION, index=df.index, dtype=object)
+
+    mission = df['mission'].astype(object)
+    missing = mission.isna() | (mission == NO_MISSION)
+    return mission.where(~missing, UNCLASSIFIED_MISSION)
+
+
+class FeaturePlan:
+    """Plano de pré-processamento compilado uma única vez a partir de `train_features`.
+
+    Guarda as posições inteiras de cada coluna, os valores de preenchimento e a tabela
+    missão -> índice do one-hot, e converte registros brutos diretamente em uma matriz
+    float32 pré-alocada (mesmo resultado de prepare_data_for_model, sem DataFrames).
+    """
+
+    def __init__(self, train_features):
+        self.train_features = list(train_features)
+        self.n_features = len(self.train_features)
+
+        self.flag_positions = []
+        self.numeric_positions = []
+        self.mission_positions = {}
+        for j, col in enumerate(self.train_features):
+            if 'fpflag' in col:
+                self.flag_positions.append((col, j))
+            elif col.startswith('mission_'):
+                # Mesmo nome de coluna gerado por pd.get_dummies
+                self.mission_positions[col[len('mission_'):]] = j
+            else:
+                self.numeric_positions.append((col, j))
+
+        # Linha "vazia": numéricos imputados, flags e one-hot zerados
+        self.fill_row = np.zeros(self.n_features, dtype=np.float32)
+        for _, j in self.numeric_positions:
+            self.fill_row[j] = IMPUTATION_VALUE
+
+        self.value_positions = self.flag_positions + self.numeric_positions
+        self._mission_categories = pd.Index(list(self.mission_positions))
+        self._mission_columns = np.array(list(self.mission_positions.values()), dtype=np.intp)
+
+    def transform_records(self, records):
+        """Converte uma lista de dicionários (um por objeto) na matriz do modelo."""
+        X = np.empty((len(records), self.n_features), dtype=np.float32)
+        X[:] = self.fill_row
+
+        for i, record in enumerate(records):
+            row = X[i]
+            for col, j in self.value_positions:
+                value = record.get(col)
+                if value is not None and not pd.isna(value):
+                    row[j] = value
+
+            mission = record.get('mission')
+            if mission is None or pd.isna(mission) or mission == NO_MISSION:
+                mission = UNCLASSIFIED_MISSION
+            j = self.mission_positions.get(str(mission))
+            if j is not None:
+                row[j] = 1.0
+        return X
+
+    def transform_frame(self, df):
+        """Converte um DataFrame inteiro na matriz do modelo, coluna a coluna."""
+        n_rows = len(df)
+        X = np.empty((n_rows, self.n_features), dtype=np.float32)
+
+        # 1. FLAGS BINÁRIOS: ausentes viram 0
+        for col, j in self.flag_positions:
+            X[:, j] = df[col].fillna(0).to_numpy(dtype=np.float32) if col in df.columns else 0.0
+
+        # 2. IMPUTAÇÃO DOS NUMÉRICOS
+        for col, j in self.numeric_positions:
+            X[:, j] = df[col].fillna(IMPUTATION_VALUE).to_numpy(dtype=np.float32)
+
+        # 3. ONE-HOT DA MISSÃO pela tabela categoria -> coluna
+        if len(self._mission_columns):
+            X[:, self._mission_columns] = 0.0
+            codes = self._mission_categories.get_indexer(normalize_missions(df).astype(str))
+            known = codes >= 0
+            X[np.flatnonzero(known), self._mission_columns[codes[known]]] = 1.0
+        return X
+
+
+@functools.lru_cache(maxsize=32)
+def _compile_feature_plan(train_features):
+    return FeaturePlan(train_features)
+
+
+def compile_feature_plan(train_features):
+    """FeaturePlan de `train_features`, compilado uma vez e reaproveitado nas chamadas seguintes."""
+    return _compile_feature_plan(tuple(train_features))
+
+
+def prepare_batch_for_model(df, train_features):
+    """Aplica o pré-processamento de prepare_data_for_model ao DataFrame inteiro, coluna a coluna."""
+    X = compile_feature_plan(train_features).transform_frame(df)
+    # Colunas EXATAMENTE na ordem do treino
+    return pd.DataFrame(X, columns=list(train_features), index=df.index)
+
+
+# --- CLASSIFICAÇÃO EM LOTE ---
+
+def build_results_frame(records, probabilities):
+    """Resultados em colunas tipadas: Registro (int64), Predição (categoria, 1 byte por linha) e float32.
+
+    O texto da probabilidade ("12.34%") não fica em memória; é gerado por format_results na exibição/CSV.
+    """
+    probabilities = np.asarray(probabilities, dtype=np.float32)
+    classes = (probabilities > CLASSIFICATION_THRESHOLD).astype(np.int8)
+
+    return pd.DataFrame({
+        'Registro': np.asarray(records, dtype=np.int64),
+        'Predição': pd.Categorical.from_codes(classes, categories=PREDICTION_LABELS),
+        'Probabilidade_Numerica': probabilities,
+    })
+
+
+def format_results(results_df):
+    """Resultados no layout do processamento linha a linha, com Probabilidade_Exoplaneta formatada."""
+    probabilities = results_df['Probabilidade_Numerica'].to_numpy(dtype=np.float32)
+    formatted = results_df.copy(deep=False)
+    formatted.insert(
+        formatted.columns.get_loc('Probabilidade_Numerica'),
+        'Probabilidade_Exoplaneta',
+        [f"{p:.2f}%" for p in (probabilities * 100).tolist()],
+    )
+    return formatted
+
+
+def count_exoplanets(results_df):
+    """Número de linhas classificadas como exoplaneta (comparação vetorizada sobre os códigos da categoria)."""
+    return int((results_df['Predição'] == EXOPLANET_LABEL).sum())
+
+
+def positive_probabilities(model, X_processed):
+    """P(classe 1) em uma única passada: BoosterBackend nativo ou, na falta dele, predict_proba do sklearn."""
+    if hasattr(model, 'predict_positive'):
+        return model.predict_positive(X_processed)
+    return model.predict_proba(X_processed)[:, 1].astype(np.float32)
+
+
+def predict_probabilities(model, X_processed, cache=None, model_version=None):
+    """Probabilidade da classe 1 para a matriz já pré-processada.
+
+    Com um PredictionCache, apenas as linhas ausentes do cache são enviadas ao modelo.
+    """
+    if cache is None:
+        return positive_probabilities(model, X_processed)
+
+    keys = feature_vector_keys(X_processed, model_version)
+    probabilities, missing = cache.get_many(keys)
+    if missing.all():
+        # Bloco inteiramente novo: sem cópia das linhas ausentes
+        probabilities = positive_probabilities(model, X_processed)
+        cache.put_many(keys, probabilities)
+    elif missing.any():
+        missing_rows = np.flatnonzero(missing)
+        X_missing = X_processed.iloc[missing_rows] if hasattr(X_processed, 'iloc') else X_processed[missing_rows]
+        probabilities[missing_rows] = positive_probabilities(model, X_missing)
+        cache.put_many(keys[missing_rows], probabilities[missing_rows])
+    return probabilities
+
+
+def score_dataframe(df, model, train_features, chunk_size=BATCH_CHUNK_SIZE, on_progress=None,
+                    cache=None, model_version=None):
+    """Classifica o DataFrame em blocos, com uma única chamada ao modelo por bloco.
+
+    `on_progress(linhas_processadas, total)` é chamado ao fim de cada bloco. Com `cache`
+    (PredictionCache), só as linhas ainda não vistas para `model_version` vão ao modelo;
+    lotes maiores que o cache não o usam.
+    """
+    n_rows = len(df)
+    probabilities = np.empty(n_rows, dtype=np.float32)
+    feature_plan = compile_feature_plan(train_features)
+    cache = cache_for_batch(cache, n_rows)
+
+    for start in range(0, n_rows, chunk_size):
+        stop = min(start + chunk_size, n_rows)
+        with METRICS.stage('preprocess', rows=stop - start):
+            X_processed = feature_plan.transform_frame(df.iloc[start:stop])
+        with METRICS.stage('predict', rows=stop - start):
+            probabilities[start:stop] = predict_probabilities(model, X_processed, cache, model_version)
+
+        if on_progress is not None:
+            on_progress(stop, n_rows)
+
+    return build_results_frame(np.asarray(df.index) + 1, probabilities)
@@ -0,0 +1,75 @@
+"""Análise de sensibilidade (what-if): a probabilidade ao variar um ou dois parâmetros de um objeto.
+
+O objeto é pré-processado uma única vez; a grade é gerada repetindo essa linha e sobrescrevendo
+só as colunas varridas da matriz float32, e todos os pontos vão ao modelo em uma única chamada.
+Milhares de pontos custam o mesmo que um lote de milhares de linhas, não milhares de cliques.
+"""
+import numpy as np
+import pandas as pd
+
+from scoring import REQUIRED_COLUMNS, positive_probabilities
+
+# --- CONFIGURAÇÕES GLOBAIS ---
+# Pontos por eixo (curva com um parâmetro; mapa de calor com dois)
+SWEEP_POINTS_1D = 200
+SWEEP_POINTS_2D = 60
+MAX_SWEEP_POINTS = 250_000
+
+# Faixas permitidas de cada coluna (mín, máx), as mesmas da validação
+_ALLOWED_RANGES = {name: allowed for name, _, _, _, allowed in REQUIRED_COLUMNS if allowed is not None}
+
+
+def default_sweep_range(name, value):
+    """Faixa inicial da varredura: o valor atual ± max(|valor|, 1), limitada à faixa permitida da coluna."""
+    value = 0.0 if value is None or pd.isna(value) else float(value)
+    span = max(abs(value), 1.0)
+    low, high = value - span, value + span
+
+    allowed = _ALLOWED_RANGES.get(name)
+    if allowed is not None:
+        minimum, maximum = allowed
+        if minimum is not None:
+            low = max(low, minimum)
+        if maximum is not None:
+            high = min(high, maximum)
+    return float(low), float(high)
+
+
+def build_sweep_matrix(feature_plan, record, axes):
+    """Matriz (pontos x features) da grade: a linha do objeto repetida, com as colunas varridas trocadas.
+
+    `axes` é uma lista de (coluna, valores); com dois eixos, a grade é o produto cartesiano
+    (o primeiro eixo varia mais devagar, como em np.meshgrid(..., indexing='ij')).
+    """
+    base = feature_plan.transform_records([record])[0]
+    grids = np.meshgrid(*[np.asarray(values, dtype=np.float32) for _, values in axes], indexing='ij')
+    n_points = grids[0].size
+    if n_points > MAX_SWEEP_POINTS:
+        raise ValueError(f"Grade grande demais: {n_points} pontos (máximo {MAX_SWEEP_POINTS})")
+
+    X = np.tile(base, (n_points, 1))
+    for (name, _), grid in zip(axes, grids):
+        if name not in feature_plan.train_features:
+            raise ValueError(f"Parâmetro não usado pelo modelo: {name}")
+        # Valores da grade nunca são NaN: entram direto, sem imputação
+        X[:, feature_plan.train_features.index(name)] = grid.ravel()
+    return X
+
+
+def sweep(loaded, record, axes):
+    """Probabilidade de exoplaneta em cada ponto da grade, em uma única chamada ao modelo.
+
+    Retorna um array com a forma da grade: (n,) para um eixo, (n1, n2) para dois.
+    O cache de previsões não é usado: os pontos da grade raramente se repetem.
+    """
+    X = build_sweep_matrix(loaded.feature_plan, record, axes)
+    probabilities = positive_probabilities(loaded.scorer, X)
+    return probabilities.reshape([len(values) for _, values in axes])
+
+
+def sweep_frame(axes, probabilities):
+    """Resultado da varredura em formato longo (uma coluna por parâmetro + Probabilidade), para os gráficos."""
+    grids = np.meshgrid(*[np.asarray(values) for _, values in axes], indexing='ij')
+    data = {name: grid.ravel() for (name, _), grid in zip(axes, grids)}
+    data['Probabilidade'] = np.asarray(probabilities).ravel()
+    return pd.DataFrame(data)
@@ -0,0 +1,237 @@
+"""Serviço HTTP de inferência, ao lado da interface Streamlit.
+
+Uso:
+    python service.py --port 8000
+    uvicorn service:app --port 8000
+
+Endpoints:
+    GET  /health         -> estado e versão do modelo
+    POST /predict        -> um objeto JSON com as colunas de REQUIRED_COLUMNS
+    POST /predict/batch  -> lista de objetos (ou {"records": [...]})
+    GET  /stats          -> métricas do micro-batcher e do cache de previsões
+    GET  /metrics        -> tempo e vazão por etapa no formato texto do Prometheus
+
+Com o micro-batching ligado (padrão), chamadas concorrentes a /predict são agrupadas em
+lotes de até --batch-size registros ou --batch-window-ms milissegundos.
+"""
+import argparse
+import contextlib
+import functools
+
+import numpy as np
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+
+from instrumentation import METRICS, PATH_BATCH, PATH_INDIVIDUAL
+from micro_batcher import MicroBatcher
+from model_registry import MODEL_AND_FEATURES_PATH, ModelRegistry
+from prediction_cache import PredictionCache
+from scoring import (
+    CLASSIFICATION_THRESHOLD,
+    NO_MISSION,
+    REQUIRED_COLUMN_NAMES,
+    UNCLASSIFIED_MISSION,
+    predict_probabilities,
+)
+
+# Limite de registros por chamada ao endpoint de lote
+MAX_BATCH_RECORDS = 100_000
+
+# Micro-batching das chamadas individuais
+MICRO_BATCH_SIZE = 64
+MICRO_BATCH_WINDOW_MS = 2.0
+
+
+class RecordError(ValueError):
+    """Registro de entrada inválido (responde 422)."""
+
+
+def parse_record(payload):
+    """Valida um objeto JSON e o converte no registro de entrada do FeaturePlan.
+
+    Colunas ausentes ou nulas viram NaN, como as caixas desmarcadas da aba individual.
+    """
+    if not isinstance(payload, dict):
+        raise RecordError("cada registro deve ser um objeto JSON")
+
+    record = {}
+    for col in REQUIRED_COLUMN_NAMES:
+        value = payload.get(col)
+        if col == 'mission':
+            if value is None or value == NO_MISSION:
+                value = UNCLASSIFIED_MISSION
+            elif not isinstance(value, str):
+                raise RecordError(f"'{col}' deve ser texto")
+        elif value is None:
+            value = np.nan
+        elif isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise RecordError(f"'{col}' deve ser numérico ou null")
+        record[col] = value
+    return record
+
+
+def format_prediction(probability, model_version):
+    probability = float(probability)
+    is_exoplanet = probability > CLASSIFICATION_THRESHOLD
+    return {
+        'predicao': 'EXOPLANETA' if is_exoplanet else 'FALSO_POSITIVO',
+        'classe': int(is_exoplanet),
+        'probabilidade_exoplaneta': probability,
+        'versao_modelo': model_version,
+    }
+
+
+def create_app(model_path=MODEL_AND_FEATURES_PATH, registry=None, micro_batching=True,
+               max_batch_size=MICRO_BATCH_SIZE, max_wait_ms=MICRO_BATCH_WINDOW_MS, prediction_cache=True,
+               nthread=None):
+    """Cria a aplicação ASGI. O modelo vem do ModelRegistry (carregado uma vez, recarregado se o arquivo mudar)."""
+    registry = registry if registry is not None else ModelRegistry(nthread=nthread)
+    cache = PredictionCache() if prediction_cache else None
+
+    def score_records(records, path=PATH_BATCH):
+        """Classifica uma lista de registros já validados em uma única chamada ao modelo."""
+        loaded = registry.get(model_path)
+        version = loaded.content_hash[:12]
+        with METRICS.stage('preprocess', path, rows=len(records)):
+            X_processed = loaded.feature_plan.transform_records(records)
+        with METRICS.stage('predict', path, rows=len(records)):
+            probabilities = predict_probabilities(loaded.scorer, X_processed, cache, loaded.content_hash)
+        return [format_prediction(p, version) for p in probabilities]
+
+    # Os micro-lotes agrupam chamadas individuais: as etapas contam no caminho 'individual'
+    batcher = (
+        MicroBatcher(functools.partial(score_records, path=PATH_INDIVIDUAL), max_batch_size, max_wait_ms)
+        if micro_batching else None
+    )
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        if batcher is not None:
+            await batcher.start()
+        try:
+            yield
+        finally:
+            if batcher is not None:
+                await batcher.stop()
+
+    def no_model():
+        # Sem artefato o serviço está indisponível (503), não com defeito: mesma resposta do /health
+        return JSONResponse({'status': 'sem modelo', 'erro': f"modelo não encontrado em {model_path}"}, status_code=503)
+
+    async def health(request):
+        try:
+            loaded = registry.get(model_path)
+        except FileNotFoundError:
+            return no_model()
+        return JSONResponse({'status': 'ok', 'versao_modelo': loaded.content_hash[:12]})
+
+    async def predict(request):
+        try:
+            record = parse_record(await request.json())
+        except (RecordError, ValueError) as e:
+            return JSONResponse({'erro': str(e)}, status_code=422)
+
+        # Sem o lifespan (ex.: TestClient fora de um bloco `with`) o micro-batcher não roda
+        if batcher is not None and batcher.running:
+            try:
+                return JSONResponse(await batcher.submit(record))
+            except FileNotFoundError:
+                return no_model()
+
+        try:
+            loaded = registry.get(model_path)
+        except FileNotFoundError:
+            return no_model()
+        with METRICS.stage('preprocess', PATH_INDIVIDUAL, rows=1):
+            X_processed = loaded.feature_plan.transform_records([record])
+        with METRICS.stage('predict', PATH_INDIVIDUAL, rows=1):
+            probability = predict_probabilities(loaded.scorer, X_processed, cache, loaded.content_hash)[0]
+        return JSONResponse(format_prediction(probability, loaded.content_hash[:12]))
+
+    async def predict_batch(request):
+        try:
+            payload = await request.json()
+            if isinstance(payload, dict):
+                payload = payload.get('records')
+            if not isinstance(payload, list):
+                raise RecordError("envie uma lista de registros ou {\"records\": [...]}")
+            if len(payload) > MAX_BATCH_RECORDS:
+                raise RecordError(f"no máximo {MAX_BATCH_RECORDS} registros por chamada")
+            with METRICS.stage('parse', rows=len(payload)):
+                records = [parse_record(item) for item in payload]
+        except (RecordError, ValueError) as e:
+            return JSONResponse({'erro': str(e)}, status_code=422)
+
+        if not records:
+            return JSONResponse({'resultados': []})
+
+        # Lotes grandes rodam fora do event loop para não atrasar as chamadas individuais
+        try:
+            results = await run_in_threadpool(score_records, records)
+        except FileNotFoundError:
+            return no_model()
+        return JSONResponse({'resultados': results})
+
+    async def stats(request):
+        return JSONResponse({
+            'micro_batching': batcher.metrics() if batcher is not None else None,
+            'prediction_cache': cache.stats() if cache is not None else None,
+        })
+
+    async def metrics(request):
+        cache_stats = cache.stats() if cache is not None else {}
+        batcher_metrics = batcher.metrics() if batcher is not None else {}
+        body = METRICS.render_prometheus(gauges={
+            'prediction_cache_entries': ("Entradas no cache de previsões.", cache_stats.get('entries')),
+            'prediction_cache_hit_ratio': ("Taxa de acerto do cache de previsões.", cache_stats.get('hit_rate')),
+            'micro_batch_queue_depth': ("Chamadas aguardando o próximo micro-lote.", batcher_metrics.get('queue_depth')),
+            'micro_batch_mean_size': ("Registros por micro-lote (média).", batcher_metrics.get('mean_batch_size')),
+        })
+        return PlainTextResponse(body, media_type='text/plain; version=0.0.4')
+
+    return Starlette(
+        routes=[
+            Route('/health', health, methods=['GET']),
+            Route('/predict', predict, methods=['POST']),
+            Route('/predict/batch', predict_batch, methods=['POST']),
+            Route('/stats', stats, methods=['GET']),
+            Route('/metrics', metrics, methods=['GET']),
+        ],
+        lifespan=lifespan,
+    )
+
+
+app = create_app()
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serviço HTTP do classificador de exoplanetas.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--model', default=MODEL_AND_FEATURES_PATH,
+                        help="Pickle legado ou diretório do artefato nativo (padrão: %(default)s)")
+    parser.add_argument('--batch-size', type=int, default=MICRO_BATCH_SIZE,
+                        help="Máximo de registros por micro-lote (padrão: %(default)s)")
+    parser.add_argument('--batch-window-ms', type=float, default=MICRO_BATCH_WINDOW_MS,
+                        help="Espera máxima para completar um micro-lote (padrão: %(default)s ms)")
+    parser.add_argument('--no-micro-batching', action='store_true',
+                        help="Classifica cada chamada a /predict isoladamente")
+    parser.add_argument('--no-cache', action='store_true', help="Desliga o cache de previsões")
+    parser.add_argument('--nthread', type=int, help="Threads do XGBoost por previsão (padrão: todos os núcleos)")
+    args = parser.parse_args()
+    uvicorn.run(
+        create_app(
+            model_path=args.model,
+            micro_batching=not args.no_micro_batching,
+            max_batch_size=args.batch_size,
+            max_wait_ms=args.batch_window_ms,
+            prediction_cache=not args.no_cache,
+            nthread=args.nthread,
+        ),
+        host=args.host,
+        port=args.port,
+    )
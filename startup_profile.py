@@ -0,0 +1,236 @@
+"""Perfil de inicialização (cold start) do app, para acompanhar o tempo até a primeira página.
+
+Cada medida roda em um processo Python novo, como em um pod recém-criado:
+- imports: `python -X importtime` dos módulos importados pelo app.py, com os pacotes mais caros;
+- primeira página: execução completa do app.py pelo AppTest do Streamlit (sem navegador);
+- modelo: carregamento do artefato na primeira previsão (inclui importar o xgboost).
+
+Uso:
+    python startup_profile.py
+    python startup_profile.py --top 20 --output startup.json
+    python startup_profile.py --baseline startup_anterior.json --max-regression 0.2
+"""
+import argparse
+import ast
+import datetime
+import importlib.util
+import json
+import os
+import platform
+import subprocess
+import sys
+import sysconfig
+
+DEFAULT_OUTPUT = "startup_profile.json"
+
+# Pacotes pesados que devem ficar fora da inicialização (carregados só na primeira previsão)
+DEFERRED_PACKAGES = ['xgboost', 'sklearn', 'joblib']
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def is_stdlib_module(name):
+    """Se o pacote de topo `name` é da biblioteca padrão."""
+    top_level = name.split('.')[0]
+    names = getattr(sys, 'stdlib_module_names', None)
+    if names is not None:
+        return top_level in names
+    # Python 3.9 (sem sys.stdlib_module_names): embutido ou instalado no diretório da biblioteca padrão
+    spec = importlib.util.find_spec(top_level)
+    if spec is None:
+        return False
+    if spec.origin in (None, 'built-in', 'frozen'):
+        return spec.origin is not None
+    stdlib_dir = os.path.realpath(sysconfig.get_paths()['stdlib'])
+    origin = os.path.realpath(spec.origin)
+    return origin.startswith(stdlib_dir + os.sep) and 'site-packages' not in origin
+
+
+def app_modules(app_path=os.path.join(APP_DIR, 'app.py')):
+    """Módulos importados no topo de `app_path`, na ordem do arquivo (sem a biblioteca padrão).
+
+    Lidos da árvore sintática do próprio app.py: um import novo entra no perfil sem editar esta lista.
+    Imports dentro de funções ficam de fora, pois não são pagos na inicialização.
+    """
+    with open(app_path, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=app_path)
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            names = [node.module]
+        else:
+            continue
+        for name in names:
+            if not is_stdlib_module(name) and name not in modules:
+                modules.append(name)
+    return modules
+
+
+# Módulos importados no topo do app.py (a ordem segue a do arquivo)
+APP_MODULES = app_modules()
+
+_FIRST_PAGE_SCRIPT = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+at = AppTest.from_file({app_path!r}, default_timeout=120).run()
+seconds = time.perf_counter() - start
+print(json.dumps({{
+    'seconds': seconds,
+    'exceptions': [e.value for e in at.exception],
+    'deferred_loaded': [name for name in {deferred!r} if name in sys.modules],
+}}))
+"""
+
+_MODEL_LOAD_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from model_registry import ModelRegistry
+imported = time.perf_counter()
+loaded = ModelRegistry().get({model_path!r})
+print(json.dumps({{
+    'import_seconds': imported - start,
+    'load_seconds': time.perf_counter() - imported,
+    'artifact_seconds': loaded.load_seconds,
+}}))
+"""
+
+
+def _run_python(args, cwd=APP_DIR):
+    return subprocess.run([sys.executable, *args], cwd=cwd, capture_output=True, text=True, check=True)
+
+
+def parse_importtime(stderr):
+    """Linhas de `-X importtime` como dicts (módulo, próprio e acumulado em ms, profundidade)."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        entries.append({
+            'module': name.strip(),
+            'depth': (len(name) - len(name.lstrip()) - 1) // 2,
+            'self_ms': int(self_us) / 1000,
+            'cumulative_ms': int(cumulative_us) / 1000,
+        })
+    return entries
+
+
+def profile_imports(modules=APP_MODULES, top=15):
+    """Importa `modules` em um processo novo e resume o custo por módulo de topo e por pacote."""
+    result = _run_python(['-X', 'importtime', '-c', f"import {', '.join(modules)}"])
+    entries = parse_importtime(result.stderr)
+    loaded = {entry['module'] for entry in entries}
+    # Custo de cada import pedido diretamente, na ordem em que foi pago (sem a partida do interpretador)
+    top_level = [
+        {'module': entry['module'], 'cumulative_ms': entry['cumulative_ms']}
+        for entry in entries if entry['depth'] == 0 and entry['module'] in modules
+    ]
+    return {
+        'total_ms': sum(entry['cumulative_ms'] for entry in top_level),
+        'modules': len(entries),
+        'top_level': top_level,
+        'slowest': sorted(
+            ({'module': entry['module'], 'cumulative_ms': entry['cumulative_ms']} for entry in entries),
+            key=lambda entry: entry['cumulative_ms'], reverse=True,
+        )[:top],
+        'deferred_loaded': [name for name in DEFERRED_PACKAGES if name in loaded],
+    }
+
+
+def profile_first_page():
+    """Tempo da primeira execução completa do app.py (imports + layout), sem carregar o modelo."""
+    script = _FIRST_PAGE_SCRIPT.format(app_path=os.path.join(APP_DIR, 'app.py'), deferred=DEFERRED_PACKAGES)
+    return json.loads(_run_python(['-c', script]).stdout.strip().splitlines()[-1])
+
+
+def profile_model_load(model_path):
+    """Custo pago na primeira previsão: importar o registro e carregar o artefato."""
+    script = _MODEL_LOAD_SCRIPT.format(model_path=model_path)
+    return json.loads(_run_python(['-c', script]).stdout.strip().splitlines()[-1])
+
+
+def compare_with_baseline(report, baseline, max_regression):
+    """Medidas de tempo que pioraram mais que `max_regression` (fração) em relação à linha de base."""
+    checks = [
+        ('imports.total_ms', report['imports']['total_ms'], baseline.get('imports', {}).get('total_ms')),
+        ('first_page.seconds', (report.get('first_page') or {}).get('seconds'),
+         (baseline.get('first_page') or {}).get('seconds')),
+    ]
+    regressions = []
+    for name, current, previous in checks:
+        if current and previous and current > previous * (1 + max_regression):
+            regressions.append(f"{name}: {previous:.3f} -> {current:.3f} (+{current / previous - 1:.0%})")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Mede o tempo de inicialização do app (imports, primeira página e modelo).")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="Arquivo JSON de resultados (padrão: %(default)s)")
+    parser.add_argument('--top', type=int, default=15, help="Quantos módulos mais lentos listar (padrão: %(default)s)")
+    parser.add_argument('--model', default="data/model_and_features.pkl",
+                        help="Artefato usado na medida de carregamento do modelo (padrão: %(default)s)")
+    parser.add_argument('--no-app', action='store_true', help="Não executa o app.py pelo AppTest")
+    parser.add_argument('--baseline', help="JSON de uma execução anterior para comparação")
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help="Piora relativa tolerada em relação à linha de base (padrão: %(default)s)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    imports = profile_imports(top=args.top)
+    print(f"📦 Imports do app.py: {imports['total_ms']:.0f} ms ({imports['modules']} módulos)")
+    for entry in imports['top_level']:
+        print(f"  {entry['module']:<20} {entry['cumulative_ms']:>9.1f} ms")
+    print("  Mais lentos:")
+    for entry in imports['slowest']:
+        print(f"    {entry['module']:<40} {entry['cumulative_ms']:>9.1f} ms")
+    if imports['deferred_loaded']:
+        print(f"⚠️ Importados na inicialização (deveriam ser adiados): {', '.join(imports['deferred_loaded'])}")
+
+    first_page = None
+    if not args.no_app:
+        first_page = profile_first_page()
+        print(f"🖥️ Primeira página: {first_page['seconds']:.2f}s")
+        if first_page['exceptions']:
+            print(f"❌ Exceções no app.py: {first_page['exceptions']}")
+        if first_page['deferred_loaded']:
+            print(f"⚠️ Carregados antes da primeira previsão: {', '.join(first_page['deferred_loaded'])}")
+
+    model_load = None
+    if os.path.exists(os.path.join(APP_DIR, args.model)):
+        model_load = profile_model_load(args.model)
+        print(f"🪐 Primeira previsão: +{model_load['import_seconds'] + model_load['load_seconds']:.2f}s "
+              f"(artefato: {model_load['artifact_seconds']:.2f}s)")
+
+    report = {
+        'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'imports': imports,
+        'first_page': first_page,
+        'model_load': model_load,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResultados gravados em {args.output}")
+
+    exit_code = 0
+    if first_page is not None and first_page['exceptions']:
+        exit_code = 1
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare_with_baseline(report, json.load(f), args.max_regression)
+        for regression in regressions:
+            print(f"⚠️ Regressão: {regression}")
+        if regressions:
+            exit_code = 1
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,51 @@
+import os
+import sys
+
+import pytest
+
+# Os módulos do projeto ficam na raiz do repositório (sem pacote instalável)
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+UNIFIED_DATASET_FILE = os.path.join(REPO_DIR, "data", "exoplanet_unified_results.xlsx")
+EXAMPLE_SPREADSHEET_FILE = os.path.join(REPO_DIR, "example_exoplanet_spreadsheet.csv")
+
+
+@pytest.fixture(scope='session')
+def example_frame():
+    import pandas as pd
+
+    return pd.read_csv(EXAMPLE_SPREADSHEET_FILE)
+
+
+@pytest.fixture(scope='session')
+def unified_frame():
+    from dataset_cache import read_source
+
+    return read_source(UNIFIED_DATASET_FILE)
+
+
+@pytest.fixture(scope='session')
+def stand_in_model():
+    """(modelo, train_features) do modelo substituto do benchmark: o pickle real não está no repositório."""
+    from benchmark import train_stand_in_model
+
+    return train_stand_in_model()
+
+
+@pytest.fixture(scope='session')
+def stand_in_artifact(tmp_path_factory, stand_in_model):
+    """Pickle legado `(modelo, train_features)` do modelo substituto, como o gerado por train_model.py."""
+    import joblib
+
+    path = tmp_path_factory.mktemp('modelo') / 'model_and_features.pkl'
+    joblib.dump(stand_in_model, path)
+    return str(path)
+
+
+@pytest.fixture(scope='session')
+def stand_in_native_artifact(stand_in_artifact):
+    """Diretório do artefato nativo (UBJSON + manifest) convertido do pickle substituto."""
+    from model_artifact import convert_legacy_artifact
+
+    return os.path.dirname(convert_legacy_artifact(stand_in_artifact))
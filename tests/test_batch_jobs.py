@@ -0,0 +1,153 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import batch_jobs
+from batch_jobs import STATUS_DONE, JobRunner, JobStore
+from benchmark import generate_catalog
+from model_registry import ModelRegistry
+
+
+@pytest.fixture
+def runner(tmp_path):
+    # Criado antes de qualquer job: a thread do worker fica parada na fila vazia e os testes chamam _process
+    return JobRunner(JobStore(str(tmp_path / 'jobs')), ModelRegistry())
+
+
+def catalog_csv(df):
+    buffer = io.BytesIO()
+    df.to_csv(buffer, index=False)
+    buffer.seek(0)
+    return buffer
+
+
+def read_results(store, job_id):
+    output = io.BytesIO()
+    store.write_results(job_id, output, 'csv')
+    return pd.read_csv(io.BytesIO(output.getvalue()))
+
+
+def test_job_scores_every_chunk(runner, stand_in_artifact):
+    df = generate_catalog(2500, seed=11)
+    job_id = runner.store.create_job(catalog_csv(df), 'catalogo.csv', stand_in_artifact, chunk_size=1000)
+    runner._process(job_id)
+
+    job = runner.store.get_job(job_id)
+    assert job['status'] == STATUS_DONE
+    assert job['rows_done'] == job['total_rows'] == 2500
+    assert runner.store.checkpointed_chunks(job_id) == {0, 1, 2}
+    np.testing.assert_array_equal(read_results(runner.store, job_id)['Registro'], np.arange(1, 2501))
+
+
+def test_interrupted_job_resumes_from_checkpoint(runner, stand_in_artifact, monkeypatch):
+    df = generate_catalog(2500, seed=12)
+    job_id = runner.store.create_job(catalog_csv(df), 'catalogo.csv', stand_in_artifact, chunk_size=1000)
+
+    scored = []
+    score_dataframe = batch_jobs.score_dataframe
+
+    def recording_scorer(fail_at=None):
+        def score(chunk, **kwargs):
+            scored.append(chunk.index[0])
+            if len(scored) == fail_at:
+                raise RuntimeError("queda do processo")
+            return score_dataframe(chunk, **kwargs)
+        return score
+
+    monkeypatch.setattr(batch_jobs, 'score_dataframe', recording_scorer(fail_at=3))
+    with pytest.raises(RuntimeError):
+        runner._process(job_id)
+    assert runner.store.checkpointed_chunks(job_id) == {0, 1}
+    assert runner.store.get_job(job_id)['rows_done'] == 2000
+
+    # Reinício: só o bloco que faltava é classificado de novo
+    scored.clear()
+    monkeypatch.setattr(batch_jobs, 'score_dataframe', recording_scorer())
+    runner._process(job_id)
+    assert scored == [2000]
+
+    job = runner.store.get_job(job_id)
+    assert job['status'] == STATUS_DONE
+    assert job['rows_done'] == 2500
+    assert runner.store.resume_point(job_id) == (3, 2500)
+
+    loaded = runner.registry.get(stand_in_artifact)
+    expected = score_dataframe(df, loaded.scorer, loaded.train_features)
+    results = read_results(runner.store, job_id)
+    np.testing.assert_array_equal(results['Registro'], expected['Registro'])
+    np.testing.assert_allclose(results['Probabilidade_Numerica'], expected['Probabilidade_Numerica'], rtol=1e-6)
+
+
+@pytest.mark.parametrize('file_name', ['catalogo.csv', 'catalogo.parquet'])
+def test_resume_reads_from_saved_row_offset(runner, stand_in_artifact, monkeypatch, file_name):
+    df = generate_catalog(2500, seed=14)
+    upload = io.BytesIO()
+    if file_name.endswith('.csv'):
+        df.to_csv(upload, index=False)
+    else:
+        df.to_parquet(upload, index=False, row_group_size=500)
+    upload.seek(0)
+    job_id = runner.store.create_job(upload, file_name, stand_in_artifact, chunk_size=1000)
+
+    score_dataframe = batch_jobs.score_dataframe
+
+    def failing_scorer(chunk, **kwargs):
+        if chunk.index[0] >= 2000:
+            raise RuntimeError("queda do processo")
+        return score_dataframe(chunk, **kwargs)
+
+    monkeypatch.setattr(batch_jobs, 'score_dataframe', failing_scorer)
+    with pytest.raises(RuntimeError):
+        runner._process(job_id)
+    assert runner.store.resume_point(job_id) == (2, 2000)
+
+    # Na retomada, a leitura começa na linha 2000: os blocos já concluídos não são lidos de novo
+    starts, parsed = [], []
+    iter_upload_chunks = batch_jobs.iter_upload_chunks
+
+    def recording_iter(*args, start_row=0, **kwargs):
+        starts.append(start_row)
+        for chunk in iter_upload_chunks(*args, start_row=start_row, **kwargs):
+            parsed.append(chunk.index[0])
+            yield chunk
+
+    monkeypatch.setattr(batch_jobs, 'score_dataframe', score_dataframe)
+    monkeypatch.setattr(batch_jobs, 'iter_upload_chunks', recording_iter)
+    runner._process(job_id)
+    assert starts == [2000]
+    assert parsed == [2000]
+
+    assert runner.store.get_job(job_id)['rows_done'] == 2500
+    np.testing.assert_array_equal(read_results(runner.store, job_id)['Registro'], np.arange(1, 2501))
+
+
+def test_changed_model_discards_checkpoints(runner, stand_in_artifact):
+    df = generate_catalog(1500, seed=13)
+    job_id = runner.store.create_job(catalog_csv(df), 'catalogo.csv', stand_in_artifact, chunk_size=1000)
+    runner._process(job_id)
+    assert runner.store.checkpointed_chunks(job_id) == {0, 1}
+
+    # Checkpoints gravados por outra versão do modelo não são reaproveitados
+    runner.store.set_model_version(job_id, 'outra-versao')
+    runner.store.set_status(job_id, batch_jobs.STATUS_RUNNING)
+    runner._process(job_id)
+    assert runner.store.get_job(job_id)['rows_done'] == 1500
+    assert len(read_results(runner.store, job_id)) == 1500
+
+
+def test_job_quarantines_unreadable_rows(runner, stand_in_artifact):
+    df = generate_catalog(2500, seed=15)
+    df['koi_period'] = df['koi_period'].astype(object)
+    df.loc[[10, 1500], 'koi_period'] = 'abc'
+    job_id = runner.store.create_job(catalog_csv(df), 'catalogo.csv', stand_in_artifact, chunk_size=1000)
+    runner._process(job_id)
+
+    job = runner.store.get_job(job_id)
+    assert job['status'] == STATUS_DONE
+    assert job['quarantined'] == 2
+    assert job['rows_done'] == 2498
+    output = io.BytesIO()
+    runner.store.write_quarantine(job_id, output)
+    assert pd.read_csv(io.BytesIO(output.getvalue()))['koi_period'].tolist() == ['abc', 'abc']
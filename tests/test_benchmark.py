@@ -0,0 +1,23 @@
+import pandas as pd
+
+from benchmark import generate_catalog, read_catalog, run_size
+
+
+def test_read_catalog_matches_the_file(tmp_path):
+    df = generate_catalog(1200, seed=21)
+    path = tmp_path / 'catalogo.csv'
+    df.to_csv(path, index=False)
+    pd.testing.assert_frame_equal(read_catalog(str(path)), pd.read_csv(path), check_dtype=False)
+
+
+def test_run_size_reports_time_and_memory_per_stage(tmp_path, stand_in_model):
+    model, train_features = stand_in_model
+    entry = run_size(300, model, train_features, str(tmp_path))
+    assert entry['rows'] == 300
+    for stage in ('ingestion_csv', 'preprocess', 'predict', 'export_csv'):
+        values = entry['stages'][stage]
+        assert values['seconds'] > 0
+        assert values['peak_mb'] >= 0
+
+    entry = run_size(300, model, train_features, str(tmp_path), memory=False)
+    assert 'peak_mb' not in entry['stages']['predict']
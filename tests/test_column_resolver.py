@@ -0,0 +1,55 @@
+import io
+
+import pandas as pd
+import pytest
+
+from column_resolver import normalize_column_name, resolve_columns
+from ingestion import iter_upload_chunks, read_upload, resolve_upload_columns
+from scoring import REQUIRED_COLUMN_NAMES
+
+
+def test_canonical_header_resolves_in_place(example_frame):
+    resolution = resolve_columns(example_frame.columns)
+    assert resolution.target_columns == REQUIRED_COLUMN_NAMES
+    assert not resolution.missing and not resolution.extra and not resolution.renamed
+    assert not resolution.reordered
+
+
+@pytest.mark.parametrize('name, canonical', [
+    ('KOI Period', 'koi_period'),
+    ('koi-period', 'koi_period'),
+    ('pl_orbper', 'koi_period'),
+    ('Missão', 'mission'),
+    ('st_teff', 'koi_steff'),
+])
+def test_names_aliases_and_accents(name, canonical):
+    assert normalize_column_name(name) == normalize_column_name(name.upper())
+    assert resolve_columns([name]).target_columns == [canonical]
+
+
+def test_canonical_name_wins_over_alias():
+    resolution = resolve_columns(['pl_orbper', 'koi_period', 'extra'])
+    assert resolution.source_columns == ['koi_period']
+    assert resolution.duplicates == {'koi_period': ['pl_orbper']}
+    assert resolution.extra == ['extra']
+    assert 'koi_depth' in resolution.missing
+
+
+def test_renamed_and_reordered_upload_reads_like_the_original(example_frame):
+    renamed = example_frame.rename(columns={'koi_period': 'pl_orbper', 'mission': 'Missão'})
+    shuffled = renamed[list(reversed(renamed.columns))].assign(comentario='x')
+    buffer = io.BytesIO()
+    shuffled.to_csv(buffer, index=False)
+
+    buffer.seek(0)
+    resolution = resolve_upload_columns(buffer, 'catalogo.csv')
+    assert resolution.reordered
+    assert resolution.renamed == {'pl_orbper': 'koi_period', 'Missão': 'mission'}
+    assert resolution.extra == ['comentario']
+
+    buffer.seek(0)
+    pd.testing.assert_frame_equal(read_upload(buffer, 'catalogo.csv', resolution=resolution), example_frame)
+    buffer.seek(0)
+    chunks = list(iter_upload_chunks(buffer, 'catalogo.csv', chunk_size=2, resolution=resolution))
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    pd.testing.assert_frame_equal(pd.concat(chunks), example_frame)
@@ -0,0 +1,52 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from benchmark import generate_catalog
+from dataset_cache import DATASET_MANIFEST_FILE_NAME, open_dataset
+
+
+def write_workbook(path, df):
+    df.to_excel(path, index=False)
+    # mtime distinto mesmo quando a regravação cai no mesmo instante
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_open_dataset_matches_the_workbook(tmp_path):
+    source = str(tmp_path / 'catalogo.xlsx')
+    df = generate_catalog(200, seed=61)
+    write_workbook(source, df)
+
+    dataset = open_dataset(source, cache_dir=str(tmp_path / 'cache'))
+    assert len(dataset) == 200
+    # Cópia só para a comparação: as colunas do to_frame() são os próprios arrays mapeados
+    frame = dataset.to_frame().copy()
+    pd.testing.assert_frame_equal(
+        frame.assign(mission=frame['mission'].astype(object)), pd.read_excel(source), check_dtype=False
+    )
+    # Colunas numéricas mapeadas em memória, sem cópia
+    assert isinstance(dataset.column('koi_period'), np.memmap)
+
+
+def test_cache_is_rebuilt_when_the_source_changes(tmp_path):
+    source = str(tmp_path / 'catalogo.xlsx')
+    cache_dir = str(tmp_path / 'cache')
+    write_workbook(source, generate_catalog(100, seed=62))
+    first = open_dataset(source, cache_dir=cache_dir)
+
+    # Mesmo conteúdo: reaproveita o diretório já convertido
+    assert open_dataset(source, cache_dir=cache_dir).cache_path == first.cache_path
+
+    changed = generate_catalog(150, seed=63)
+    write_workbook(source, changed)
+    second = open_dataset(source, cache_dir=cache_dir)
+    assert second.cache_path != first.cache_path
+    assert second.source_hash != first.source_hash
+    assert len(second) == 150
+    np.testing.assert_allclose(np.asarray(second.column('koi_period')), changed['koi_period'].to_numpy())
+
+    # O cache da versão anterior é apagado
+    assert os.listdir(cache_dir) == [os.path.basename(second.cache_path)]
+    assert os.path.exists(os.path.join(second.cache_path, DATASET_MANIFEST_FILE_NAME))
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from benchmark import generate_catalog
+from explanations import (
+    ExplainingScorer,
+    explain_record,
+    feature_contributions,
+    feature_groups,
+    grouped_contributions,
+)
+from model_registry import ModelRegistry
+from scoring import normalize_missions, positive_probabilities, score_dataframe
+
+
+@pytest.fixture(params=['pickle', 'nativo'])
+def loaded(request, stand_in_artifact, stand_in_native_artifact):
+    return ModelRegistry().get(stand_in_artifact if request.param == 'pickle' else stand_in_native_artifact)
+
+
+@pytest.fixture(scope='module')
+def catalog():
+    return generate_catalog(2000, seed=41)
+
+
+def margin_to_probability(margin):
+    return 1.0 / (1.0 + np.exp(-margin.astype(np.float64)))
+
+
+def test_contributions_sum_to_the_model_margin(loaded, catalog):
+    X_processed = loaded.feature_plan.transform_frame(catalog)
+    contributions = feature_contributions(loaded.scorer, X_processed)
+    assert contributions.shape == (len(catalog), len(loaded.train_features) + 1)
+
+    # Contribuições + viés = margem (log-odds) do modelo
+    probabilities = positive_probabilities(loaded.scorer, X_processed)
+    np.testing.assert_allclose(margin_to_probability(contributions.sum(axis=1)), probabilities, atol=1e-5)
+
+    # Somar as mission_* em `mission` não muda o total
+    names, membership = feature_groups(loaded.train_features)
+    assert names.count('mission') == 1
+    grouped, bias = grouped_contributions(contributions, membership)
+    np.testing.assert_allclose(grouped.sum(axis=1) + bias, contributions.sum(axis=1), rtol=1e-4, atol=1e-4)
+
+
+def test_explaining_scorer_keeps_the_predictions(loaded, catalog):
+    results = ExplainingScorer(loaded, top=3, chunk_size=700).score(catalog)
+    expected = score_dataframe(catalog, loaded.scorer, loaded.train_features)
+    assert results[expected.columns].equals(expected)
+
+    names, _ = feature_groups(loaded.train_features)
+    for i in (1, 2, 3):
+        assert set(results[f'Fator_{i}'].cat.categories) == set(names)
+        assert results[f'Contribuicao_{i}'].dtype == np.float32
+    # Do maior efeito absoluto ao menor
+    assert (results['Contribuicao_1'].abs() >= results['Contribuicao_2'].abs()).all()
+    assert (results['Contribuicao_2'].abs() >= results['Contribuicao_3'].abs()).all()
+
+
+def test_explain_record_adds_up_to_the_margin(loaded, catalog):
+    record = catalog.assign(mission=normalize_missions(catalog)).iloc[0].to_dict()
+    names, _ = feature_groups(loaded.train_features)
+    factors, bias = explain_record(loaded, record, top=len(names))
+    assert len(factors) == len(names)
+
+    probability = positive_probabilities(loaded.scorer, loaded.feature_plan.transform_records([record]))[0]
+    margin = factors['Contribuição'].sum() + bias
+    assert margin_to_probability(np.array([margin]))[0] == pytest.approx(float(probability), abs=1e-5)
@@ -0,0 +1,102 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from benchmark import generate_catalog
+from ingestion import ResultsWriter, iter_upload_chunks, read_upload, spool_results
+from scoring import score_dataframe
+
+FORMATS = ['catalogo.csv', 'catalogo.parquet', 'catalogo.arrow', 'catalogo.xlsx']
+
+
+def write_catalog(df, file_name):
+    buffer = io.BytesIO()
+    if file_name.endswith('.csv'):
+        df.to_csv(buffer, index=False)
+    elif file_name.endswith('.parquet'):
+        # Row groups pequenos: a retomada pula grupos inteiros e fatia o primeiro
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), buffer, row_group_size=300)
+    elif file_name.endswith('.arrow'):
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        with pa.ipc.new_file(buffer, table.schema) as writer:
+            for batch in table.to_batches(max_chunksize=350):
+                writer.write_batch(batch)
+    else:
+        df.to_excel(buffer, index=False)
+    buffer.seek(0)
+    return buffer
+
+
+@pytest.fixture(scope='module')
+def catalog():
+    return generate_catalog(1000, seed=21)
+
+
+@pytest.mark.parametrize('file_name', FORMATS)
+def test_chunks_rebuild_the_file(catalog, file_name):
+    file = write_catalog(catalog, file_name)
+    full = read_upload(file, file_name)
+    file.seek(0)
+    chunks = list(iter_upload_chunks(file, file_name, chunk_size=400))
+    assert all(len(chunk) <= 400 for chunk in chunks)
+    pd.testing.assert_frame_equal(pd.concat(chunks), full, check_index_type=False)
+
+
+@pytest.mark.parametrize('file_name', FORMATS)
+@pytest.mark.parametrize('start_row', [0, 299, 300, 650, 999, 1000])
+def test_start_row_skips_the_beginning(catalog, file_name, start_row):
+    file = write_catalog(catalog, file_name)
+    full = read_upload(file, file_name)
+    file.seek(0)
+    chunks = [chunk for chunk in iter_upload_chunks(file, file_name, chunk_size=400, start_row=start_row) if len(chunk)]
+    resumed = pd.concat(chunks) if chunks else full.iloc[:0]
+    # Mesmas linhas e o mesmo índice (posição no arquivo) que a leitura completa; um bloco
+    # de uma linha do xlsx pode vir como object quando a linha tem células vazias
+    pd.testing.assert_frame_equal(resumed, full.iloc[start_row:], check_index_type=False, check_dtype=False)
+
+
+@pytest.mark.parametrize('start_row', [0, 1, 299, 300, 650])
+def test_csv_start_row_counts_records_not_lines(catalog, start_row):
+    # Campos entre aspas com quebra de linha: uma linha de dados ocupa várias linhas físicas
+    df = catalog.assign(notas=[f"linha 1\nlinha 2 do registro {i}" if i % 3 == 0 else "" for i in range(len(catalog))])
+    file = write_catalog(df, 'catalogo.csv')
+    full = read_upload(file, 'catalogo.csv')
+    file.seek(0)
+    resumed = pd.concat(iter_upload_chunks(file, 'catalogo.csv', chunk_size=400, start_row=start_row))
+    pd.testing.assert_frame_equal(resumed, full.iloc[start_row:], check_index_type=False, check_dtype=False)
+    assert resumed['koi_period'].iloc[0] == pytest.approx(catalog['koi_period'].iloc[start_row], nan_ok=True)
+
+
+def read_results(file, output_format):
+    if output_format == 'parquet':
+        return pd.read_parquet(file)
+    return pa.ipc.open_file(file).read_pandas()
+
+
+@pytest.fixture(scope='module')
+def results(catalog, stand_in_model):
+    model, train_features = stand_in_model
+    return score_dataframe(catalog, model, train_features)
+
+
+@pytest.mark.parametrize('output_format', ['parquet', 'arrow'])
+def test_results_round_trip_keeps_types(results, output_format):
+    output = io.BytesIO()
+    # Vários blocos no mesmo arquivo, como na classificação em streaming
+    with ResultsWriter(output, output_format) as writer:
+        for start in range(0, len(results), 400):
+            writer.write(results.iloc[start:start + 400])
+    output.seek(0)
+    spooled = spool_results(results, output_format)
+
+    for file in (output, spooled):
+        read = read_results(file, output_format)
+        assert len(read) == len(results)
+        assert isinstance(read['Predição'].dtype, pd.CategoricalDtype)
+        assert list(read['Predição'].cat.categories) == list(results['Predição'].cat.categories)
+        assert read['Probabilidade_Numerica'].dtype == np.float32
+        pd.testing.assert_frame_equal(read, results.reset_index(drop=True))
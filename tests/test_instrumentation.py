@@ -0,0 +1,26 @@
+from instrumentation import MetricsRegistry
+
+
+def test_timed_iter_records_one_observation_per_item():
+    registry = MetricsRegistry()
+    items = list(registry.timed_iter(iter([[1, 2, 3], [4, 5]]), 'parse'))
+    assert items == [[1, 2, 3], [4, 5]]
+
+    summary = registry.summary_frame().set_index('Etapa')
+    # O StopIteration do fim não vira uma execução com 0 linhas
+    assert summary.loc['parse', 'Execucoes'] == 2
+    assert summary.loc['parse', 'Linhas'] == 5
+
+
+def test_timed_iter_empty_iterable_records_nothing():
+    registry = MetricsRegistry()
+    assert list(registry.timed_iter(iter([]), 'parse')) == []
+    assert registry.summary_frame().empty
+
+
+def test_disabled_registry_records_nothing():
+    registry = MetricsRegistry(enabled=False)
+    assert list(registry.timed_iter(iter([[1]]), 'parse')) == [[1]]
+    with registry.stage('predict', rows=10):
+        pass
+    assert registry.summary_frame().empty
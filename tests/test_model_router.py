@@ -0,0 +1,109 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmark import generate_catalog
+from model_registry import ModelRegistry
+from model_router import DEFAULT_MODEL_NAME, ModelRouter, RoutingConfig, load_routing_config
+from scoring import NO_MISSION, UNCLASSIFIED_MISSION, score_dataframe
+
+MODELS = {'principal': '/modelos/a.pkl', 'kepler_v2': '/modelos/b', 'candidato': '/modelos/c'}
+
+
+@pytest.mark.parametrize('rules, expected', [
+    ({}, True),
+    ({'split': {'principal': 1.0}}, True),
+    ({'missions': {'Kepler': 'principal'}}, True),
+    # Todo o tráfego vai para outro modelo: não é o modelo padrão sozinho
+    ({'split': {'candidato': 1.0}}, False),
+    ({'missions': {'Kepler': 'kepler_v2'}}, False),
+    ({'split': {'principal': 0.9, 'kepler_v2': 0.1}}, False),
+    ({'shadow': ['candidato']}, False),
+])
+def test_is_single_model(rules, expected):
+    config = RoutingConfig(models=MODELS, default='principal', **rules)
+    assert config.is_single_model is expected
+
+
+def test_default_path():
+    assert RoutingConfig(models=MODELS, default='kepler_v2').default_path == '/modelos/b'
+    assert RoutingConfig.single('/modelos/x.pkl').default_path == '/modelos/x.pkl'
+
+
+@pytest.mark.parametrize('rules, message', [
+    ({'default': 'inexistente'}, "não declarados"),
+    ({'missions': {'Kepler': 'inexistente'}}, "não declarados"),
+    ({'split': {'principal': -1.0, 'kepler_v2': 2.0}}, "pesos não negativos"),
+    ({'split': {'principal': 0.0}}, "pesos não negativos"),
+    ({'shadow': ['principal']}, "não pode receber tráfego"),
+    ({'split': {'kepler_v2': 1.0}, 'shadow': ['kepler_v2']}, "não pode receber tráfego"),
+])
+def test_invalid_configs_are_rejected(rules, message):
+    rules = {'default': 'principal', **rules}
+    with pytest.raises(ValueError, match=message):
+        RoutingConfig(models=MODELS, **rules)
+
+
+def test_from_dict_resolves_paths_and_default(tmp_path):
+    config = RoutingConfig.from_dict(
+        {'models': {'a': 'modelos/a.pkl', 'b': '/abs/b'}, 'split': {'a': 3, 'b': 1}}, base_dir=str(tmp_path)
+    )
+    assert config.models == {'a': str(tmp_path / 'modelos' / 'a.pkl'), 'b': '/abs/b'}
+    assert config.default == 'a'
+    assert config.split == {'a': 3.0, 'b': 1.0}
+
+    with pytest.raises(ValueError, match="ao menos um modelo"):
+        RoutingConfig.from_dict({'models': {}})
+
+
+def test_missing_routing_file_falls_back_to_single_model(tmp_path):
+    config = load_routing_config(str(tmp_path / 'models.json'), fallback_model='/modelos/a.pkl')
+    assert config.is_single_model
+    assert config.models == {DEFAULT_MODEL_NAME: '/modelos/a.pkl'}
+
+    path = tmp_path / 'models.json'
+    path.write_text(json.dumps({'models': MODELS, 'missions': {'Kepler': 'kepler_v2'}}), encoding='utf-8')
+    assert load_routing_config(str(path)).missions == {'Kepler': 'kepler_v2'}
+
+
+def test_route_by_mission_normalizes_missing_missions():
+    config = RoutingConfig(models=MODELS, default='principal',
+                           missions={'Kepler': 'kepler_v2', UNCLASSIFIED_MISSION: 'candidato'})
+    router = ModelRouter(config, registry=None)
+    df = pd.DataFrame({'mission': ['Kepler', NO_MISSION, None, 'TOI']})
+    names = [router.model_names[code] for code in router.route(df)]
+    assert names == ['kepler_v2', 'candidato', 'candidato', 'principal']
+
+
+def test_split_is_deterministic_by_content():
+    config = RoutingConfig(models=MODELS, default='principal', split={'principal': 0.5, 'kepler_v2': 0.5})
+    router = ModelRouter(config, registry=None)
+    df = generate_catalog(4000, seed=2)
+
+    codes = router.route(df)
+    # Mesmo objeto, mesma rota, em qualquer posição ou lote
+    np.testing.assert_array_equal(router.route(df.iloc[::-1].reset_index(drop=True)), codes[::-1])
+    np.testing.assert_array_equal(router.route(df.iloc[100:200]), codes[100:200])
+    share = np.mean(codes == router.model_names.index('kepler_v2'))
+    assert 0.45 < share < 0.55
+
+
+def test_routed_scores_match_each_model(stand_in_artifact, stand_in_native_artifact):
+    config = RoutingConfig(
+        models={'principal': stand_in_artifact, 'nativo': stand_in_native_artifact},
+        default='principal', missions={'Kepler': 'nativo'},
+    )
+    registry = ModelRegistry()
+    router = ModelRouter(config, registry, chunk_size=700)
+    df = generate_catalog(2000, seed=5)
+
+    results = router.score(df)
+    loaded = registry.get(stand_in_artifact)
+    expected = score_dataframe(df, loaded.scorer, loaded.train_features)
+    np.testing.assert_allclose(results['Probabilidade_Numerica'], expected['Probabilidade_Numerica'], rtol=1e-6)
+    np.testing.assert_array_equal(
+        results['Modelo'].astype(str).to_numpy(),
+        np.where(df['mission'].to_numpy() == 'Kepler', 'nativo', 'principal'),
+    )
@@ -0,0 +1,46 @@
+import pandas as pd
+import pytest
+
+from benchmark import generate_catalog
+from model_registry import ModelRegistry
+from parallel_scoring import ParallelScorer
+from prediction_cache import PredictionCache
+from scoring import score_dataframe
+
+
+@pytest.fixture(scope='module')
+def parallel_scorer(stand_in_artifact):
+    with ParallelScorer(stand_in_artifact, 2) as scorer:
+        yield scorer
+
+
+@pytest.fixture(scope='module')
+def catalog():
+    return generate_catalog(20_000, seed=31)
+
+
+def serial_results(stand_in_artifact, df):
+    loaded = ModelRegistry().get(stand_in_artifact)
+    return score_dataframe(df, loaded.scorer, loaded.train_features)
+
+
+def test_parallel_matches_serial(parallel_scorer, stand_in_artifact, catalog):
+    progress = []
+    results = parallel_scorer.score(catalog, on_progress=lambda done, total: progress.append((done, total)))
+    assert results.equals(serial_results(stand_in_artifact, catalog))
+    assert progress[-1] == (len(catalog), len(catalog))
+
+
+def test_parallel_with_cache_matches_serial(parallel_scorer, stand_in_artifact, catalog):
+    cache = PredictionCache()
+    expected = serial_results(stand_in_artifact, catalog)
+
+    cold = parallel_scorer.score(catalog, cache=cache)
+    assert cold.equals(expected)
+    assert cache.stats()['entries'] == len(catalog)
+
+    # Segunda planilha com metade das linhas repetidas: só a metade nova vai aos workers
+    mixed = pd.concat([catalog.iloc[:10_000], generate_catalog(10_000, seed=32)], ignore_index=True)
+    assert parallel_scorer.score(mixed, cache=cache).equals(serial_results(stand_in_artifact, mixed))
+    assert cache.stats()['hits'] == 10_000
+    assert cache.stats()['misses'] == len(catalog) + 10_000
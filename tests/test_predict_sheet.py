@@ -0,0 +1,45 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmark import generate_catalog
+from predict_sheet import main, score_file
+from scoring import score_dataframe
+
+
+def test_cli_writes_typed_parquet(tmp_path, stand_in_artifact):
+    input_path = tmp_path / 'catalogo.csv'
+    generate_catalog(1_000, seed=81).to_csv(input_path, index=False)
+
+    argv = [str(input_path), '--format', 'parquet', '--model', stand_in_artifact, '--chunk-size', '300', '--no-progress']
+    assert main(argv) == 0
+
+    results = pd.read_parquet(tmp_path / 'catalogo_resultados.parquet')
+    assert len(results) == 1_000
+    assert isinstance(results['Predição'].dtype, pd.CategoricalDtype)
+    assert results['Probabilidade_Numerica'].dtype == np.float32
+    # Sem linhas inválidas, nenhum arquivo de quarentena nem temporário sobra no diretório
+    assert sorted(os.listdir(tmp_path)) == ['catalogo.csv', 'catalogo_resultados.parquet']
+
+
+@pytest.mark.parametrize('output_format', ['csv', 'parquet'])
+def test_failed_file_leaves_no_results(tmp_path, stand_in_model, output_format):
+    model, train_features = stand_in_model
+    input_path = tmp_path / 'catalogo.csv'
+    generate_catalog(1_000, seed=82).to_csv(input_path, index=False)
+    output_path = tmp_path / f'catalogo_resultados.{output_format}'
+
+    chunks = []
+
+    def failing_score_chunk(df):
+        # O segundo bloco falha depois de o primeiro já ter sido gravado
+        chunks.append(len(df))
+        if len(chunks) == 2:
+            raise RuntimeError("falha no meio do arquivo")
+        return score_dataframe(df, model, train_features)
+
+    with pytest.raises(RuntimeError):
+        score_file(str(input_path), str(output_path), failing_score_chunk, chunk_size=300, output_format=output_format)
+    assert sorted(os.listdir(tmp_path)) == ['catalogo.csv']
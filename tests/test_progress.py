@@ -0,0 +1,67 @@
+import pytest
+
+from progress import ProgressReporter, ProgressSnapshot, format_duration
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_snapshot_rate_fraction_and_eta():
+    snapshot = ProgressSnapshot(done=2_000, total=10_000, elapsed=4.0)
+    assert snapshot.rows_per_second == 500
+    assert snapshot.fraction == 0.2
+    assert snapshot.eta_seconds == 16.0
+    assert snapshot.describe() == "2.000 de 10.000 registros (20%) · 500 registros/s · restante ~0:16"
+
+    unknown_total = ProgressSnapshot(done=300, total=None, elapsed=1.0)
+    assert unknown_total.fraction is None and unknown_total.eta_seconds is None
+    assert unknown_total.describe() == "300 registros · 300 registros/s"
+
+
+def test_format_duration():
+    assert format_duration(0.2) == "0:01"
+    assert format_duration(75) == "1:15"
+    assert format_duration(3 * 3600 + 62) == "3:01:02"
+
+
+def test_renders_at_most_once_per_interval():
+    clock = FakeClock()
+    rendered = []
+    reporter = ProgressReporter(rendered.append, total=1_000, interval=1.0, clock=clock)
+
+    for done in range(100, 1_000, 100):
+        clock.now += 0.3
+        reporter(done)
+    # t = 0.3 (primeira), 1.5 e 2.7 s; as demais notificações são descartadas
+    assert [snapshot.done for snapshot in rendered] == [100, 500, 900]
+    assert rendered[-1].elapsed == pytest.approx(2.7)
+    assert rendered[-1].eta_seconds == pytest.approx(0.3)
+
+    # A última notificação (done == total) é sempre repassada
+    clock.now += 0.1
+    reporter(1_000)
+    assert rendered[-1].done == 1_000
+    assert reporter.finish().done == 1_000
+    assert len(rendered) == 4
+
+
+def test_every_rows_forces_a_render():
+    clock = FakeClock()
+    rendered = []
+    reporter = ProgressReporter(rendered.append, interval=60.0, every_rows=250, clock=clock)
+
+    for done in range(100, 1_100, 100):
+        clock.now += 0.01
+        reporter(done)
+    assert [snapshot.done for snapshot in rendered] == [100, 400, 700, 1_000]
+
+    # Sem total conhecido, finish repassa o estado final descartado
+    reporter(1_050)
+    assert rendered[-1].done == 1_000
+    assert reporter.finish().done == 1_050
+    assert rendered[-1].done == 1_050
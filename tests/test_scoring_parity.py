@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmark import generate_catalog
+from model_registry import ModelRegistry
+from scoring import (
+    CLASSIFICATION_THRESHOLD,
+    NO_MISSION,
+    PREDICTION_LABELS,
+    UNCLASSIFIED_MISSION,
+    prepare_data_for_model,
+    score_dataframe,
+)
+
+
+def baseline_probabilities(model, train_features, df):
+    """O caminho original: um DataFrame por linha (prepare_data_for_model) e predict_proba do XGBClassifier."""
+    probabilities = []
+    for row_data in df.to_dict('records'):
+        if row_data.get('mission') == NO_MISSION or pd.isna(row_data.get('mission')):
+            row_data['mission'] = UNCLASSIFIED_MISSION
+        X = prepare_data_for_model(row_data, train_features)
+        probabilities.append(model.predict_proba(X)[0, 1])
+    return np.array(probabilities, dtype=np.float32)
+
+
+@pytest.fixture(params=['pickle', 'nativo'])
+def artifact_path(request, stand_in_artifact, stand_in_native_artifact):
+    return stand_in_artifact if request.param == 'pickle' else stand_in_native_artifact
+
+
+@pytest.mark.parametrize('source', ['exemplo', 'sintetico'])
+def test_score_dataframe_matches_baseline(source, artifact_path, stand_in_model, example_frame):
+    model, train_features = stand_in_model
+    df = example_frame if source == 'exemplo' else generate_catalog(300, seed=7)
+
+    loaded = ModelRegistry().get(artifact_path)
+    assert loaded.train_features == list(train_features)
+    results = score_dataframe(df, loaded.scorer, loaded.train_features)
+
+    expected = baseline_probabilities(model, train_features, df)
+    np.testing.assert_allclose(results['Probabilidade_Numerica'].to_numpy(), expected, rtol=1e-6, atol=1e-7)
+    np.testing.assert_array_equal(results['Registro'].to_numpy(), np.arange(1, len(df) + 1))
+    expected_labels = np.where(expected > CLASSIFICATION_THRESHOLD, PREDICTION_LABELS[1], PREDICTION_LABELS[0])
+    np.testing.assert_array_equal(results['Predição'].astype(str).to_numpy(), expected_labels)
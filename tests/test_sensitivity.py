@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from benchmark import generate_catalog
+from model_registry import ModelRegistry
+from scoring import normalize_missions, positive_probabilities
+from sensitivity import MAX_SWEEP_POINTS, build_sweep_matrix, default_sweep_range, sweep, sweep_frame
+
+
+@pytest.fixture(params=['pickle', 'nativo'])
+def loaded(request, stand_in_artifact, stand_in_native_artifact):
+    return ModelRegistry().get(stand_in_artifact if request.param == 'pickle' else stand_in_native_artifact)
+
+
+@pytest.fixture(scope='module')
+def record():
+    catalog = generate_catalog(5, seed=51)
+    return catalog.assign(mission=normalize_missions(catalog)).iloc[1].to_dict()
+
+
+def score_record(loaded, record):
+    return positive_probabilities(loaded.scorer, loaded.feature_plan.transform_records([record]))[0]
+
+
+def test_each_grid_point_equals_scoring_that_record(loaded, record):
+    periods = np.linspace(1.0, 400.0, 7, dtype=np.float32)
+    depths = np.linspace(50.0, 20_000.0, 5, dtype=np.float32)
+    axes = [('koi_period', periods), ('koi_depth', depths)]
+
+    probabilities = sweep(loaded, record, axes)
+    assert probabilities.shape == (7, 5)
+    for i, period in enumerate(periods.tolist()):
+        for j, depth in enumerate(depths.tolist()):
+            expected = score_record(loaded, {**record, 'koi_period': period, 'koi_depth': depth})
+            assert probabilities[i, j] == expected
+
+    frame = sweep_frame(axes, probabilities)
+    assert len(frame) == 35
+    assert frame.iloc[5]['koi_period'] == periods[1] and frame.iloc[5]['koi_depth'] == depths[0]
+
+
+def test_one_axis_sweep(loaded, record):
+    values = np.linspace(*default_sweep_range('koi_impact', record['koi_impact']), 11, dtype=np.float32)
+    probabilities = sweep(loaded, record, [('koi_impact', values)])
+    expected = [score_record(loaded, {**record, 'koi_impact': value}) for value in values.tolist()]
+    np.testing.assert_array_equal(probabilities, expected)
+
+
+def test_default_range_respects_the_allowed_range():
+    # Valor ± max(|valor|, 1), sem sair da faixa permitida (koi_impact e koi_period >= 0)
+    assert default_sweep_range('koi_period', 100.0) == (0.0, 200.0)
+    assert default_sweep_range('koi_impact', 0.3) == pytest.approx((0.0, 1.3))
+    assert default_sweep_range('koi_period', None) == (0.0, 1.0)
+
+
+def test_invalid_grids_are_rejected(loaded, record):
+    with pytest.raises(ValueError):
+        build_sweep_matrix(loaded.feature_plan, record, [('nao_existe', [1.0, 2.0])])
+    side = int(np.sqrt(MAX_SWEEP_POINTS)) + 1
+    with pytest.raises(ValueError):
+        build_sweep_matrix(loaded.feature_plan, record, [('koi_period', np.ones(side)), ('koi_depth', np.ones(side))])
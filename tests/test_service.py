@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+from starlette.testclient import TestClient
+
+from model_registry import ModelRegistry
+from scoring import score_dataframe
+from service import create_app
+
+
+@pytest.fixture(params=[True, False], ids=['micro-batching', 'direto'])
+def client(request, stand_in_artifact):
+    app = create_app(stand_in_artifact, registry=ModelRegistry(), micro_batching=request.param)
+    # O bloco `with` roda o lifespan (liga o micro-batcher)
+    with TestClient(app) as client:
+        yield client
+
+
+def expected_probabilities(stand_in_artifact, df):
+    loaded = ModelRegistry().get(stand_in_artifact)
+    return score_dataframe(df, loaded.scorer, loaded.train_features)['Probabilidade_Numerica'].to_numpy()
+
+
+def test_predict_matches_batch_scoring(client, stand_in_artifact, example_frame):
+    expected = expected_probabilities(stand_in_artifact, example_frame)
+    for record, probability in zip(example_frame.to_dict('records'), expected):
+        response = client.post('/predict', json=record)
+        assert response.status_code == 200
+        body = response.json()
+        assert body['probabilidade_exoplaneta'] == pytest.approx(float(probability), rel=1e-6)
+        assert body['classe'] == int(probability > 0.5)
+        assert body['predicao'] == ('EXOPLANETA' if probability > 0.5 else 'FALSO_POSITIVO')
+
+
+def test_predict_accepts_null_and_missing_columns(client):
+    response = client.post('/predict', json={'koi_period': None, 'mission': 'NO-MISSION'})
+    assert response.status_code == 200
+    assert 0.0 <= response.json()['probabilidade_exoplaneta'] <= 1.0
+
+
+@pytest.mark.parametrize('payload', [
+    {'koi_period': 'abc'},
+    {'koi_period': True},
+    {'mission': 3},
+    [1, 2],
+])
+def test_predict_rejects_invalid_records(client, payload):
+    response = client.post('/predict', json=payload)
+    assert response.status_code == 422
+    assert 'erro' in response.json()
+
+
+def test_predict_batch(client, stand_in_artifact, example_frame):
+    records = example_frame.to_dict('records')
+    expected = expected_probabilities(stand_in_artifact, example_frame)
+
+    for payload in (records, {'records': records}):
+        response = client.post('/predict/batch', json=payload)
+        assert response.status_code == 200
+        probabilities = [item['probabilidade_exoplaneta'] for item in response.json()['resultados']]
+        np.testing.assert_allclose(probabilities, expected, rtol=1e-6)
+
+    assert client.post('/predict/batch', json=[]).json() == {'resultados': []}
+    assert client.post('/predict/batch', json={'registros': records}).status_code == 422
+
+
+def test_health_stats_and_metrics(client, example_frame):
+    client.post('/predict/batch', json=example_frame.to_dict('records'))
+
+    health = client.get('/health')
+    assert health.status_code == 200
+    assert health.json()['status'] == 'ok'
+
+    stats = client.get('/stats').json()
+    assert stats['prediction_cache']['entries'] == len(example_frame)
+
+    metrics = client.get('/metrics')
+    assert metrics.headers['content-type'].startswith('text/plain')
+    assert 'prediction_cache_entries' in metrics.text
+
+
+@pytest.mark.parametrize('micro_batching', [True, False], ids=['micro-batching', 'direto'])
+def test_missing_model_returns_503(tmp_path, example_frame, micro_batching):
+    model_path = str(tmp_path / 'sem_modelo.pkl')
+    app = create_app(model_path, registry=ModelRegistry(), micro_batching=micro_batching)
+    expected = {'status': 'sem modelo', 'erro': f"modelo não encontrado em {model_path}"}
+    record = example_frame.iloc[0].to_dict()
+
+    with TestClient(app) as client:
+        for response in (
+            client.get('/health'),
+            client.post('/predict', json=record),
+            client.post('/predict/batch', json=[record]),
+        ):
+            assert response.status_code == 503
+            assert response.json() == expected
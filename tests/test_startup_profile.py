@@ -0,0 +1,20 @@
+import sys
+
+from startup_profile import APP_MODULES, app_modules
+
+
+def test_app_modules_follow_app_imports():
+    assert {'explanations', 'sensitivity', 'instrumentation'} <= set(APP_MODULES)
+    assert 'os' not in APP_MODULES
+
+
+def test_app_modules_skip_imports_inside_functions(tmp_path):
+    app = tmp_path / 'app.py'
+    app.write_text("import os\nimport pandas as pd\nfrom scoring import x\n\ndef f():\n    import xgboost\n")
+    assert app_modules(str(app)) == ['pandas', 'scoring']
+
+
+def test_app_modules_without_stdlib_module_names(monkeypatch):
+    # Python 3.9 não tem sys.stdlib_module_names
+    monkeypatch.delattr(sys, 'stdlib_module_names', raising=False)
+    assert app_modules() == APP_MODULES
@@ -0,0 +1,67 @@
+import os
+
+import numpy as np
+import pytest
+
+from benchmark import generate_catalog
+from model_artifact import MANIFEST_FILE_NAME, converted_artifact_dir
+from scoring import REQUIRED_COLUMN_NAMES
+from train_model import LABEL_COLUMN, compare_on_holdout, load_training_frame, main
+
+# Modelo fraco: um único toco, que não separa as duas condições do rótulo
+WEAK_OPTIONS = ['--n-estimators', '1', '--max-depth', '1']
+
+
+@pytest.fixture(scope='module')
+def training_csv(tmp_path_factory):
+    """Planilha de treino sintética: rótulo das flags e do SNR, com 10% de ruído para a AUC não saturar."""
+    df = generate_catalog(3_000, seed=71)
+    rng = np.random.default_rng(71)
+    flags = df[[col for col in REQUIRED_COLUMN_NAMES if 'fpflag' in col]].sum(axis=1)
+    label = ((flags == 0) & (df['koi_model_snr'].fillna(0) > 20)).to_numpy()
+    df[LABEL_COLUMN] = (label ^ (rng.random(len(df)) < 0.1)).astype(int)
+    path = tmp_path_factory.mktemp('treino') / 'catalogo.csv'
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def run_training(training_csv, output, current, *options):
+    return main(['--data', training_csv, '--output', str(output), '--current', str(current),
+                 '--no-cache', '--nthread', '2', *options])
+
+
+def test_first_model_is_installed_without_promote(tmp_path, training_csv):
+    current = tmp_path / 'model_and_features.pkl'
+    assert run_training(training_csv, tmp_path / 'novo.pkl', current) == 0
+    assert current.exists()
+
+
+def test_worse_candidate_is_not_promoted(tmp_path, training_csv):
+    current = tmp_path / 'model_and_features.pkl'
+    assert run_training(training_csv, tmp_path / 'bom.pkl', current) == 0
+    installed = current.read_bytes()
+
+    weak = tmp_path / 'fraco.pkl'
+    assert run_training(training_csv, weak, current, '--promote', *WEAK_OPTIONS) == 1
+    # O candidato é gravado, mas o modelo em produção fica intacto
+    assert weak.exists()
+    assert current.read_bytes() == installed
+
+    df, _ = load_training_frame(training_csv, dataset_cache_dir=None)
+    candidate, production = compare_on_holdout(df, str(weak), str(current))
+    assert candidate['auc'] < production['auc']
+
+
+def test_better_candidate_is_promoted(tmp_path, training_csv):
+    current = tmp_path / 'model_and_features.pkl'
+    assert run_training(training_csv, tmp_path / 'fraco.pkl', current, *WEAK_OPTIONS) == 0
+    installed = current.read_bytes()
+
+    # Sem --promote o atual é mantido, mesmo com AUC maior
+    assert run_training(training_csv, tmp_path / 'bom.pkl', current) == 0
+    assert current.read_bytes() == installed
+
+    assert run_training(training_csv, tmp_path / 'bom.pkl', current, '--promote') == 0
+    assert current.read_bytes() != installed
+    # O artefato nativo servido pelo app é regenerado ao lado do pickle
+    assert os.path.exists(os.path.join(converted_artifact_dir(str(current)), MANIFEST_FILE_NAME))
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+from scoring import REQUIRED_COLUMN_NAMES, compile_feature_plan
+from validation import (
+    ERROR_NOT_FINITE,
+    ERROR_NOT_NUMERIC,
+    WARNING_NOT_BINARY,
+    WARNING_UNKNOWN_MISSION,
+    QuarantiningScorer,
+    split_valid_rows,
+    validate_frame,
+)
+
+
+def test_unified_workbook_has_no_invalid_rows(unified_frame):
+    report = validate_frame(unified_frame)
+    assert report.n_invalid == 0
+    # ra/dec em outra escala e uma flag 465 existem na planilha: só avisos
+    assert report.warnings
+
+
+def test_example_spreadsheet_has_no_invalid_rows(example_frame):
+    report = validate_frame(example_frame)
+    assert report.n_invalid == 0
+    assert not report.warnings
+
+
+def test_type_errors_are_quarantined(example_frame):
+    df = pd.concat([example_frame] * 2, ignore_index=True)
+    df['koi_period'] = df['koi_period'].astype(object)
+    df.loc[0, 'koi_period'] = 'abc'
+    df.loc[1, 'koi_depth'] = np.inf
+
+    report = validate_frame(df)
+    assert report.n_invalid == 2
+    assert report.counts[('koi_period', ERROR_NOT_NUMERIC)] == 1
+    assert report.counts[('koi_depth', ERROR_NOT_FINITE)] == 1
+
+    valid, quarantined = split_valid_rows(df, report)
+    assert len(valid) == len(df) - 2
+    assert list(quarantined['Registro']) == [1, 2]
+
+
+def test_unknown_missions_are_scored_with_a_warning(example_frame):
+    df = example_frame.copy()
+    df.loc[0, 'mission'] = 'TESS'
+    df.loc[1, 'mission'] = 'kepler'
+
+    scored = []
+    scorer = QuarantiningScorer(lambda chunk: scored.append(len(chunk)) or chunk)
+    scorer(df)
+    assert scorer.n_invalid == 0
+    assert scored == [len(df)]
+    assert scorer.warnings[('mission', WARNING_UNKNOWN_MISSION)] == 2
+
+
+def test_unknown_missions_have_no_mission_feature(stand_in_model, example_frame):
+    _, train_features = stand_in_model
+    df = example_frame.head(2).assign(mission=['TESS', 'kepler'])
+    X = compile_feature_plan(train_features).transform_frame(df)
+    mission_columns = [j for j, feature in enumerate(train_features) if feature.startswith('mission_')]
+    assert not X[:, mission_columns].any()
+
+
+def test_out_of_range_values_are_scored_with_a_warning(example_frame):
+    df = example_frame.copy()
+    df.loc[0, 'koi_fpflag_nt'] = 465
+    df.loc[1, 'ra'] = 3.5e9
+
+    scored = []
+    scorer = QuarantiningScorer(lambda chunk: scored.append(len(chunk)) or chunk)
+    scorer(df)
+    assert scorer.n_invalid == 0
+    assert scored == [len(df)]
+    assert scorer.warnings[('koi_fpflag_nt', WARNING_NOT_BINARY)] == 1
+    assert set(scorer.warning_summary()['Coluna']) == {'koi_fpflag_nt', 'ra'}
+
+
+def test_missing_values_are_valid():
+    df = pd.DataFrame({col: [np.nan] for col in REQUIRED_COLUMN_NAMES})
+    assert validate_frame(df).n_invalid == 0
@@ -0,0 +1,330 @@
+"""Treinamento do modelo a partir da planilha unificada (data/exoplanet_unified_results.xlsx).
+
+Gera um artefato novo, o pickle `(modelo, train_features)` em data/models/<hash>.pkl e a sua
+conversão nativa (UBJSON + manifest) em data/models/<hash>/, sem tocar no modelo servido pelo app.py
+(data/model_and_features.pkl). O novo modelo é comparado com o atual no mesmo holdout, e só
+`--promote` o copia para data/model_and_features.pkl, e apenas se a AUC não piorar (sem modelo
+em produção, o novo é instalado direto).
+O pré-processamento é o mesmo da previsão (FeaturePlan, equivalente a prepare_data_for_model), e o
+XGBoost treina com o método de histograma em todos os núcleos, apenas em CPU e sem acesso à rede.
+
+Entre execuções ficam em cache, pelo hash da planilha:
+- a planilha já lida, em colunas .npy mapeadas em memória (data/dataset_cache/, ver dataset_cache.py);
+- as DMatrix de treino e validação, no formato binário do XGBoost (data/training_cache/).
+
+Uso:
+    python train_model.py
+    python train_model.py --n-estimators 500 --learning-rate 0.05 --promote
+    python train_model.py --data outra_planilha.xlsx --output modelos/novo.pkl --no-cache
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from dataset_cache import DATASET_CACHE_DIR, open_dataset, read_source, source_hash
+from model_artifact import convert_legacy_artifact
+from model_registry import MODEL_AND_FEATURES_PATH, ModelRegistry
+from scoring import (
+    CLASSIFICATION_THRESHOLD,
+    KNOWN_MISSIONS,
+    REQUIRED_COLUMN_NAMES,
+    UNCLASSIFIED_MISSION,
+    compile_feature_plan,
+    positive_probabilities,
+)
+
+# --- CONFIGURAÇÕES GLOBAIS ---
+TRAINING_DATA_PATH = "data/exoplanet_unified_results.xlsx"
+TRAINING_CACHE_DIR = "data/training_cache"
+# Modelos treinados, um arquivo por execução (o servido continua em MODEL_AND_FEATURES_PATH)
+TRAINED_MODELS_DIR = "data/models"
+LABEL_COLUMN = "label"
+
+# Versão do formato do cache: mudar invalida os caches gravados por versões anteriores
+TRAINING_CACHE_VERSION = 1
+
+# Hiperparâmetros padrão (sobrescritos pela linha de comando)
+DEFAULT_PARAMS = {
+    'n_estimators': 400,
+    'max_depth': 6,
+    'learning_rate': 0.1,
+    'subsample': 0.8,
+    'colsample_bytree': 0.8,
+    'min_child_weight': 1.0,
+}
+EARLY_STOPPING_ROUNDS = 30
+VALIDATION_FRACTION = 0.2
+RANDOM_SEED = 42
+
+
+def training_features():
+    """train_features na ordem do pré-processamento original: numéricos/flags e o one-hot de pd.get_dummies."""
+    numeric = [col for col in REQUIRED_COLUMN_NAMES if col != 'mission']
+    # pd.get_dummies ordena as categorias
+    missions = sorted({*KNOWN_MISSIONS, UNCLASSIFIED_MISSION})
+    return numeric + [f"mission_{mission}" for mission in missions]
+
+
+# --- DADOS ---
+
+def _cache_key(*parts):
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+def load_training_frame(data_path=TRAINING_DATA_PATH, dataset_cache_dir=DATASET_CACHE_DIR):
+    """Planilha de treino (colunas de REQUIRED_COLUMNS + rótulo) e o hash do arquivo de origem.
+
+    Com `dataset_cache_dir`, a planilha é lida pelo cache colunar (convertida só na primeira vez).
+    """
+    columns = REQUIRED_COLUMN_NAMES + [LABEL_COLUMN]
+    if dataset_cache_dir is None:
+        df, data_hash = read_source(data_path), source_hash(data_path)
+        available = df.columns
+    else:
+        dataset = open_dataset(data_path, dataset_cache_dir)
+        data_hash, available = dataset.source_hash, dataset.columns
+
+    missing = [col for col in columns if col not in available]
+    if missing:
+        raise ValueError(f"Colunas ausentes na planilha de treino: {', '.join(missing)}")
+    # Colunas derivadas de um modelo anterior (prediction_bin, probability_exoplanet...) ficam de fora
+    if dataset_cache_dir is None:
+        return df[columns], data_hash
+    return dataset.to_frame(columns), data_hash
+
+
+def split_train_validation(labels, fraction=VALIDATION_FRACTION, seed=RANDOM_SEED):
+    """Índices de treino e validação, estratificados pelo rótulo e determinísticos para a mesma semente."""
+    rng = np.random.default_rng(seed)
+    train, validation = [], []
+    for label in np.unique(labels):
+        rows = rng.permutation(np.flatnonzero(labels == label))
+        n_validation = int(round(len(rows) * fraction))
+        validation.append(rows[:n_validation])
+        train.append(rows[n_validation:])
+    return np.sort(np.concatenate(train)), np.sort(np.concatenate(validation))
+
+
+def build_matrices(df, train_features, data_hash, cache_dir=TRAINING_CACHE_DIR,
+                   validation_fraction=VALIDATION_FRACTION, seed=RANDOM_SEED, nthread=-1):
+    """DMatrix de treino e validação, lidas do cache binário quando a planilha e o split não mudaram."""
+    import xgboost as xgb
+
+    paths = None
+    if cache_dir is not None:
+        key = _cache_key(TRAINING_CACHE_VERSION, data_hash, train_features, validation_fraction, seed)
+        paths = [os.path.join(cache_dir, f"{name}-{key}.dmatrix") for name in ('treino', 'validacao')]
+        if all(os.path.exists(path) for path in paths):
+            return tuple(xgb.DMatrix(path, nthread=nthread) for path in paths)
+
+    # Mesma matriz float32 usada na previsão (imputação, flags e one-hot da missão)
+    X = compile_feature_plan(train_features).transform_frame(df)
+    y = df[LABEL_COLUMN].to_numpy(dtype=np.float32)
+    train_rows, validation_rows = split_train_validation(y, validation_fraction, seed)
+
+    matrices = tuple(
+        xgb.DMatrix(X[rows], label=y[rows], feature_names=list(train_features), nthread=nthread)
+        for rows in (train_rows, validation_rows)
+    )
+    if paths is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        for matrix, path in zip(matrices, paths):
+            matrix.save_binary(f"{path}.tmp")
+            os.replace(f"{path}.tmp", path)
+    return matrices
+
+
+# --- TREINAMENTO ---
+
+def train(dtrain, dvalidation, params=DEFAULT_PARAMS, early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+          seed=RANDOM_SEED, nthread=None):
+    """Treina com tree_method='hist' em todos os núcleos (ou `nthread`). Retorna o XGBClassifier e as métricas."""
+    import xgboost as xgb
+
+    booster_params = {
+        'objective': 'binary:logistic',
+        'eval_metric': ['logloss', 'auc'],
+        # Histograma em CPU (padrão do hist quando nenhum `device` é pedido)
+        'tree_method': 'hist',
+        'nthread': nthread or os.cpu_count(),
+        'seed': seed,
+        'max_depth': params['max_depth'],
+        'eta': params['learning_rate'],
+        'subsample': params['subsample'],
+        'colsample_bytree': params['colsample_bytree'],
+        'min_child_weight': params['min_child_weight'],
+    }
+    booster = xgb.train(
+        booster_params, dtrain,
+        num_boost_round=params['n_estimators'],
+        evals=[(dvalidation, 'validacao')],
+        early_stopping_rounds=early_stopping_rounds,
+        verbose_eval=False,
+    )
+
+    # Mesmo tipo do pickle original: XGBClassifier (o app e o artefato nativo aceitam o wrapper)
+    model = xgb.XGBClassifier()
+    model.load_model(booster.save_raw('ubj'))
+
+    probabilities = booster.predict(dvalidation, iteration_range=(0, booster.best_iteration + 1))
+    labels = dvalidation.get_label()
+    metrics = {
+        'best_iteration': booster.best_iteration,
+        'auc': float(booster.attr('best_score')),
+        'accuracy': float(np.mean((probabilities > CLASSIFICATION_THRESHOLD) == (labels == 1))),
+        'validation_rows': int(dvalidation.num_row()),
+        'train_rows': int(dtrain.num_row()),
+    }
+    return model, metrics
+
+
+def holdout_metrics(loaded, holdout):
+    """AUC e acurácia de um modelo carregado (ModelRegistry) nas linhas de holdout, com o seu próprio pré-processamento."""
+    from sklearn.metrics import roc_auc_score
+
+    probabilities = positive_probabilities(loaded.scorer, loaded.feature_plan.transform_frame(holdout))
+    labels = holdout[LABEL_COLUMN].to_numpy() == 1
+    return {
+        'auc': float(roc_auc_score(labels, probabilities)),
+        'accuracy': float(np.mean((probabilities > CLASSIFICATION_THRESHOLD) == labels)),
+    }
+
+
+def compare_on_holdout(df, candidate_path, current_path, validation_fraction=VALIDATION_FRACTION,
+                       seed=RANDOM_SEED, registry=None):
+    """Métricas do modelo novo e do atual (None se não existir) nas mesmas linhas de validação do treino."""
+    registry = registry or ModelRegistry()
+    labels = df[LABEL_COLUMN].to_numpy(dtype=np.float32)
+    _, validation_rows = split_train_validation(labels, validation_fraction, seed)
+    holdout = df.iloc[validation_rows]
+
+    current = None
+    if os.path.exists(current_path):
+        current = holdout_metrics(registry.get(current_path), holdout)
+    return holdout_metrics(registry.get(candidate_path), holdout), current
+
+
+def default_output_path(data_hash, train_features, params, validation_fraction, seed, early_stopping_rounds):
+    """data/models/<hash>.pkl, com o hash da planilha e das opções: a mesma execução gera o mesmo arquivo."""
+    key = _cache_key(data_hash, train_features, params, validation_fraction, seed, early_stopping_rounds)
+    return os.path.join(TRAINED_MODELS_DIR, f"{key}.pkl")
+
+
+def save_model(model, train_features, output_path):
+    """Grava o pickle `(modelo, train_features)` de forma atômica e gera a sua conversão nativa."""
+    import joblib
+
+    directory = os.path.dirname(output_path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.pkl')
+    os.close(fd)
+    try:
+        joblib.dump((model, list(train_features)), tmp_path)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    # Converte já no treino: a primeira carga do app não precisa desserializar o pickle
+    return convert_legacy_artifact(output_path)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Treina o modelo XGBoost a partir da planilha unificada.")
+    parser.add_argument('--data', default=TRAINING_DATA_PATH, help="Planilha de treino com a coluna 'label' (padrão: %(default)s)")
+    parser.add_argument('--output', help=f"Pickle gerado (padrão: {TRAINED_MODELS_DIR}/<hash>.pkl)")
+    parser.add_argument('--current', default=MODEL_AND_FEATURES_PATH,
+                        help="Modelo em produção, comparado no holdout e substituído por --promote (padrão: %(default)s)")
+    parser.add_argument('--promote', action='store_true',
+                        help="Copia o modelo novo para --current se a AUC no holdout não for menor que a do atual")
+    parser.add_argument('--cache-dir', default=TRAINING_CACHE_DIR, help="Cache das DMatrix (padrão: %(default)s)")
+    parser.add_argument('--dataset-cache-dir', default=DATASET_CACHE_DIR,
+                        help="Cache colunar da planilha (padrão: %(default)s)")
+    parser.add_argument('--no-cache', action='store_true', help="Lê a planilha e monta as DMatrix sem usar nem gravar cache")
+    parser.add_argument('--nthread', type=int, help="Threads do XGBoost (padrão: todos os núcleos)")
+    parser.add_argument('--seed', type=int, default=RANDOM_SEED, help="Semente do split e do XGBoost (padrão: %(default)s)")
+    parser.add_argument('--validation-fraction', type=float, default=VALIDATION_FRACTION,
+                        help="Fração estratificada usada na validação e no early stopping (padrão: %(default)s)")
+    parser.add_argument('--early-stopping-rounds', type=int, default=EARLY_STOPPING_ROUNDS,
+                        help="Rodadas sem melhora na validação antes de parar (padrão: %(default)s)")
+    for name, default in DEFAULT_PARAMS.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(default), default=default,
+                            help="(padrão: %(default)s)")
+    args = parser.parse_args(argv)
+
+    if not 0 < args.validation_fraction < 1:
+        parser.error("--validation-fraction deve estar entre 0 e 1")
+    if args.promote and not args.current.endswith('.pkl'):
+        parser.error("--promote precisa de um --current .pkl (o artefato nativo é gerado ao lado)")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    cache_dir = None if args.no_cache else args.cache_dir
+    dataset_cache_dir = None if args.no_cache else args.dataset_cache_dir
+    params = {name: getattr(args, name) for name in DEFAULT_PARAMS}
+    train_features = training_features()
+
+    start = time.perf_counter()
+    try:
+        df, data_hash = load_training_frame(args.data, dataset_cache_dir)
+    except FileNotFoundError:
+        print(f"❌ Planilha de treino não encontrada em {args.data}", file=sys.stderr)
+        return 1
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    loaded = time.perf_counter()
+    print(f"📄 {args.data}: {len(df)} registros ({loaded - start:.2f}s, versão {data_hash[:12]})")
+
+    dtrain, dvalidation = build_matrices(
+        df, train_features, data_hash, cache_dir, args.validation_fraction, args.seed, args.nthread or -1
+    )
+    built = time.perf_counter()
+    print(f"🧮 DMatrix: {dtrain.num_row()} treino / {dvalidation.num_row()} validação ({built - loaded:.2f}s)")
+
+    model, metrics = train(dtrain, dvalidation, params, args.early_stopping_rounds, args.seed, args.nthread)
+    trained = time.perf_counter()
+    print(
+        f"🌲 Treino: {metrics['best_iteration'] + 1} árvores, AUC {metrics['auc']:.4f}, "
+        f"acurácia {metrics['accuracy']:.2%} na validação ({trained - built:.2f}s, {args.nthread or os.cpu_count()} threads)"
+    )
+
+    output = args.output or default_output_path(
+        data_hash, train_features, params, args.validation_fraction, args.seed, args.early_stopping_rounds
+    )
+    manifest_path = save_model(model, train_features, output)
+    print(f"✅ {output} (+ {os.path.dirname(manifest_path)}/) em {time.perf_counter() - start:.2f}s")
+
+    candidate, current = compare_on_holdout(df, output, args.current, args.validation_fraction, args.seed)
+    print(f"📊 Holdout ({metrics['validation_rows']} linhas):")
+    print(f"   novo  {output}: AUC {candidate['auc']:.4f}, acurácia {candidate['accuracy']:.2%}")
+    if current is None:
+        print(f"   atual {args.current}: não encontrado")
+    else:
+        print(
+            f"   atual {args.current}: AUC {current['auc']:.4f}, acurácia {current['accuracy']:.2%} "
+            f"(ΔAUC {candidate['auc'] - current['auc']:+.4f})"
+        )
+
+    # Sem modelo em produção não há o que sobrescrever: o novo é instalado direto
+    if current is not None and not args.promote:
+        print("ℹ️ Modelo atual mantido (use --promote para servir o novo)")
+        return 0
+    if current is not None and candidate['auc'] < current['auc']:
+        print(f"❌ AUC menor que a do modelo atual no holdout: {args.current} não foi substituído", file=sys.stderr)
+        return 1
+    save_model(model, train_features, args.current)
+    print(f"🚀 Promovido: {args.current}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
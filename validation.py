@@ -0,0 +1,206 @@
+from collections import Counter
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import METRICS
+from scoring import KNOWN_MISSIONS, NO_MISSION, REQUIRED_COLUMNS, UNCLASSIFIED_MISSION
+
+# --- TIPOS DE PROBLEMA ---
+# Erros (a linha vai para a quarentena): o valor não pode ser lido pelo pré-processamento
+ERROR_NOT_NUMERIC = "valor não numérico"
+ERROR_NOT_FINITE = "valor infinito"
+
+# Avisos (a linha é classificada normalmente): valores fora da faixa esperada. A própria planilha
+# unificada guarda colunas como ra/dec em escala diferente e tem flags fora de 0/1
+WARNING_OUT_OF_RANGE = "fora da faixa"
+WARNING_NOT_BINARY = "flag diferente de 0/1"
+# Missão fora das conhecidas (ex.: TESS, "kepler"): classificada como antes, sem nenhuma mission_* ligada
+WARNING_UNKNOWN_MISSION = "missão desconhecida (classificada sem missão)"
+
+# Linhas inválidas mantidas em memória para exibição (o arquivo de quarentena recebe todas)
+QUARANTINE_PREVIEW_ROWS = 1000
+
+# Uma posição de bit por coluna de REQUIRED_COLUMNS (24 colunas cabem em uint32)
+_COLUMN_BITS = {col[0]: np.uint32(1 << j) for j, col in enumerate(REQUIRED_COLUMNS)}
+_VALID_MISSIONS = list(KNOWN_MISSIONS) + [NO_MISSION, UNCLASSIFIED_MISSION]
+
+
+def format_range(allowed):
+    low, high = allowed
+    return f"[{'-∞' if low is None else low}, {'∞' if high is None else high}]"
+
+
+@dataclass
+class ValidationReport:
+    """Resultado da validação de um bloco: máscara de erros por linha e contagem por coluna/problema."""
+    # Bit j ligado = coluna j de REQUIRED_COLUMNS inválida na linha
+    error_mask: np.ndarray
+    # (coluna, problema) -> número de linhas
+    counts: Counter = field(default_factory=Counter)
+    # coluna -> [(problema, posições das linhas)]
+    details: dict = field(default_factory=dict)
+    # (coluna, aviso) -> número de linhas; não afetam error_mask
+    warnings: Counter = field(default_factory=Counter)
+
+    @property
+    def valid_mask(self):
+        return self.error_mask == 0
+
+    @property
+    def n_invalid(self):
+        return int(np.count_nonzero(self.error_mask))
+
+    def row_errors(self):
+        """Descrição dos erros de cada linha inválida, indexada pela posição da linha no bloco."""
+        positions, messages = [], []
+        for col, problems in self.details.items():
+            for problem, rows in problems:
+                positions.append(rows)
+                messages.append(np.full(len(rows), f"{col}: {problem}", dtype=object))
+        if not positions:
+            return pd.Series(dtype=object)
+
+        errors = pd.Series(np.concatenate(messages), index=np.concatenate(positions))
+        return errors.groupby(level=0, sort=True).agg('; '.join)
+
+
+def _numeric_values(series):
+    """Valores como float64 e a máscara dos que não são numéricos (texto, por exemplo)."""
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return series.to_numpy(dtype=np.float64, na_value=np.nan), None
+
+    coerced = pd.to_numeric(series, errors='coerce')
+    not_numeric = (coerced.isna() & series.notna()).to_numpy()
+    return coerced.to_numpy(dtype=np.float64, na_value=np.nan), not_numeric
+
+
+def _column_problems(series, category, allowed):
+    """Listas (problema, máscara booleana) de erros e de avisos de uma coluna inteira.
+
+    Valores ausentes são válidos (imputados).
+    """
+    if category == "Missão":
+        mission = series.astype(object)
+        return [], [(WARNING_UNKNOWN_MISSION, ~(mission.isin(_VALID_MISSIONS) | mission.isna()).to_numpy())]
+
+    values, not_numeric = _numeric_values(series)
+    problems, warnings = [], []
+    if not_numeric is not None:
+        problems.append((ERROR_NOT_NUMERIC, not_numeric))
+
+    with np.errstate(invalid='ignore'):
+        problems.append((ERROR_NOT_FINITE, np.isinf(values)))
+        if category == "Flag FP":
+            warnings.append((WARNING_NOT_BINARY, ~np.isnan(values) & (values != 0) & (values != 1)))
+        elif allowed is not None:
+            low, high = allowed
+            out_of_range = np.zeros(len(values), dtype=bool)
+            if low is not None:
+                out_of_range |= values < low
+            if high is not None:
+                out_of_range |= values > high
+            warnings.append((f"{WARNING_OUT_OF_RANGE} {format_range(allowed)}", out_of_range & np.isfinite(values)))
+    return problems, warnings
+
+
+def validate_frame(df):
+    """Valida todas as colunas de REQUIRED_COLUMNS presentes em `df`, uma coluna inteira por vez."""
+    error_mask = np.zeros(len(df), dtype=np.uint32)
+    counts = Counter()
+    details = {}
+    warning_counts = Counter()
+
+    for col, _, _, category, allowed in REQUIRED_COLUMNS:
+        if col not in df.columns:
+            continue
+        problems, warnings = _column_problems(df[col], category, allowed)
+        for problem, bad in problems:
+            rows = np.flatnonzero(bad)
+            if len(rows) == 0:
+                continue
+            error_mask[rows] |= _COLUMN_BITS[col]
+            counts[(col, problem)] += len(rows)
+            details.setdefault(col, []).append((problem, rows))
+        for warning, flagged in warnings:
+            n_flagged = int(np.count_nonzero(flagged))
+            if n_flagged:
+                warning_counts[(col, warning)] += n_flagged
+
+    return ValidationReport(error_mask, counts, details, warning_counts)
+
+
+def split_valid_rows(df, report):
+    """Separa as linhas válidas das inválidas; as inválidas ganham o Registro original e a coluna Erros."""
+    if report.n_invalid == 0:
+        return df, df.iloc[:0].assign(Erros=pd.Series(dtype=object))
+
+    valid = df[report.valid_mask]
+    errors = report.row_errors()
+    quarantined = df.iloc[errors.index.to_numpy()].copy()
+    quarantined.insert(0, 'Registro', np.asarray(quarantined.index) + 1)
+    quarantined['Erros'] = errors.to_numpy()
+    return valid, quarantined
+
+
+def summary_frame(counts):
+    """Resumo (coluna, problema, linhas) na ordem de REQUIRED_COLUMNS."""
+    order = {col[0]: j for j, col in enumerate(REQUIRED_COLUMNS)}
+    rows = sorted(counts.items(), key=lambda item: (order[item[0][0]], item[0][1]))
+    return pd.DataFrame(
+        [(col, problem, n) for (col, problem), n in rows],
+        columns=['Coluna', 'Problema', 'Linhas'],
+    )
+
+
+class QuarantiningScorer:
+    """Valida cada bloco antes de classificá-lo: linhas inválidas vão para a quarentena em vez de abortar.
+
+    Mesmo contrato de `score_chunk` (score_dataframe ou ParallelScorer.score). As linhas inválidas são
+    gravadas em CSV em `quarantine_output` (arquivo binário, opcional) e as primeiras ficam em `preview`.
+    Valores fora da faixa esperada só são contados em `warnings`: essas linhas são classificadas.
+    `last_quarantined` guarda as linhas retiradas do último bloco (None se nenhuma), para quem as
+    grava por bloco, como os jobs em segundo plano.
+    """
+
+    def __init__(self, score_chunk, quarantine_output=None, preview_rows=QUARANTINE_PREVIEW_ROWS):
+        self.score_chunk = score_chunk
+        self.quarantine_output = quarantine_output
+        self.preview_rows = preview_rows
+        self.counts = Counter()
+        self.warnings = Counter()
+        self.n_invalid = 0
+        self.preview = []
+        self._preview_count = 0
+        self.last_quarantined = None
+
+    def __call__(self, df, **kwargs):
+        self.last_quarantined = None
+        with METRICS.stage('validate', rows=len(df)):
+            report = validate_frame(df)
+            self.warnings.update(report.warnings)
+            if report.n_invalid:
+                df, self.last_quarantined = split_valid_rows(df, report)
+                self._quarantine(self.last_quarantined, report.counts)
+        return self.score_chunk(df, **kwargs)
+
+    def _quarantine(self, quarantined, counts):
+        self.counts.update(counts)
+        if self.quarantine_output is not None:
+            quarantined.to_csv(
+                self.quarantine_output, index=False, header=self.n_invalid == 0, encoding='utf-8'
+            )
+        if self._preview_count < self.preview_rows:
+            self.preview.append(quarantined.head(self.preview_rows - self._preview_count))
+            self._preview_count += len(self.preview[-1])
+        self.n_invalid += len(quarantined)
+
+    def preview_frame(self):
+        return pd.concat(self.preview) if self.preview else pd.DataFrame()
+
+    def summary(self):
+        return summary_frame(self.counts)
+
+    def warning_summary(self):
+        return summary_frame(self.warnings)